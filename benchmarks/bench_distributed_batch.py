@@ -0,0 +1,82 @@
+"""
+BatchFlow vs. DistributedBatchFlow on the nested-batch workload (classes x students).
+
+Each student's sub-flow loads their grades and runs a CPU-bound scoring step. The outer
+flow is distributed over 1, 2, 4 ... worker processes up to --workers; speedup should
+grow linearly with cores. On a single-core box expect ~1x minus process start-up.
+
+Usage:
+    python benchmarks/bench_distributed_batch.py [--classes 8] [--students 16] [--rounds 5000] [--workers N]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, DistributedBatchFlow
+
+class LoadGrades(Node):
+    def prep(self, shared):
+        return self.params["class"], self.params["student"]
+    def exec(self, key):
+        return [(sum(map(ord, "".join(key))) + i) % 10 for i in range(5)]
+    def post(self, shared, prep_res, grades):
+        shared["grades"] = grades
+        return "score"
+
+class Score(Node):
+    def prep(self, shared):
+        return shared["grades"], shared["rounds"]
+    def exec(self, inputs):
+        grades, rounds = inputs
+        digest = bytes(grades)
+        for _ in range(rounds):
+            digest = hashlib.sha256(digest).digest()
+        return sum(grades) / len(grades) + digest[0] / 1000
+    def post(self, shared, prep_res, score):
+        shared.setdefault("results", {}).setdefault(self.params["class"], {})[self.params["student"]] = score
+
+class ClassFlow(BatchFlow):
+    def prep(self, shared):
+        return [{"student": f"student{i}"} for i in range(shared["students"])]
+
+def student_flow():
+    load = LoadGrades()
+    load - "score" >> Score()
+    return ClassFlow(start=Flow(start=load))
+
+class School(BatchFlow):
+    def prep(self, shared):
+        return [{"class": f"class{i}"} for i in range(shared["classes"])]
+
+class DistributedSchool(DistributedBatchFlow):
+    prep = School.prep
+
+def measure(flow, args):
+    shared = {"classes": args.classes, "students": args.students, "rounds": args.rounds}
+    start = time.perf_counter()
+    flow.run(shared)
+    return time.perf_counter() - start, shared["results"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--classes", type=int, default=8)
+    parser.add_argument("--students", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    serial, expected = measure(School(start=student_flow()), args)
+    print(f"{'flow':<28} {'seconds':>8} {'speedup':>8}")
+    print(f"{'BatchFlow':<28} {serial:>8.2f} {1:>7.2f}x")
+    counts = sorted({1, args.workers} | {2 ** i for i in range(1, 8) if 2 ** i < args.workers})
+    for n in counts:
+        elapsed, results = measure(DistributedSchool(start=student_flow(), workers=n), args)
+        assert results == expected
+        print(f"{f'DistributedBatchFlow x{n}':<28} {elapsed:>8.2f} {serial / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
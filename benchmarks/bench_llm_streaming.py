@@ -0,0 +1,116 @@
+"""
+Time-to-first-output of a 3-node LLM pipeline, with and without streaming between nodes.
+
+The pipeline is generate -> split into sentences -> speak. Generation replays the chunks of
+`fake_stream_llm` from the llm-streaming cookbook with a fixed delay per chunk; speaking a
+sentence takes a fixed time. Without streaming each node waits for the previous one to finish;
+with AsyncStreamNode the first sentence is spoken while the rest is still being generated.
+
+Usage:
+    python benchmarks/bench_llm_streaming.py [--chunk-delay 0.005] [--speak-delay 0.02]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "cookbook" / "pocketflow-llm-streaming"))
+from pocketflow import AsyncNode, AsyncFlow, AsyncStreamNode
+from utils import fake_stream_llm
+
+async def generate(prompt, delay):
+    for chunk in fake_stream_llm(prompt):
+        await asyncio.sleep(delay)
+        yield chunk.choices[0].delta.content
+
+async def sentences(chunks):
+    buf = ""
+    async for chunk in chunks:
+        buf += chunk
+        while "." in buf:
+            sentence, buf = buf.split(".", 1)
+            yield sentence.strip() + "."
+    if buf.strip():
+        yield buf.strip()
+
+async def aiter(items):
+    for i in items:
+        yield i
+
+class Speak(AsyncNode):
+    async def prep_async(self, shared):
+        return shared["sentences"]
+    async def exec_async(self, sentences):
+        first, spoken = None, 0
+        async for _ in sentences:
+            await asyncio.sleep(self.params["speak_delay"])
+            first, spoken = first or time.perf_counter(), spoken + 1
+        return first, spoken
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["first"], shared["spoken"] = exec_res
+
+# --- collected: each node returns a full list ---
+
+class Generate(AsyncNode):
+    async def prep_async(self, shared):
+        return shared["prompt"]
+    async def exec_async(self, prompt):
+        return [c async for c in generate(prompt, self.params["chunk_delay"])]
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["chunks"] = exec_res
+
+class Split(AsyncNode):
+    async def prep_async(self, shared):
+        return shared["chunks"]
+    async def exec_async(self, chunks):
+        return [s async for s in sentences(aiter(chunks))]
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["sentences"] = aiter(exec_res)
+
+# --- streamed: chunks flow between nodes while they are produced ---
+
+class StreamGenerate(AsyncStreamNode):
+    prep_async = Generate.prep_async
+    async def exec_async(self, prompt):
+        async for c in generate(prompt, self.params["chunk_delay"]):
+            yield c
+    post_async = Generate.post_async
+
+class StreamSplit(AsyncStreamNode):
+    prep_async = Split.prep_async
+    async def exec_async(self, chunks):
+        async for s in sentences(chunks):
+            yield s
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["sentences"] = exec_res
+
+def pipeline(generate_cls, split_cls, params):
+    first = generate_cls()
+    first >> split_cls() >> Speak()
+    flow = AsyncFlow(start=first)
+    flow.set_params(params)
+    return flow
+
+async def measure(flow):
+    shared = {"prompt": "Describe the weather."}
+    start = time.perf_counter()
+    await flow.run_async(shared)
+    return shared["first"] - start, time.perf_counter() - start, shared["spoken"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-delay", type=float, default=0.005)
+    parser.add_argument("--speak-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    params = {"chunk_delay": args.chunk_delay, "speak_delay": args.speak_delay}
+
+    print(f"{'pipeline':<10} {'first output ms':>16} {'total ms':>9} {'sentences':>10}")
+    for label, gen, split in (("collected", Generate, Split), ("streamed", StreamGenerate, StreamSplit)):
+        ttfb, total, spoken = asyncio.run(measure(pipeline(gen, split, params)))
+        print(f"{label:<10} {ttfb * 1e3:>16.1f} {total * 1e3:>9.1f} {spoken:>10}")
+
+if __name__ == "__main__":
+    main()
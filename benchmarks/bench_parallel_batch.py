@@ -0,0 +1,60 @@
+"""
+Peak memory and throughput of AsyncParallelBatchNode with and without max_concurrency.
+
+exec_async only sleeps for a fixed latency, standing in for an LLM or embedding call.
+
+Usage:
+    python benchmarks/bench_parallel_batch.py [--sizes 10000 100000] [--latency 0.005] [--concurrency 256]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncParallelBatchNode
+
+class FakeLatencyNode(AsyncParallelBatchNode):
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    async def prep_async(self, shared):
+        return range(shared["n"])
+
+    async def exec_async(self, item):
+        await asyncio.sleep(self.latency)
+        return item
+
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["done"] = len(exec_res)
+
+def measure(n, latency, max_concurrency):
+    node = FakeLatencyNode(latency, max_concurrency=max_concurrency)
+    shared = {"n": n}
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(node.run_async(shared))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert shared["done"] == n
+    return n / elapsed, peak / 2**20
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--concurrency", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'max_concurrency':>16} {'items/s':>12} {'peak MiB':>10}")
+    for n in args.sizes:
+        for limit in (None, args.concurrency):
+            rate, peak = measure(n, args.latency, limit)
+            print(f"{n:>8} {str(limit or 'unbounded'):>16} {rate:>12,.0f} {peak:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+BatchNode vs. ProcessPoolBatchNode on a CPU-bound exec (repeated hashing of a text chunk).
+
+Speedup scales with the number of cores; on a single-core box expect ~1x minus pool start-up.
+
+Usage:
+    python benchmarks/bench_process_pool.py [--items 64] [--rounds 20000] [--workers N] [--chunksize 4]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import BatchNode, ProcessPoolBatchNode
+
+def burn(text, rounds):
+    digest = text.encode()
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+class SerialHash(BatchNode):
+    def prep(self, shared):
+        return [(f"chunk-{i}", shared["rounds"]) for i in range(shared["items"])]
+
+    def exec(self, item):
+        return burn(*item)
+
+    def post(self, shared, prep_res, exec_res):
+        shared["digests"] = exec_res
+
+class PooledHash(ProcessPoolBatchNode):
+    prep, exec, post = SerialHash.prep, SerialHash.exec, SerialHash.post
+
+def measure(node, items, rounds):
+    shared = {"items": items, "rounds": rounds}
+    start = time.perf_counter()
+    node.run(shared)
+    return time.perf_counter() - start, shared["digests"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=4)
+    args = parser.parse_args()
+
+    serial, expected = measure(SerialHash(), args.items, args.rounds)
+    pooled, digests = measure(PooledHash(max_workers=args.workers, chunksize=args.chunksize), args.items, args.rounds)
+    assert digests == expected
+
+    print(f"cores: {os.cpu_count()}  workers: {args.workers}  items: {args.items}")
+    print(f"BatchNode            {serial:8.3f}s  {args.items / serial:8.1f} items/s")
+    print(f"ProcessPoolBatchNode {pooled:8.3f}s  {args.items / pooled:8.1f} items/s  ({serial / pooled:.2f}x)")
+
+if __name__ == "__main__":
+    main()
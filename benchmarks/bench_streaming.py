@@ -0,0 +1,69 @@
+"""
+Peak RSS of BatchNode vs. StreamBatchNode over a large synthetic batch.
+
+Each variant runs in a fresh subprocess so its peak RSS is measured in isolation.
+
+Usage:
+    python benchmarks/bench_streaming.py [--items 1000000]
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import BatchNode, StreamBatchNode
+
+def documents(n):
+    for i in range(n):
+        yield f"document {i} " * 8
+
+class ListIngest(BatchNode):
+    def prep(self, shared):
+        return list(documents(shared["items"]))
+
+    def exec(self, doc):
+        return {"length": len(doc), "words": doc.split()}
+
+    def post(self, shared, prep_res, exec_res):
+        shared["words"] = sum(len(r["words"]) for r in exec_res)
+
+class StreamIngest(StreamBatchNode):
+    def prep(self, shared):
+        return documents(shared["items"])
+
+    exec = ListIngest.exec
+    post = ListIngest.post
+
+def run_child(mode, items):
+    node = {"batch": ListIngest, "stream": StreamIngest}[mode]()
+    shared = {"items": items}
+    start = time.perf_counter()
+    node.run(shared)
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(f"{elapsed} {peak_kib} {shared['words']}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--child", choices=["batch", "stream"])
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.items)
+        return
+
+    print(f"{'node':<16} {'items':>9} {'seconds':>8} {'peak RSS MiB':>13}")
+    for mode, label in (("batch", "BatchNode"), ("stream", "StreamBatchNode")):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--items", str(args.items)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        elapsed, peak_kib = float(out[0]), int(out[1])
+        print(f"{label:<16} {args.items:>9} {elapsed:>8.2f} {peak_kib / 1024:>13.1f}")
+
+if __name__ == "__main__":
+    main()
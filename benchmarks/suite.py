@@ -0,0 +1,172 @@
+"""
+Benchmark suite for the core orchestration engine.
+
+Each case builds a flow, runs it a few times and reports steps/second, per-step
+overhead in microseconds and peak traced memory. Results can be stored as a
+baseline and later runs compared against it.
+
+Usage:
+    python benchmarks/suite.py                     # run and print
+    python benchmarks/suite.py --save              # run and store benchmarks/baseline.json
+    python benchmarks/suite.py --compare           # run and compare to the stored baseline
+    python benchmarks/suite.py -k chain -k nested  # only cases whose name contains a pattern
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+# --- Nodes ---
+
+class Step(Node):
+    def post(self, shared, prep_res, exec_res):
+        shared["steps"] += 1
+
+class AsyncStep(AsyncNode):
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["steps"] += 1
+
+class Flaky(Node):
+    """Fails every attempt but the last, then counts one step per attempt."""
+    def exec(self, prep_res):
+        if self.cur_retry < self.max_retries - 1:
+            raise ValueError("retry")
+    def exec_fallback(self, prep_res, exc):
+        raise exc
+    def post(self, shared, prep_res, exec_res):
+        shared["steps"] += self.max_retries
+
+class FakeLatency(AsyncParallelBatchNode):
+    async def prep_async(self, shared):
+        return range(shared["items"])
+    async def exec_async(self, item):
+        await asyncio.sleep(0.001)
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["steps"] += len(exec_res)
+
+class Params(BatchFlow):
+    def prep(self, shared):
+        return [{"i": i} for i in range(shared["width"])]
+
+class AsyncParams(AsyncParallelBatchFlow):
+    async def prep_async(self, shared):
+        return [{"i": i} for i in range(shared["width"])]
+
+# --- Cases: each returns (steps, run) where run() executes the workload once ---
+
+def chain(node_cls, flow_cls, n):
+    nodes = [node_cls() for _ in range(n)]
+    for a, b in zip(nodes, nodes[1:]):
+        a >> b
+    return flow_cls(start=nodes[0])
+
+def linear_chain(compiled=False):
+    flow = chain(Step, Flow, 1000)
+    if compiled:
+        flow.compile()
+    return 1000, lambda: flow.run({"steps": 0})
+
+def nested_flows(depth=50):
+    flow = Flow(start=Step())
+    for _ in range(depth):
+        flow = Flow(start=flow)
+    return depth + 1, lambda: flow.run({"steps": 0})  # one step per flow level
+
+def wide_batch_flow(width=2000):
+    flow = Params(start=chain(Step, Flow, 3))
+    return width * 3, lambda: flow.run({"steps": 0, "width": width})
+
+def async_chain(n=1000, compiled=False):
+    flow = chain(AsyncStep, AsyncFlow, n)
+    if compiled:
+        flow.compile()
+    return n, lambda: asyncio.run(flow.run_async({"steps": 0}))
+
+def async_parallel_batch_flow(width=500):
+    flow = AsyncParams(start=chain(AsyncStep, AsyncFlow, 3))
+    return width * 3, lambda: asyncio.run(flow.run_async({"steps": 0, "width": width}))
+
+def async_parallel_batch_latency(items=2000, max_concurrency=None):
+    node = FakeLatency(max_concurrency=max_concurrency)
+    return items, lambda: asyncio.run(node.run_async({"steps": 0, "items": items}))
+
+def retry_heavy(n=300, retries=5):
+    flow = chain(lambda: Flaky(max_retries=retries), Flow, n)
+    return n * retries, lambda: flow.run({"steps": 0})
+
+CASES = {
+    "linear_chain_1000": linear_chain,
+    "linear_chain_1000_compiled": lambda: linear_chain(compiled=True),
+    "nested_flows_depth_50": nested_flows,
+    "wide_batch_flow_2000x3": wide_batch_flow,
+    "async_chain_1000": async_chain,
+    "async_chain_10000": lambda: async_chain(10000),
+    "async_chain_10000_compiled": lambda: async_chain(10000, compiled=True),
+    "async_parallel_batch_flow_500x3": async_parallel_batch_flow,
+    "async_parallel_batch_2000_latency_1ms": async_parallel_batch_latency,
+    "async_parallel_batch_2000_latency_1ms_bounded_64": lambda: async_parallel_batch_latency(max_concurrency=64),
+    "retry_heavy_300x5": retry_heavy,
+}
+
+# --- Runner ---
+
+def measure(case, repeat):
+    steps, run = case()
+    run()  # warm-up
+    best = min(_timed(run) for _ in range(repeat))
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"steps_per_sec": steps / best, "us_per_step": best / steps * 1e6, "peak_kib": peak / 1024}
+
+def _timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", action="append", default=[], help="only run cases containing this substring")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help=f"store results as the baseline ({BASELINE.name})")
+    parser.add_argument("--compare", action="store_true", help="compare against the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    baseline = json.loads(BASELINE.read_text())["results"] if args.compare and BASELINE.exists() else {}
+    results, regressions = {}, []
+    print(f"{'case':<50} {'steps/s':>12} {'us/step':>9} {'peak KiB':>10} {'vs base':>8}")
+    for name, case in CASES.items():
+        if args.k and not any(k in name for k in args.k):
+            continue
+        r = results[name] = measure(case, args.repeat)
+        delta = ""
+        if name in baseline:
+            ratio = r["us_per_step"] / baseline[name]["us_per_step"]
+            delta = f"{ratio:.2f}x"
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+                delta += " !"
+        print(f"{name:<50} {r['steps_per_sec']:>12,.0f} {r['us_per_step']:>9.2f} {r['peak_kib']:>10.1f} {delta:>8}")
+
+    if args.save:
+        BASELINE.write_text(json.dumps({"python": platform.python_version(), "machine": platform.machine(), "results": results}, indent=2) + "\n")
+        print(f"\nSaved baseline to {BASELINE}")
+    if regressions:
+        print(f"\nRegressions (> {args.tolerance:.0%} slower per step): {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
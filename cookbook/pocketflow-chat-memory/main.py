@@ -1,4 +1,5 @@
 from flow import chat_flow
+from utils.memory import ConversationMemory
 
 def run_chat_memory_demo():
     """
@@ -6,7 +7,8 @@ def run_chat_memory_demo():
     
     Features:
     1. Maintains a window of the 3 most recent conversation pairs
-    2. Archives older conversations with embeddings
+    2. Archives older conversations with embeddings in `chat_memory/`, so they
+       are remembered in the next session
     3. Retrieves 1 relevant past conversation when needed
     4. Total context to LLM: 3 recent pairs + 1 retrieved pair
     """
@@ -19,8 +21,9 @@ def run_chat_memory_demo():
     print("Type 'exit' to end the conversation")
     print("=" * 50)
     
-    # Run the chat flow
-    chat_flow.run({})
+    # Run the chat flow with the memory saved by earlier sessions
+    with ConversationMemory("chat_memory", max_turns=100000) as memory:
+        chat_flow.run({"memory": memory})
 
 if __name__ == "__main__":
     run_chat_memory_demo()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pocketflow import Node
-from utils.vector_index import create_index, add_vector, search_vectors
+from utils.memory import ConversationMemory
 from utils.call_llm import call_llm
 from utils.get_embedding import get_embedding
 
@@ -122,22 +122,22 @@ class EmbedNode(Node):
         }
     
     def post(self, shared, prep_res, exec_res):
-        """Store the embedding and add to index"""
+        """Store the conversation and its embedding in memory"""
         if not exec_res:
             # If there's nothing to embed, just continue with the next question
             return "question"
             
-        # Initialize vector index if not exist
-        if "vector_index" not in shared:
-            shared["vector_index"] = create_index()
-            shared["vector_items"] = []  # Track items separately
+        # Use an in-memory store if main didn't open a persistent one
+        # (built only when missing: each one allocates a matrix and a SQLite connection)
+        if "memory" not in shared:
+            shared["memory"] = ConversationMemory()
+        memory = shared["memory"]
             
-        # Add the embedding to the index and store the conversation
-        position = add_vector(shared["vector_index"], exec_res["embedding"])
-        shared["vector_items"].append(exec_res["conversation"])
+        # Add the conversation and its embedding in one call
+        position, = memory.add([exec_res["conversation"]], [exec_res["embedding"]])
         
-        print(f"✅ Added conversation to index at position {position}")
-        print(f"✅ Index now contains {len(shared['vector_items'])} conversations")
+        print(f"✅ Added conversation to memory at position {position}")
+        print(f"✅ Memory now contains {len(memory)} conversations")
         
         # Continue with the next question
         return "question"
@@ -152,16 +152,13 @@ class RetrieveNode(Node):
         latest_user_msg = next((msg for msg in reversed(shared["messages"]) 
                                 if msg["role"] == "user"), {"content": ""})
         
-        # Check if we have a vector index with items
-        if ("vector_index" not in shared or 
-            "vector_items" not in shared or 
-            len(shared["vector_items"]) == 0):
+        # Check if we have any archived conversations
+        if "memory" not in shared or len(shared["memory"]) == 0:
             return None
             
         return {
             "query": latest_user_msg["content"],
-            "vector_index": shared["vector_index"],
-            "vector_items": shared["vector_items"]
+            "memory": shared["memory"]
         }
     
     def exec(self, inputs):
@@ -170,8 +167,7 @@ class RetrieveNode(Node):
             return None
             
         query = inputs["query"]
-        vector_index = inputs["vector_index"]
-        vector_items = inputs["vector_items"]
+        memory = inputs["memory"]
         
         print(f"🔍 Finding relevant conversation for: {query[:30]}...")
         
@@ -179,17 +175,14 @@ class RetrieveNode(Node):
         query_embedding = get_embedding(query)
         
         # Search for the most similar conversation
-        indices, distances = search_vectors(vector_index, query_embedding, k=1)
+        results = memory.search(query_embedding, k=1)
         
-        if not indices:
+        if not results:
             return None
             
-        # Get the corresponding conversation
-        conversation = vector_items[indices[0]]
-        
         return {
-            "conversation": conversation,
-            "distance": distances[0]
+            "conversation": results[0]["conversation"],
+            "distance": results[0]["distance"]
         }
     
     def post(self, shared, prep_res, exec_res):
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+
+class ConversationMemory:
+    """Archived conversations and their embeddings, searched with one matrix product.
+
+    Embeddings are normalised and stored in a preallocated float32 matrix that
+    doubles when full, so cosine similarity for every stored turn is `vectors @ q`
+    and the squared L2 distance is 2 - 2 * cosine. With a `path` the matrix and the
+    turn times are memory-mapped .npy files and the conversations live in SQLite,
+    so memory survives between sessions and opening it reads almost nothing.
+
+    - half_life (seconds): older turns score lower, score = cosine * 0.5 ** (age / half_life).
+    - max_turns: adding past this evicts the oldest turns. Evicted rows are skipped
+      by search and reclaimed by compact(), which runs once half the rows are dead.
+    - index="hnsw": also keep an HNSW graph (utils.vector_index.create_index) for
+      approximate search that stays sub-millisecond on large memories. Needs faiss.
+    """
+    def __init__(self, path=None, dim=1536, capacity=1024, half_life=None, max_turns=None, index=None):
+        self.path, self.half_life, self.max_turns, self.index_kind = path, half_life, max_turns, index
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, "turns.db") if path else ":memory:", check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS turns(row INTEGER PRIMARY KEY, conversation TEXT)")
+        self.size = self.db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM turns").fetchone()[0]
+        if path and os.path.exists(self._file("vectors")):
+            self.vectors = np.lib.format.open_memmap(self._file("vectors"), mode="r+")
+            self.times = np.lib.format.open_memmap(self._file("times"), mode="r+")
+        else:
+            self.vectors, self.times = self._allocate(max(capacity, 1), dim)
+        self.dim = self.vectors.shape[1]
+        self.count = int(np.count_nonzero(~np.isnan(self.times[:self.size])))
+        self.index = None
+        if index:
+            self._load_index()
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _allocate(self, capacity, dim, suffix=""):
+        """New vector and time arrays; evicted and unused rows have time NaN"""
+        if not self.path:
+            return np.zeros((capacity, dim), dtype=np.float32), np.full(capacity, np.nan)
+        vectors = np.lib.format.open_memmap(self._file("vectors" + suffix), mode="w+", dtype=np.float32, shape=(capacity, dim))
+        times = np.lib.format.open_memmap(self._file("times" + suffix), mode="w+", dtype=np.float64, shape=(capacity,))
+        times[:] = np.nan
+        return vectors, times
+
+    def _replace(self, vectors, times):
+        """Swap in new arrays (with a path, the new files were written beside the old ones and are renamed over them)"""
+        if self.path:
+            vectors.flush(), times.flush()
+            del self.vectors, self.times
+            for name in ("vectors", "times"):
+                os.replace(self._file(name + ".new"), self._file(name))
+            vectors = np.lib.format.open_memmap(self._file("vectors"), mode="r+")
+            times = np.lib.format.open_memmap(self._file("times"), mode="r+")
+        self.vectors, self.times = vectors, times
+
+    def __len__(self):
+        return self.count
+
+    def add(self, conversations, embeddings, times=None):
+        """Store a batch of conversations with their embeddings (one row each); returns their rows"""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(conversations), -1)
+        n, start = len(conversations), self.size
+        if start + n > len(self.vectors):
+            capacity = max(start + n, 2 * len(self.vectors))
+            vectors, new_times = self._allocate(capacity, self.dim, ".new")
+            vectors[:start], new_times[:start] = self.vectors[:start], self.times[:start]
+            self._replace(vectors, new_times)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.vectors[start:start + n] = embeddings / np.maximum(norms, 1e-12)
+        self.times[start:start + n] = time.time() if times is None else times
+        self.db.executemany("INSERT INTO turns VALUES(?, ?)",
+                            ((start + i, json.dumps(c)) for i, c in enumerate(conversations)))
+        self.size, self.count = start + n, self.count + n
+        if self.index is not None:
+            self.index.add(self.vectors[start:start + n])
+        if self.max_turns and self.count > self.max_turns:
+            self.evict(keep=self.max_turns)
+        return list(range(start, start + n))
+
+    def _scores(self, rows, query, now):
+        scores = self.vectors[rows] @ query if rows is not None else self.vectors[:self.size] @ query
+        times = self.times[rows] if rows is not None else self.times[:self.size]
+        if self.half_life:
+            scores = scores * 0.5 ** ((now - times) / self.half_life)
+        scores[np.isnan(times)] = -np.inf  # evicted
+        return scores
+
+    def search(self, query, k=1, now=None):
+        """Return up to k dicts (conversation, score, distance, row), best first"""
+        k = min(k, self.count)
+        if k == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(np.linalg.norm(query), 1e-12)
+        now = time.time() if now is None else now
+        if self.index is not None:
+            # Oversample from the graph, then rescore the candidates exactly with decay
+            _, rows = self.index.search(query[None], min(self.size, max(4 * k, 32)))
+            rows = rows[0][rows[0] >= 0]
+        else:
+            rows = None
+        scores = self._scores(rows, query, now)
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        best = best[scores[best] > -np.inf]
+        found = best if rows is None else rows[best]
+        cosine = self.vectors[found] @ query
+        texts = dict(self.db.execute(f"SELECT row, conversation FROM turns WHERE row IN ({','.join('?' * len(found))})",
+                                     [int(r) for r in found]))
+        return [{"conversation": json.loads(texts[int(r)]), "score": float(s), "distance": float(2 - 2 * c), "row": int(r)}
+                for r, s, c in zip(found, scores[best], cosine)]
+
+    def evict(self, keep=None, before=None):
+        """Forget all but the newest `keep` turns and/or the turns older than `before`"""
+        times = self.times[:self.size]
+        alive = np.flatnonzero(~np.isnan(times))
+        dead = alive[times[alive] < before] if before is not None else np.empty(0, dtype=np.int64)
+        if keep is not None and len(alive) > keep:
+            oldest = alive[np.argsort(times[alive], kind="stable")[:len(alive) - keep]]
+            dead = np.union1d(dead, oldest)
+        if len(dead):
+            times[dead] = np.nan
+            self.db.executemany("DELETE FROM turns WHERE row=?", ((int(r),) for r in dead))
+            self.count -= len(dead)
+            if self.count < self.size // 2:
+                self.compact()
+        return len(dead)
+
+    def compact(self):
+        """Move live rows to the front and drop evicted ones; rows are renumbered"""
+        alive = np.flatnonzero(~np.isnan(self.times[:self.size]))
+        vectors, times = self._allocate(max(len(self.vectors) // 2, len(alive), 1), self.dim, ".new")
+        vectors[:len(alive)], times[:len(alive)] = self.vectors[alive], self.times[alive]
+        self._replace(vectors, times)
+        rows = self.db.execute("SELECT row, conversation FROM turns ORDER BY row").fetchall()
+        self.db.execute("DELETE FROM turns")
+        self.db.executemany("INSERT INTO turns VALUES(?, ?)", ((i, c) for i, (_, c) in enumerate(rows)))
+        self.size = self.count = len(alive)
+        if self.index is not None:
+            self._build_index()
+
+    def _build_index(self):
+        from .vector_index import create_index
+        self.index = create_index(self.dim, kind=self.index_kind)
+        if self.size:
+            self.index.add(np.ascontiguousarray(self.vectors[:self.size]))
+
+    def _load_index(self):
+        import faiss
+        file = os.path.join(self.path, "index.faiss") if self.path else None
+        if file and os.path.exists(file):
+            self.index = faiss.read_index(file, faiss.IO_FLAG_MMAP)
+            if self.index.ntotal == self.size:
+                return
+        self._build_index()  # missing or out of date
+
+    def save(self):
+        """Flush vectors, times and conversations (and the graph index) to disk"""
+        if not self.path:
+            return
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush(), self.times.flush()
+        self.db.commit()
+        if self.index is not None:
+            import faiss
+            file = os.path.join(self.path, "index.faiss")
+            faiss.write_index(self.index, file + ".new")  # the old file may still be mapped
+            os.replace(file + ".new", file)
+
+    def close(self):
+        self.save()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
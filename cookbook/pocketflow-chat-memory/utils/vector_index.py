@@ -1,8 +1,19 @@
 import numpy as np
 import faiss
 
-def create_index(dimension=1536):
-    return faiss.IndexFlatL2(dimension)
+def create_index(dimension=1536, kind="flat", m=32, ef_search=64):
+    """Create an empty index: "flat" (exact) or "hnsw" (approximate, faster on large memories)
+    
+    Memories arrive one at a time, so only indexes that need no training are offered;
+    see ../pocketflow-rag/index_factory.py for IVF and a recall/QPS benchmark.
+    """
+    if kind == "flat":
+        return faiss.IndexFlatL2(dimension)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, m)
+        index.hnsw.efSearch = ef_search
+        return index
+    raise ValueError(f"Unknown index kind {kind!r}, expected 'flat' or 'hnsw'")
 
 def add_vector(index, vector):
     # Make sure the vector is a numpy array with the right shape for FAISS
@@ -1,7 +1,7 @@
-from openai import OpenAI
 import os
 
 def stream_llm(prompt):
+    from openai import OpenAI
     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
 
     # Make a streaming chat completion request
@@ -0,0 +1,78 @@
+"""
+Recall@k vs. queries/sec of flat, IVF and HNSW indexes on synthetic clustered data.
+
+Ground truth comes from exact search. IVF is swept over nprobe and HNSW over
+ef_search; each row is one setting. The summary picks the fastest setting of
+each kind that reaches `--target` recall, found with index_factory.autotune.
+
+Usage:
+    python bench_ann.py [--n 200000] [--dim 128] [--queries 1000] [--k 10] [--target 0.95] [--numpy]
+
+--n 1000000 shows the million-vector trade-off (needs ~1 GB of RAM per index at dim 128).
+"""
+import argparse
+import time
+import numpy as np
+from index_factory import create_index, autotune, recall_at_k, tune, faiss
+
+def clustered(n, dim, clusters, rng):
+    """Gaussian blobs around random centres; real embeddings are clustered, not uniform"""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32) * 0.7
+    return centres[rng.integers(clusters, size=n)] + rng.standard_normal((n, dim)).astype(np.float32)
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def build(dim, kind, data, backend, **params):
+    index = create_index(dim, kind, train=data if kind == "ivf" else None, backend=backend, **params)
+    index.add_with_ids(data, np.arange(len(data)))
+    return index
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--target", type=float, default=0.95)
+    parser.add_argument("--numpy", action="store_true", help="also run the NumPy fallback indexes")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    data = clustered(args.n + args.queries, args.dim, 1000, rng)
+    data, queries = data[:args.n], data[args.n:]
+
+    backends = (["faiss"] if faiss else []) + (["numpy"] if args.numpy or not faiss else [])
+    configs = [("flat", {}, None, [None]), ("ivf", {}, "nprobe", [1, 4, 16, 64]),
+               ("hnsw", {"m": 32}, "ef_search", [16, 32, 64, 128, 256])]
+    truth = None
+    print(f"{args.n} vectors, dim {args.dim}, {args.queries} queries, k={args.k}\n")
+    print(f"{'index':<22} {'build s':>8} {'setting':>14} {'recall@k':>9} {'QPS':>10}")
+    summary = []
+    for backend in backends:
+        for kind, params, param, values in configs:
+            if kind == "hnsw" and backend == "numpy":
+                continue
+            index, build_s = timed(lambda: build(args.dim, kind, data, backend, **params))
+            label = f"{kind} ({backend})"
+            for value in values:
+                if param:
+                    tune(index, **{param: value})
+                (_, found), search_s = timed(lambda: index.search(queries, args.k))
+                if truth is None:
+                    truth = found  # the first index is exact flat search
+                setting = f"{param}={value}" if param else "exact"
+                print(f"{label:<22} {build_s:>8.2f} {setting:>14} {recall_at_k(found, truth):>9.3f} {args.queries / search_s:>10.0f}")
+            if param:
+                value = autotune(index, queries, truth, args.target)
+                (_, found), search_s = timed(lambda: index.search(queries, args.k))
+                summary.append((label, f"{param}={value}", recall_at_k(found, truth), args.queries / search_s))
+            del index
+        print()
+    print(f"autotuned to recall@{args.k} >= {args.target}:")
+    for label, setting, recall, qps in summary:
+        print(f"  {label:<20} {setting:>14} {recall:>9.3f} {qps:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Embedding throughput (chunks/sec) of one request per chunk vs. micro-batched EmbedDocumentsNode.
+
+Runs offline against utils.fake_embeddings, which sleeps like a network round trip
+(`--latency` per request plus `--per-text` per input).
+
+Usage:
+    python bench_embed.py [--chunks 2000] [--latency 0.05] [--per-text 0.0005]
+"""
+import argparse
+import functools
+import time
+import numpy as np
+from pocketflow import BatchNode
+from nodes import EmbedDocumentsNode
+from utils import fake_embeddings
+
+class EmbedOneByOne(BatchNode):
+    """The previous EmbedDocumentsNode: one request per chunk, stacked at the end."""
+    def __init__(self, embed):
+        super().__init__()
+        self.embed = embed
+
+    def prep(self, shared):
+        return shared["chunks"]
+
+    def exec(self, text):
+        return self.embed([text])[0]
+
+    def post(self, shared, prep_res, exec_res_list):
+        shared["embeddings"] = np.array(exec_res_list, dtype=np.float32)
+
+def chunks(n):
+    topics = ["install", "neural", "revolution", "protocol", "fungi", "soil", "bank", "device"]
+    return [f"chunk {i} about {topics[i % len(topics)]} and {topics[i * 7 % len(topics)]} " * 20 for i in range(n)]
+
+def measure(node, shared):
+    start = time.perf_counter()
+    node._run(shared)  # skip Node.run's warning about successors
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-text", type=float, default=0.0005)
+    args = parser.parse_args()
+    embed = functools.partial(fake_embeddings, latency=args.latency, per_text=args.per_text)
+    texts = chunks(args.chunks)
+
+    print(f"{'variant':<36} {'seconds':>8} {'chunks/s':>10}")
+    variants = [
+        ("one request per chunk", lambda: EmbedOneByOne(embed)),
+        ("batches of 64, 1 at a time", lambda: EmbedDocumentsNode(embed, max_workers=1)),
+        ("batches of 64, 4 at a time", lambda: EmbedDocumentsNode(embed, max_workers=4)),
+        ("batches of 64, 8 at a time", lambda: EmbedDocumentsNode(embed, max_workers=8)),
+    ]
+    n = min(args.chunks, 200)  # the one-by-one baseline is slow; time it on a sample
+    for label, make in variants:
+        sample = texts[:n] if label.startswith("one") else texts
+        shared = {"chunks": sample}
+        elapsed = measure(make(), shared)
+        print(f"{label:<36} {elapsed:>8.2f} {len(sample) / elapsed:>10.0f}")
+
+    shared = {"chunks": texts}
+    node = EmbedDocumentsNode(embed)
+    measure(node, shared)
+    elapsed = measure(node, shared)
+    print(f"{'warm cache':<36} {elapsed:>8.2f} {len(texts) / elapsed:>10.0f}")
+
+if __name__ == "__main__":
+    main()
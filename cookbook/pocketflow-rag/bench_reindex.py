@@ -0,0 +1,70 @@
+"""
+Full build vs. incremental re-index of the persistent vector index.
+
+Builds an index over `--docs` synthetic documents, then changes, adds and removes
+`--churn` of them and runs the offline flow again. Embeddings come from
+utils.fake_embeddings, which sleeps like a network round trip. Also times loading
+the saved index for the online flow.
+
+Usage:
+    python bench_reindex.py [--docs 100000] [--churn 0.01] [--dim 256] [--latency 0.05]
+"""
+import argparse
+import functools
+import random
+import shutil
+import tempfile
+import time
+from pocketflow import Flow
+from nodes import DiffDocumentsNode, ChunkDocumentsNode, EmbedDocumentsNode, UpdateIndexNode
+from utils import fake_embeddings
+from vector_store import VectorStore
+
+WORDS = ["install", "neural", "revolution", "protocol", "fungi", "soil", "bank", "device", "flow", "graph"]
+
+def document(i, version=0):
+    rng = random.Random(i * 1000 + version)
+    return " ".join(rng.choice(WORDS) for _ in range(40)) + f" doc {i} v{version}"
+
+def offline_flow(embed, dim):
+    diff, chunk, update = DiffDocumentsNode(dim=dim), ChunkDocumentsNode(), UpdateIndexNode()
+    diff >> chunk >> EmbedDocumentsNode(embed, dim=dim, max_workers=8) >> update
+    return Flow(start=diff)
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    embed = functools.partial(fake_embeddings, dim=args.dim, latency=args.latency, per_text=0)
+    flow = offline_flow(embed, args.dim)
+    path = tempfile.mkdtemp()
+    try:
+        docs = {str(i): document(i) for i in range(args.docs)}
+        full = timed(lambda: flow.run({"texts": docs, "index_dir": path}))
+
+        n = int(args.docs * args.churn) // 3 or 1
+        for i in range(n):
+            docs[str(i)] = document(i, version=1)  # changed
+            docs.pop(str(args.docs - 1 - i))  # removed
+            docs[str(args.docs + i)] = document(args.docs + i)  # added
+        incremental = timed(lambda: flow.run({"texts": docs, "index_dir": path}))
+        noop = timed(lambda: flow.run({"texts": docs, "index_dir": path}))
+        load = timed(lambda: VectorStore(path, readonly=True))
+    finally:
+        shutil.rmtree(path)
+
+    print(f"\n{'run':<40} {'seconds':>8} {'vs full':>8}")
+    for label, t in [("full build", full), (f"re-index, {args.churn:.0%} churn", incremental),
+                     ("re-index, no changes", noop), ("load saved index (mmap)", load)]:
+        print(f"{label:<40} {t:>8.2f} {t / full:>8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-query retrieval vs. RetrievalService's coalesced batches under concurrent load.
+
+Requests arrive at `--rate` per second. "per query" runs the batch retrieval flow
+once per request on the default thread pool, making one embedding call and one
+index search per query. "coalesced" sends the same requests through
+RetrievalService. Embeddings come from utils.fake_embeddings, which sleeps like a
+network round trip.
+
+Usage:
+    python bench_retrieval.py [--requests 2000] [--rate 300] [--docs 20000] [--k 3]
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import shutil
+import tempfile
+import time
+import numpy as np
+from pocketflow import Flow
+from nodes import EmbedQueriesNode, RetrieveDocumentsNode
+from service import RetrievalService
+from utils import fake_embeddings
+from bench_reindex import document, offline_flow
+
+def retrieval_flow(embed, k):
+    embed_queries = EmbedQueriesNode(embed)
+    embed_queries >> RetrieveDocumentsNode(k=k)
+    return Flow(start=embed_queries)
+
+async def load(send, queries, rate):
+    """Send queries at a steady rate; return each request's latency"""
+    async def one(query, at):
+        await asyncio.sleep(max(0, at - time.perf_counter()))
+        start = time.perf_counter()
+        await send(query)
+        return time.perf_counter() - start
+    start = time.perf_counter()
+    return await asyncio.gather(*(one(q, start + i / rate) for i, q in enumerate(queries)))
+
+def report(label, latencies, elapsed):
+    ms = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{label:<14} {len(latencies) / elapsed:>8.0f} {ms[0]:>9.1f} {ms[1]:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=300)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+    embed = functools.partial(fake_embeddings, dim=args.dim, latency=0.05, per_text=0.0005)
+    path = tempfile.mkdtemp()
+    queries = [document(i)[:80] for i in range(args.requests)]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            build = functools.partial(fake_embeddings, dim=args.dim, latency=0, per_text=0)
+            offline_flow(build, args.dim).run({"texts": {str(i): document(i) for i in range(args.docs)}, "index_dir": path})
+
+            flow, shared = retrieval_flow(embed, args.k), {"index_dir": path}
+            def per_query(query):
+                run = {**shared, "queries": [query]}
+                flow.run(run)
+                shared.setdefault("index", run["index"])
+            start = time.perf_counter()
+            single = asyncio.run(load(lambda q: asyncio.to_thread(per_query, q), queries, args.rate))
+            single_s = time.perf_counter() - start
+
+            service = RetrievalService(path, flow=retrieval_flow(embed, args.k))
+            start = time.perf_counter()
+            coalesced = asyncio.run(load(service.retrieve, queries, args.rate))
+            coalesced_s = time.perf_counter() - start
+            service.close()
+    finally:
+        shutil.rmtree(path)
+
+    print(f"{args.requests} requests at {args.rate:.0f}/s, top-{args.k} of {args.docs} docs\n")
+    print(f"{'mode':<14} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    report("per query", single, single_s)
+    report("coalesced", coalesced, coalesced_s)
+    print(f"\n{service.batches} batches, {service.requests / service.batches:.1f} queries per batch")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,17 @@
 from pocketflow import Flow
-from nodes import EmbedDocumentsNode, CreateIndexNode, EmbedQueryNode, RetrieveDocumentNode, ChunkDocumentsNode, GenerateAnswerNode
+from nodes import DiffDocumentsNode, ChunkDocumentsNode, EmbedDocumentsNode, UpdateIndexNode, EmbedQueryNode, RetrieveDocumentNode, GenerateAnswerNode, EmbedQueriesNode, RetrieveDocumentsNode
 
 def get_offline_flow():
-    # Create offline flow for document indexing
+    # Create offline flow for incremental document indexing
+    diff_docs_node = DiffDocumentsNode()
     chunk_docs_node = ChunkDocumentsNode()
     embed_docs_node = EmbedDocumentsNode()
-    create_index_node = CreateIndexNode()
+    update_index_node = UpdateIndexNode()
     
     # Connect the nodes
-    chunk_docs_node >> embed_docs_node >> create_index_node
+    diff_docs_node >> chunk_docs_node >> embed_docs_node >> update_index_node
     
-    offline_flow = Flow(start=chunk_docs_node)
+    offline_flow = Flow(start=diff_docs_node)
     return offline_flow
 
 def get_online_flow():
@@ -25,6 +26,16 @@ def get_online_flow():
     online_flow = Flow(start=embed_query_node)
     return online_flow
 
+def get_batch_retrieval_flow(k=1, **search_params):
+    # Create flow that retrieves documents for a list of queries at once
+    embed_queries_node = EmbedQueriesNode()
+    retrieve_docs_node = RetrieveDocumentsNode(k=k, **search_params)
+    
+    # Connect the nodes
+    embed_queries_node >> retrieve_docs_node
+    
+    return Flow(start=embed_queries_node)
+
 # Initialize flows
 offline_flow = get_offline_flow()
 online_flow = get_online_flow()
\ No newline at end of file
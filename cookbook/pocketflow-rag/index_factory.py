@@ -0,0 +1,283 @@
+"""
+Vector index factory: exact (flat), inverted-file (IVF) and graph (HNSW) indexes.
+
+All indexes use squared L2 distance and the faiss calling convention
+(`train`, `add_with_ids`, `remove_ids`, `search`, `ntotal`, `is_trained`), so
+VectorStore and the benchmarks can use any of them. faiss is used when it is
+installed; otherwise flat and IVF fall back to the NumPy versions below.
+
+- flat: exact search, query time grows linearly with the corpus.
+- ivf: k-means buckets; searches the `nprobe` nearest of `nlist` buckets. Needs training.
+- hnsw: navigable small-world graph; `ef_search` trades speed for recall. faiss only.
+  The graph can't drop vectors, so remove_ids() rebuilds it from the ones that remain.
+"""
+import math
+import zipfile
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+KINDS = ("flat", "ivf", "hnsw")
+
+def default_nlist(n):
+    """About 4 * sqrt(n) buckets, with at least 39 training points per bucket as faiss recommends"""
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+def create_index(dim, kind="flat", train=None, nlist=None, m=32, ef_construction=200, backend=None, **search_params):
+    """Create an empty index; IVF indexes are trained on `train` when it's given.
+
+    nlist defaults to default_nlist(len(train)). backend is "faiss" or "numpy"
+    (default: faiss if installed). Extra keyword arguments (nprobe, ef_search)
+    are passed to tune().
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown index kind {kind!r}, expected one of {KINDS}")
+    backend = backend or ("faiss" if faiss else "numpy")
+    if kind == "ivf" and nlist is None:
+        if train is None:
+            raise ValueError("An IVF index needs nlist or training vectors")
+        nlist = default_nlist(len(train))
+    if backend == "faiss":
+        if kind == "flat":
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        elif kind == "ivf":
+            index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        else:
+            hnsw = faiss.IndexHNSWFlat(dim, m)
+            hnsw.hnsw.efConstruction = ef_construction
+            index = faiss.IndexIDMap2(hnsw)
+    elif kind == "hnsw":
+        raise ValueError("HNSW indexes need faiss (pip install faiss-cpu)")
+    else:
+        index = NumpyFlatIndex(dim) if kind == "flat" else NumpyIVFIndex(dim, nlist)
+    if train is not None and not index.is_trained:
+        index.train(np.ascontiguousarray(train, dtype=np.float32))
+    tune(index, **search_params)
+    return index
+
+def tune(index, nprobe=None, ef_search=None):
+    """Set search-time parameters; the ones that don't apply to this index are ignored"""
+    if isinstance(index, NumpyIVFIndex):
+        if nprobe:
+            index.nprobe = nprobe
+    elif faiss and isinstance(index, faiss.Index):
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        if nprobe and isinstance(inner, faiss.IndexIVF):
+            inner.nprobe = nprobe
+        if ef_search and isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = ef_search
+    return index
+
+def remove_ids(index, ids):
+    """Remove vectors by id; returns (index, number removed).
+
+    HNSW graphs don't support removal, so they are rebuilt from the remaining
+    vectors with the same parameters and a new index is returned.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    inner = faiss.downcast_index(index.index) if faiss and isinstance(index, faiss.IndexIDMap) else index
+    if not (faiss and isinstance(inner, faiss.IndexHNSW)):
+        return index, index.remove_ids(ids)
+    stored = faiss.vector_to_array(index.id_map)
+    keep = ~np.isin(stored, ids)
+    rebuilt = create_index(index.d, "hnsw", m=inner.hnsw.nb_neighbors(1), ef_construction=inner.hnsw.efConstruction,
+                           ef_search=inner.hnsw.efSearch)
+    if keep.any():
+        rebuilt.add_with_ids(inner.reconstruct_n(0, index.ntotal)[keep], stored[keep])
+    return rebuilt, int((~keep).sum())
+
+def recall_at_k(found, truth):
+    """Fraction of the true k nearest neighbours (rows of `truth`) that appear in `found`"""
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def autotune(index, queries, truth, target=0.95, values=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)):
+    """Apply and return the smallest nprobe / ef_search whose recall@k reaches `target`.
+
+    `truth` holds the exact k nearest ids of each query (e.g. from a flat index).
+    Flat indexes are exact and return None; if no value reaches the target the
+    largest one is kept.
+    """
+    inner = faiss.downcast_index(index.index) if faiss and isinstance(index, faiss.IndexIDMap) else index
+    if faiss and isinstance(inner, faiss.IndexHNSW):
+        param = "ef_search"
+        values = [v for v in values if v >= truth.shape[1]]  # efSearch below k can't return k results
+    elif isinstance(inner, NumpyIVFIndex) or (faiss and isinstance(inner, faiss.IndexIVF)):
+        param = "nprobe"
+        values = [v for v in values if v <= inner.nlist]
+    else:
+        return None
+    for value in values:
+        tune(index, **{param: value})
+        if recall_at_k(index.search(queries, truth.shape[1])[1], truth) >= target:
+            break
+    return value
+
+def write_index(index, path):
+    if isinstance(index, NumpyIndex):
+        index.save(path)
+    else:
+        faiss.write_index(index, path)
+
+def read_index(path, mmap=False):
+    """Load an index written by write_index; mmap maps faiss vectors instead of reading them"""
+    if zipfile.is_zipfile(path):
+        return NumpyIndex.load(path)
+    if faiss is None:
+        raise ImportError(f"{path} is a faiss index; install faiss-cpu to load it")
+    return faiss.read_index(path, getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) if mmap else 0)
+
+def top_k(distances, k):
+    """Column positions of the k smallest values in each row, sorted"""
+    if k < distances.shape[1]:
+        part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+    order = np.take_along_axis(distances, part, 1).argsort(axis=1, kind="stable")
+    return np.take_along_axis(part, order, 1)
+
+def sq_distances(queries, vectors, vector_norms=None):
+    """Squared L2 distances between every query and every vector, via one matrix product"""
+    if vector_norms is None:
+        vector_norms = np.einsum("ij,ij->i", vectors, vectors)
+    d = np.einsum("ij,ij->i", queries, queries)[:, None] - 2 * queries @ vectors.T + vector_norms
+    return np.maximum(d, 0, out=d)
+
+class NumpyIndex:
+    """Shared storage for the NumPy indexes: a growable float32 matrix plus int64 ids"""
+    is_trained = True
+
+    def __init__(self, dim):
+        self.d = dim
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.ntotal = 0
+
+    def _append(self, vectors, ids):
+        """Append rows, doubling capacity instead of copying on every call"""
+        n = self.ntotal + len(vectors)
+        if n > len(self.vectors):
+            cap = max(n, 2 * len(self.vectors), 1024)
+            grow = lambda a, shape: np.concatenate([a[:self.ntotal], np.empty(shape, dtype=a.dtype)])
+            self.vectors = grow(self.vectors, (cap - self.ntotal, self.d))
+            self.ids = grow(self.ids, cap - self.ntotal)
+            self.norms = grow(self.norms, cap - self.ntotal)
+        self.vectors[self.ntotal:n] = vectors
+        self.ids[self.ntotal:n] = ids
+        self.norms[self.ntotal:n] = np.einsum("ij,ij->i", vectors, vectors)
+        self.ntotal = n
+
+    def add_with_ids(self, vectors, ids):
+        self._append(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+
+    def remove_ids(self, ids):
+        keep = ~np.isin(self.ids[:self.ntotal], ids)
+        removed = self.ntotal - int(keep.sum())
+        self.vectors, self.ids, self.norms = self.vectors[:self.ntotal][keep], self.ids[:self.ntotal][keep], self.norms[:self.ntotal][keep]
+        self.ntotal = len(self.ids)
+        return removed
+
+    def _search_rows(self, queries, rows, k):
+        """Exact top-k of `queries` among the given stored rows (all rows if None)"""
+        vectors, norms, ids = (self.vectors[:self.ntotal], self.norms[:self.ntotal], self.ids[:self.ntotal]) if rows is None \
+            else (self.vectors[rows], self.norms[rows], self.ids[rows])
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        if len(ids):
+            d = sq_distances(queries, vectors, norms)
+            best = top_k(d, min(k, len(ids)))
+            distances[:, :best.shape[1]] = np.take_along_axis(d, best, 1)
+            labels[:, :best.shape[1]] = ids[best]
+        return distances, labels
+
+    def _state(self):
+        return {"vectors": self.vectors[:self.ntotal], "ids": self.ids[:self.ntotal]}
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, kind=np.array(type(self).__name__), **self._state())
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            state = {k: data[k] for k in data.files}
+        cls = {c.__name__: c for c in (NumpyFlatIndex, NumpyIVFIndex)}[str(state.pop("kind"))]
+        index = cls.__new__(cls)
+        index._restore(state)
+        return index
+
+    def _restore(self, state):
+        self.vectors, self.ids = state["vectors"], state["ids"]
+        self.d, self.ntotal = self.vectors.shape[1], len(self.ids)
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+class NumpyFlatIndex(NumpyIndex):
+    def search(self, queries, k):
+        return self._search_rows(np.asarray(queries, dtype=np.float32), None, k)
+
+class NumpyIVFIndex(NumpyIndex):
+    """IVF with k-means centroids; each search scans the vectors of its nprobe nearest lists"""
+    def __init__(self, dim, nlist, nprobe=1):
+        super().__init__(dim)
+        self.nlist, self.nprobe, self.centroids = nlist, nprobe, None
+        self.lists = np.empty(0, dtype=np.int64)  # list number of each stored row
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, vectors, iterations=10, seed=0):
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), 256 * self.nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = sq_distances(sample, centroids).argmin(axis=1)
+            counts = np.bincount(assign, minlength=self.nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        self.centroids = centroids
+
+    def add_with_ids(self, vectors, ids):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        super().add_with_ids(vectors, ids)
+        self.lists = np.concatenate([self.lists, sq_distances(vectors, self.centroids).argmin(axis=1)])
+        self._order = None
+
+    def remove_ids(self, ids):
+        keep = ~np.isin(self.ids[:self.ntotal], ids)
+        self.lists = self.lists[keep]
+        self._order = None
+        return super().remove_ids(ids)
+
+    def _inverted_lists(self):
+        """Rows sorted by list number, plus where each list starts; rebuilt after adds and removes"""
+        if getattr(self, "_order", None) is None:
+            self._order = np.argsort(self.lists, kind="stable")
+            self._starts = np.searchsorted(self.lists[self._order], np.arange(self.nlist + 1))
+        return self._order, self._starts
+
+    def search(self, queries, k):
+        queries = np.asarray(queries, dtype=np.float32)
+        order, starts = self._inverted_lists()
+        probes = top_k(sq_distances(queries, self.centroids), min(self.nprobe, self.nlist))
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        labels = np.empty((len(queries), k), dtype=np.int64)
+        for i, lists in enumerate(probes):
+            rows = np.concatenate([order[starts[l]:starts[l + 1]] for l in lists])
+            d, l = self._search_rows(queries[i:i + 1], rows, k)
+            distances[i], labels[i] = d[0], l[0]
+        return distances, labels
+
+    def _state(self):
+        return {**super()._state(), "lists": self.lists, "centroids": self.centroids, "nprobe": np.array(self.nprobe)}
+
+    def _restore(self, state):
+        super()._restore(state)
+        self.lists, self.centroids = state["lists"], state["centroids"]
+        self.nlist, self.nprobe, self._order = len(self.centroids), int(state["nprobe"]), None
@@ -1,69 +1,157 @@
-from pocketflow import Node, Flow, BatchNode
+import hashlib
+from pocketflow import Node, Flow, BatchNode, ThreadedBatchNode
 import numpy as np
-import faiss
-from utils import call_llm, get_embedding, fixed_size_chunk
+from utils import call_llm, get_embedding, get_embeddings, estimate_tokens, fixed_size_chunk, EMBEDDING_DIM
+from vector_store import VectorStore
 
 # Nodes for the offline flow
+class DiffDocumentsNode(Node):
+    """Compare document hashes with the stored index to find new, changed and removed documents.
+
+    A new index is built with index_factory.create_index(dim, kind, **index_params),
+    e.g. kind="ivf", index_params={"nprobe": 16}.
+    """
+    def __init__(self, dim=EMBEDDING_DIM, kind="flat", index_params=None, **kwargs):
+        super().__init__(**kwargs)
+        self.dim, self.kind, self.index_params = dim, kind, index_params or {}
+
+    def prep(self, shared):
+        """Open the index (reusing a writable one from an earlier run) and key the documents by id"""
+        store = shared.get("index")
+        if not isinstance(store, VectorStore) or store.readonly:
+            store = VectorStore(shared["index_dir"], self.dim, kind=self.kind, **self.index_params)
+        texts = shared["texts"]
+        docs = texts if isinstance(texts, dict) else {str(i): text for i, text in enumerate(texts)}
+        return store, docs
+
+    def exec(self, inputs):
+        """Hash every document; anything whose hash differs from the stored one is re-indexed"""
+        store, docs = inputs
+        hashes = {doc_id: hashlib.sha256(text.encode()).hexdigest() for doc_id, text in docs.items()}
+        stored = store.doc_hashes()
+        changed = {doc_id: h for doc_id, h in hashes.items() if stored.get(doc_id) != h}
+        removed = [doc_id for doc_id, h in stored.items() if hashes.get(doc_id) != h]
+        return changed, removed
+
+    def post(self, shared, prep_res, exec_res):
+        """Store the index and the documents to (re-)index in the shared store"""
+        store, docs = prep_res
+        changed, removed = exec_res
+        shared["index"] = store
+        shared["doc_hashes"] = changed
+        shared["changed_docs"] = {doc_id: docs[doc_id] for doc_id in changed}
+        shared["removed_docs"] = removed
+        print(f"✅ {len(changed)} new or changed, {len(removed)} stale, {len(docs) - len(changed)} unchanged documents")
+        return "default"
+
 class ChunkDocumentsNode(BatchNode):
     def prep(self, shared):
-        """Read texts from shared store"""
-        return shared["texts"]
+        """Read new and changed documents from shared store"""
+        return list(shared["changed_docs"].items())
     
-    def exec(self, text):
-        """Chunk a single text into smaller pieces"""
+    def exec(self, doc):
+        """Chunk a single document into smaller pieces"""
+        doc_id, text = doc
         return fixed_size_chunk(text)
     
     def post(self, shared, prep_res, exec_res_list):
-        """Store chunked texts in the shared store"""
+        """Store chunked texts, and the document each chunk came from, in the shared store"""
         # Flatten the list of lists into a single list of chunks
-        all_chunks = []
-        for chunks in exec_res_list:
+        all_chunks, chunk_docs = [], []
+        for (doc_id, _), chunks in zip(prep_res, exec_res_list):
             all_chunks.extend(chunks)
+            chunk_docs.extend([doc_id] * len(chunks))
         
-        # Replace the original texts with the flat list of chunks
-        shared["texts"] = all_chunks
+        shared["chunks"] = all_chunks
+        shared["chunk_docs"] = chunk_docs
         
         print(f"✅ Created {len(all_chunks)} chunks from {len(prep_res)} documents")
         return "default"
     
-class EmbedDocumentsNode(BatchNode):
+class EmbedDocumentsNode(ThreadedBatchNode):
+    """Embed chunks in micro-batches, sending a few requests at a time.
+
+    Chunks are grouped into requests of at most `max_batch` texts and `max_tokens`
+    estimated tokens. Up to `max_workers` requests run at once, and each writes its
+    rows straight into one preallocated float32 matrix. Embeddings are cached in
+    shared["embedding_cache"] by text hash, so repeated chunks are embedded once.
+    """
+    def __init__(self, embed=get_embeddings, dim=EMBEDDING_DIM, max_batch=64, max_tokens=8000, max_workers=4, **kwargs):
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.embed, self.dim, self.max_batch, self.max_tokens = embed, dim, max_batch, max_tokens
+
     def prep(self, shared):
-        """Read texts from shared store and return as an iterable"""
-        return shared["texts"]
-    
-    def exec(self, text):
-        """Embed a single text"""
-        return get_embedding(text)
-    
+        """Fill cached rows, then group the remaining texts into request-sized batches.
+
+        Each batch is (keys and texts, matrix, rows), so runs don't share state
+        through the node.
+        """
+        texts = shared["chunks"]
+        cache = shared.setdefault("embedding_cache", {})
+        matrix = np.empty((len(texts), self.dim), dtype=np.float32)
+        new, rows = {}, {}  # text hash -> text / rows still to embed
+        for i, text in enumerate(texts):
+            key = hashlib.sha256(text.encode()).hexdigest()
+            if key in cache:
+                matrix[i] = cache[key]
+            else:
+                new[key] = text
+                rows.setdefault(key, []).append(i)
+
+        batches, batch, tokens = [], [], 0
+        for key, text in new.items():
+            n = estimate_tokens(text)
+            if batch and (len(batch) == self.max_batch or tokens + n > self.max_tokens):
+                batches.append((batch, matrix, rows))
+                batch, tokens = [], 0
+            batch.append((key, text))
+            tokens += n
+        if batch:
+            batches.append((batch, matrix, rows))
+        return batches or [([], matrix, rows)]  # all cached: one empty batch still carries the matrix
+
+    def exec(self, inputs):
+        """Embed one batch with a single request and write its rows into the matrix"""
+        batch, matrix, rows = inputs
+        if not batch:
+            return []
+        vectors = self.embed([text for _, text in batch])
+        for (key, _), vector in zip(batch, vectors):
+            matrix[rows[key]] = vector
+        return [key for key, _ in batch]
+
     def post(self, shared, prep_res, exec_res_list):
-        """Store embeddings in the shared store"""
-        embeddings = np.array(exec_res_list, dtype=np.float32)
-        shared["embeddings"] = embeddings
-        print(f"✅ Created {len(embeddings)} document embeddings")
+        """Cache the new embeddings and store the matrix in the shared store"""
+        cache = shared["embedding_cache"]
+        _, matrix, rows = prep_res[0]
+        for keys in exec_res_list:
+            for key in keys:
+                cache[key] = matrix[rows[key][0]].copy()  # a view would keep the whole matrix alive
+        shared["embeddings"] = matrix
+        requests = sum(1 for batch, _, _ in prep_res if batch)
+        print(f"✅ Created {len(matrix)} document embeddings ({len(rows)} new, {requests} requests)")
         return "default"
 
-class CreateIndexNode(Node):
+class UpdateIndexNode(Node):
     def prep(self, shared):
-        """Get embeddings from shared store"""
-        return shared["embeddings"]
+        """Get the index, stale documents and new chunk embeddings from shared store"""
+        return (shared["index"], shared["removed_docs"], shared["doc_hashes"],
+                shared["chunk_docs"], shared["chunks"], shared["embeddings"])
     
-    def exec(self, embeddings):
-        """Create FAISS index and add embeddings"""
-        print("🔍 Creating search index...")
-        dimension = embeddings.shape[1]
-        
-        # Create a flat L2 index
-        index = faiss.IndexFlatL2(dimension)
-        
-        # Add the embeddings to the index
-        index.add(embeddings)
-        
-        return index
+    def exec(self, inputs):
+        """Remove stale vectors, add new ones under fresh ids, and save the index"""
+        store, removed, doc_hashes, chunk_docs, chunks, embeddings = inputs
+        print("🔍 Updating search index...")
+        dropped = store.remove(removed)
+        store.add(doc_hashes, chunk_docs, chunks, embeddings)
+        if removed or doc_hashes:
+            store.save()
+        return dropped, len(chunks)
     
     def post(self, shared, prep_res, exec_res):
-        """Store the index in shared store"""
-        shared["index"] = exec_res
-        print(f"✅ Index created with {exec_res.ntotal} vectors")
+        """Report the index size"""
+        dropped, added = exec_res
+        print(f"✅ Index has {shared['index'].ntotal} vectors ({added} added, {dropped} removed)")
         return "default"
 
 # Nodes for the online flow
@@ -84,24 +172,36 @@ class EmbedQueryNode(Node):
         return "default"
 
 class RetrieveDocumentNode(Node):
+    def __init__(self, nprobe=None, ef_search=None, **kwargs):
+        """Optionally override the saved index's search parameters (IVF nprobe, HNSW ef_search)"""
+        super().__init__(**kwargs)
+        self.search_params = {"nprobe": nprobe, "ef_search": ef_search}
+
+    def load_index(self, shared):
+        """Get the index, loading the saved one if this process hasn't built one"""
+        if not isinstance(shared.get("index"), VectorStore):
+            shared["index"] = VectorStore(shared["index_dir"], readonly=True)
+        shared["index"].tune(**self.search_params)
+        return shared["index"]
+
     def prep(self, shared):
-        """Get query embedding, index, and texts from shared store"""
-        return shared["query_embedding"], shared["index"], shared["texts"]
+        """Get query embedding and index from shared store"""
+        return shared["query_embedding"], self.load_index(shared)
     
     def exec(self, inputs):
         """Search the index for similar documents"""
         print("🔎 Searching for relevant documents...")
-        query_embedding, index, texts = inputs
+        query_embedding, index = inputs
         
-        # Search for the most similar document
-        distances, indices = index.search(query_embedding, k=1)
+        # Search for the most similar chunk
+        distances, ids = index.search(query_embedding, k=1)
         
-        # Get the index of the most similar document
-        best_idx = indices[0][0]
+        # Get the id of the most similar chunk
+        best_idx = ids[0][0]
         distance = distances[0][0]
         
         # Get the corresponding text
-        most_relevant_text = texts[best_idx]
+        most_relevant_text = index.texts([best_idx])[0]
         
         return {
             "text": most_relevant_text,
@@ -141,3 +241,50 @@ Answer:
         print("\n🤖 Generated Answer:")
         print(exec_res)
         return "default"
+
+# Nodes for batched retrieval: many queries, one embedding call and one search
+class EmbedQueriesNode(Node):
+    def __init__(self, embed=get_embeddings, **kwargs):
+        super().__init__(**kwargs)
+        self.embed = embed
+
+    def prep(self, shared):
+        """Get the list of queries from shared store"""
+        return shared["queries"]
+
+    def exec(self, queries):
+        """Embed all queries with a single request"""
+        print(f"🔍 Embedding {len(queries)} queries")
+        return np.asarray(self.embed(queries), dtype=np.float32)
+
+    def post(self, shared, prep_res, exec_res):
+        """Store the query matrix, one row per query, in shared store"""
+        shared["query_embeddings"] = exec_res
+        return "default"
+
+class RetrieveDocumentsNode(RetrieveDocumentNode):
+    def __init__(self, k=1, **kwargs):
+        super().__init__(**kwargs)
+        self.k = k
+
+    def prep(self, shared):
+        """Get the query matrix and index from shared store"""
+        return shared["query_embeddings"], self.load_index(shared)
+
+    def exec(self, inputs):
+        """Search for every query at once and fetch all hit texts with one lookup"""
+        query_embeddings, index = inputs
+        if not len(query_embeddings):
+            return []
+        distances, ids = index.search(query_embeddings, k=self.k)
+        hits = np.unique(ids[ids >= 0])
+        texts = dict(zip(hits.tolist(), index.texts(hits.tolist()))) if len(hits) else {}
+        return [[{"text": texts[i], "index": i, "distance": float(d)}
+                 for i, d in zip(row_ids.tolist(), row_distances) if i >= 0]
+                for row_ids, row_distances in zip(ids, distances)]
+
+    def post(self, shared, prep_res, exec_res):
+        """Store the top-k documents of each query, in query order"""
+        shared["retrieved_documents"] = exec_res
+        print(f"📄 Retrieved documents for {len(exec_res)} queries")
+        return "default"
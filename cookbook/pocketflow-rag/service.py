@@ -0,0 +1,65 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from flow import get_batch_retrieval_flow
+
+class RetrievalService:
+    """Serve retrieval requests from many concurrent callers with batched flow runs.
+
+    The first request waits up to `window` seconds for others to arrive; then all
+    pending requests (at most `max_batch`) go through one run of the batch
+    retrieval flow: one embedding call and one index search for the whole batch.
+    Batches run one at a time on a worker thread, and requests that arrive
+    meanwhile join the next batch, so batches grow with the load.
+
+        service = RetrievalService("rag_index", k=3)
+        docs = await service.retrieve("How to install PocketFlow?")
+    """
+    def __init__(self, index_dir, flow=None, window=0.005, max_batch=64, k=1):
+        self.flow = flow or get_batch_retrieval_flow(k=k)
+        self.shared = {"index_dir": index_dir}  # the loaded index stays here between batches
+        self.window, self.max_batch = window, max_batch
+        self.pending, self.timer, self.running = [], None, None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = self.requests = 0
+
+    async def retrieve(self, query):
+        """Return the top-k documents for `query` as dicts with text, index and distance"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((query, future))
+        if self.running is None:
+            if len(self.pending) >= self.max_batch:
+                self._flush()
+            elif self.timer is None:
+                self.timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+        self.running = asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        shared = {**self.shared, "queries": [query for query, _ in batch]}
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.flow.run, shared)
+        except Exception as e:
+            results = [e] * len(batch)
+        else:
+            self.shared["index"] = shared["index"]
+            results = shared["retrieved_documents"]
+        self.batches, self.requests = self.batches + 1, self.requests + len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # the caller was cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        self.running = None
+        if self.pending:  # these waited for the last batch; don't make them wait a window too
+            self._flush()
+
+    def close(self):
+        self.executor.shutdown()
@@ -1,8 +1,13 @@
 import os
+import re
+import time
+import zlib
 import numpy as np
-from openai import OpenAI
+
+EMBEDDING_DIM = 1536  # text-embedding-ada-002
 
 def call_llm(prompt):    
+    from openai import OpenAI
     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     r = client.chat.completions.create(
         model="gpt-4o",
@@ -11,6 +16,7 @@ def call_llm(prompt):
     return r.choices[0].message.content
 
 def get_embedding(text):
+    from openai import OpenAI
     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
     
     response = client.embeddings.create(
@@ -24,6 +30,40 @@ def get_embedding(text):
     # Convert to numpy array for consistency with other embedding functions
     return np.array(embedding, dtype=np.float32)
 
+def get_embeddings(texts):
+    """Embed a batch of texts in one request. Returns a float32 matrix with one row per text."""
+    from openai import OpenAI
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+
+    response = client.embeddings.create(
+        model="text-embedding-ada-002",
+        input=list(texts)
+    )
+
+    # Rows come back tagged with their input position
+    rows = sorted(response.data, key=lambda d: d.index)
+    return np.array([d.embedding for d in rows], dtype=np.float32)
+
+def fake_embeddings(texts, dim=EMBEDDING_DIM, latency=0.05, per_text=0.0005):
+    """Offline stand-in for get_embeddings, for tests and benchmarks.
+
+    Each call sleeps like a network round trip (`latency` plus `per_text` per input).
+    Vectors hash each word into one of `dim` buckets, so texts sharing words are
+    similar and the same text always gets the same unit vector.
+    """
+    time.sleep(latency + per_text * len(texts))
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            h = zlib.crc32(word.encode())
+            out[i, h % dim] += 1.0 if h & 1 << 31 else -1.0
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return out / np.maximum(norms, 1e-12)
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token) for sizing embedding batches."""
+    return len(text) // 4 + 1
+
 def fixed_size_chunk(text, chunk_size=2000):
     chunks = []
     for i in range(0, len(text), chunk_size):
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import numpy as np
+from index_factory import create_index, read_index, remove_ids, write_index, tune
+
+class VectorStore:
+    """A vector index plus chunk metadata, kept in a directory and updated in place.
+
+    Chunks get stable integer ids, so documents can be added and removed without
+    touching the rest of the index. Document hashes, chunk texts and ids live in
+    SQLite (meta.db); vectors live in index.faiss. HNSW indexes can't drop
+    vectors, so removing documents from one rebuilds the graph. Open with readonly=True to
+    memory-map the index, which makes loading almost free.
+
+    A new index is created on the first add() with index_factory.create_index(dim,
+    kind, **index_params), so IVF indexes are trained on the first batch.
+    """
+    def __init__(self, path, dim=None, readonly=False, kind="flat", **index_params):
+        os.makedirs(path, exist_ok=True)
+        self.path, self.readonly, self.kind, self.index_params = path, readonly, kind, index_params
+        self.db = sqlite3.connect(os.path.join(path, "meta.db"), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs(id TEXT PRIMARY KEY, hash TEXT);
+            CREATE TABLE IF NOT EXISTS chunks(id INTEGER PRIMARY KEY AUTOINCREMENT, doc TEXT, text TEXT);
+            CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc);
+        """)
+        index_file = os.path.join(path, "index.faiss")
+        self.index = read_index(index_file, mmap=readonly) if os.path.exists(index_file) else None
+        self.dim = self.index.d if self.index is not None else dim
+        self.tune(nprobe=index_params.get("nprobe"), ef_search=index_params.get("ef_search"))
+
+    def doc_hashes(self):
+        return dict(self.db.execute("SELECT id, hash FROM docs"))
+
+    def remove(self, doc_ids):
+        """Drop documents and all their chunks"""
+        doc_ids = [(d,) for d in doc_ids]
+        ids = [i for d in doc_ids for (i,) in self.db.execute("SELECT id FROM chunks WHERE doc=?", d)]
+        if ids and self.index is not None:
+            self.index, _ = remove_ids(self.index, ids)  # an HNSW index is rebuilt
+        self.db.executemany("DELETE FROM chunks WHERE doc=?", doc_ids)
+        self.db.executemany("DELETE FROM docs WHERE id=?", doc_ids)
+        return len(ids)
+
+    def add(self, doc_hashes, chunk_docs, chunks, embeddings):
+        """Record documents and index their chunks; chunk i belongs to chunk_docs[i]"""
+        self.db.executemany("REPLACE INTO docs VALUES(?, ?)", doc_hashes.items())
+        ids = []
+        for doc, text in zip(chunk_docs, chunks):
+            ids.append(self.db.execute("INSERT INTO chunks(doc, text) VALUES(?, ?)", (doc, text)).lastrowid)
+        if ids:
+            if self.index is None:
+                self.index = create_index(self.dim, self.kind, train=embeddings, **self.index_params)
+            self.index.add_with_ids(embeddings, np.array(ids, dtype=np.int64))
+
+    def save(self):
+        if self.index is not None:
+            write_index(self.index, os.path.join(self.path, "index.faiss"))
+        self.db.commit()
+
+    def tune(self, **search_params):
+        """Set nprobe / ef_search on the index; they're saved with it"""
+        if self.index is not None:
+            tune(self.index, **search_params)
+
+    def search(self, queries, k=1):
+        """Return (distances, chunk ids) for each query row; missing results have id -1"""
+        if self.index is None:
+            return np.full((len(queries), k), np.inf, dtype=np.float32), np.full((len(queries), k), -1, dtype=np.int64)
+        return self.index.search(queries, k)
+
+    def texts(self, ids):
+        rows = dict(self.db.execute(f"SELECT id, text FROM chunks WHERE id IN ({','.join('?' * len(ids))})", [int(i) for i in ids]))
+        return [rows[int(i)] for i in ids]
+
+    @property
+    def ntotal(self):
+        return self.index.ntotal if self.index is not None else 0
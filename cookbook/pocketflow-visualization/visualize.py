@@ -19,42 +19,40 @@ from async_flow import order_pipeline
 
 
 def build_mermaid(start):
-    ids, visited, lines = {}, set(), ["graph LR"]
-    ctr = 1
+    """Render a flow as a Mermaid graph from its cached topology (see Flow.analyze)."""
+    if not isinstance(start, Flow):
+        start = Flow(start=start)
+    ids, rendered, lines = {}, set(), ["graph LR"]
 
     def get_id(n):
-        nonlocal ctr
-        return (
-            ids[n] if n in ids else (ids.setdefault(n, f"N{ctr}"), (ctr := ctr + 1))[0]
-        )
-
-    def link(a, b, action=None):
-        if action:
-            lines.append(f"    {a} -->|{action}| {b}")
-        else:
-            lines.append(f"    {a} --> {b}")
-
-    def walk(node, parent=None, action=None):
-        if node in visited:
-            return parent and link(parent, get_id(node), action)
-        visited.add(node)
-        if isinstance(node, Flow):
-            node.start_node and parent and link(parent, get_id(node.start_node), action)
-            lines.append(
-                f"\n    subgraph sub_flow_{get_id(node)}[{type(node).__name__}]"
-            )
-            node.start_node and walk(node.start_node)
-            for act, nxt in node.successors.items():
-                node.start_node and walk(nxt, get_id(node.start_node), act) or (
-                    parent and link(parent, get_id(nxt), action)
-                ) or walk(nxt, None, act)
-            lines.append("    end\n")
-        else:
-            lines.append(f"    {(nid := get_id(node))}['{type(node).__name__}']")
-            parent and link(parent, nid, action)
-            [walk(nxt, nid, act) for act, nxt in node.successors.items()]
-
-    walk(start)
+        return ids.setdefault(n, f"N{len(ids) + 1}")
+
+    def ref(n):
+        return f"sub_flow_{get_id(n)}" if isinstance(n, Flow) else get_id(n)
+
+    def subgraph(flow, body):
+        lines.append(f"\n    subgraph sub_flow_{get_id(flow)}[{type(flow).__name__}]")
+        body()
+        lines.append("    end\n")
+
+    def render(topo):
+        if topo.flow in rendered:
+            return
+        rendered.add(topo.flow)
+        for i, node in enumerate(topo.nodes):
+            children = topo.children.get(i)
+            if children is None:
+                lines.append(f"    {get_id(node)}['{type(node).__name__}']")
+            elif children[0].flow is node:
+                subgraph(node, lambda: render(children[0]))
+            else:  # ParallelFlow: one subgraph per branch
+                subgraph(node, lambda: [subgraph(t.flow, lambda t=t: render(t)) for t in children])
+        for i, transitions in enumerate(topo.table):
+            for action, j in transitions.items():
+                arrow = "-->" if action == "default" else f"-->|{action}|"
+                lines.append(f"    {ref(topo.nodes[i])} {arrow} {ref(topo.nodes[j])}")
+
+    subgraph(start, lambda: render(start.analyze()))
     return "\n".join(lines)
 
 
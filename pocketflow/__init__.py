@@ -1,16 +1,56 @@
-import asyncio, warnings, copy, time
+import asyncio, warnings, copy, time, functools, collections, collections.abc, itertools, pickle, sqlite3, hashlib, threading, json, os, random, contextvars, math, sys, tempfile, inspect, ast, textwrap, traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+_profiler=contextvars.ContextVar("_profiler",default=None)
+
+class Profiler:
+    def __init__(self): self.stats,self.events,self.lock,self.t0=collections.defaultdict(collections.Counter),[],threading.Lock(),time.perf_counter()
+    def __enter__(self):
+        self._token=_profiler.set(self); return self
+    def __exit__(self,*exc):
+        _profiler.reset(self._token)
+    def node(self,node,shared):
+        t0=time.perf_counter(); p=node.prep(shared); t1=time.perf_counter(); e=node._exec(p); t2=time.perf_counter(); r=node.post(shared,p,e)
+        self.record(node,p,t0,t1,t2,time.perf_counter()); return r
+    async def node_async(self,node,shared):
+        t0=time.perf_counter(); p=await node.prep_async(shared); t1=time.perf_counter(); e=await node._exec(p); t2=time.perf_counter(); r=await node.post_async(shared,p,e)
+        self.record(node,p,t0,t1,t2,time.perf_counter()); return r
+    def record(self,node,p,*ts):
+        name,tid=type(node).__name__,self._tid()
+        with self.lock:
+            s=self.stats[name]; s["calls"]+=1
+            if isinstance(node,BatchNode) and hasattr(p,"__len__"): s["items"]+=len(p)
+            for ph,a,b in zip(("prep","exec","post"),ts,ts[1:]): s[ph]+=b-a; self.events.append({"name":f"{name}.{ph}","cat":ph,"ph":"X","ts":(a-self.t0)*1e6,"dur":(b-a)*1e6,"pid":os.getpid(),"tid":tid})
+    def failed(self,node,final):
+        with self.lock: self.stats[type(node).__name__]["fallbacks" if final else "retries"]+=1
+    @staticmethod
+    def _tid():
+        try: t=asyncio.current_task()
+        except RuntimeError: t=None
+        return id(t) if t else threading.get_ident()
+    def summary(self):
+        cols=("calls","prep","exec","post","retries","fallbacks","items"); rows=[f"{'node':<24}"+"".join(f"{c:>11}" for c in cols)]
+        for name,s in sorted(self.stats.items(),key=lambda kv: -(kv[1]["prep"]+kv[1]["exec"]+kv[1]["post"])):
+            rows.append(f"{name[:24]:<24}"+"".join(f"{s[c]*1e3:>9.2f}ms" if c in ("prep","exec","post") else f"{s[c]:>11}" for c in cols))
+        return "\n".join(rows)
+    def chrome_trace(self): return {"traceEvents":list(self.events),"displayTimeUnit":"ms"}
+    def save_trace(self,path):
+        with open(path,"w") as f: json.dump(self.chrome_trace(),f)
 
 class BaseNode:
     def __init__(self): self.params,self.successors={},{}
     def set_params(self,params): self.params=params
     def next(self,node,action="default"):
+        if isinstance(node,list): node=(AsyncParallelFlow if any(isinstance(n,AsyncNode) for n in node) else ParallelFlow)(*node)
         if action in self.successors: warnings.warn(f"Overwriting successor for action '{action}'")
         self.successors[action]=node; return node
     def prep(self,shared): pass
     def exec(self,prep_res): pass
     def post(self,shared,prep_res,exec_res): pass
     def _exec(self,prep_res): return self.exec(prep_res)
-    def _run(self,shared): p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
+    def _run(self,shared):
+        if p:=_profiler.get(): return p.node(self,shared)
+        p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
     def run(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use Flow.")  
         return self._run(shared)
@@ -23,78 +63,838 @@ class _ConditionalTransition:
     def __init__(self,src,action): self.src,self.action=src,action
     def __rshift__(self,tgt): return self.src.next(tgt,self.action)
 
+_MISS=object()
+
+class ExecCache:
+    def __init__(self,maxsize=1024,ttl=None,path=None):
+        self.maxsize,self.ttl,self.path,self.hits,self.misses=maxsize,ttl,path,0,0; self.lru,self.lock=collections.OrderedDict(),threading.Lock()
+        self.db=sqlite3.connect(path,check_same_thread=False) if path else None
+        if self.db: self.db.execute("CREATE TABLE IF NOT EXISTS cache(k TEXT PRIMARY KEY,t REAL,v BLOB)")
+    def __getstate__(self): return {"maxsize":self.maxsize,"ttl":self.ttl,"path":self.path}
+    def __setstate__(self,state): self.__init__(**state)
+    def key(self,node,prep_res):
+        try: return hashlib.sha256(pickle.dumps((type(node).__module__,type(node).__qualname__,getattr(node,"version",None),prep_res),4)).hexdigest()
+        except Exception: return None
+    def _fresh(self,t): return not self.ttl or time.time()-t<self.ttl
+    def _remember(self,k,t,v):
+        self.lru[k]=(t,v); self.lru.move_to_end(k)
+        while len(self.lru)>self.maxsize: self.lru.popitem(last=False)
+    def get(self,k,default=None):
+        with self.lock:
+            e=self.lru.get(k)
+            if e and self._fresh(e[0]): self.lru.move_to_end(k); self.hits+=1; return e[1]
+            r=self.db and self.db.execute("SELECT t,v FROM cache WHERE k=?",(k,)).fetchone()
+            if r and self._fresh(r[0]): v=pickle.loads(r[1]); self._remember(k,r[0],v); self.hits+=1; return v
+            self.misses+=1; return default
+    def set(self,k,v):
+        with self.lock:
+            t=time.time(); self._remember(k,t,v)
+            if self.db:
+                with self.db: self.db.execute("REPLACE INTO cache VALUES(?,?,?)",(k,t,pickle.dumps(v)))
+    def clear(self):
+        with self.lock:
+            self.lru.clear(); self.hits=self.misses=0
+            if self.db:
+                with self.db: self.db.execute("DELETE FROM cache")
+
+class RetryBudget:
+    def __init__(self,retries,per=None): self.retries,self.per,self.tokens,self.t,self.lock=retries,per,retries,time.monotonic(),threading.Lock()
+    def take(self):
+        with self.lock:
+            if self.per: now=time.monotonic(); self.tokens=min(self.retries,self.tokens+(now-self.t)*self.retries/self.per); self.t=now
+            if self.tokens<1: return False
+            self.tokens-=1; return True
+    def __getstate__(self): return {"retries":self.retries,"per":self.per,"tokens":self.tokens}
+    def __setstate__(self,state): self.__init__(state["retries"],state["per"]); self.tokens=state["tokens"]
+
+class Backoff:
+    def __init__(self,base=1,factor=2,max_delay=60,jitter=True,retry_on=Exception,budget=None): self.base,self.factor,self.max_delay,self.jitter,self.retry_on,self.budget=base,factor,max_delay,jitter,retry_on,budget
+    def delay(self,attempt,exc):
+        if not (isinstance(exc,self.retry_on) if isinstance(self.retry_on,(type,tuple)) else self.retry_on(exc)): return None
+        if self.budget and not self.budget.take(): return None
+        if (ra:=getattr(exc,"retry_after",None)) is not None: return float(ra)
+        d=min(self.max_delay,self.base*self.factor**attempt); return random.uniform(0,d) if self.jitter else d
+
 class Node(BaseNode):
-    def __init__(self,max_retries=1,wait=0): super().__init__(); self.max_retries,self.wait=max_retries,wait
+    cache=None
+    def __init__(self,max_retries=1,wait=0,cache=None): super().__init__(); self.max_retries,self.wait,self.cache=max_retries,wait,cache
     def exec_fallback(self,prep_res,exc): raise exc
+    def _delay(self,r,exc):
+        if r==self.max_retries-1: return None
+        return self.wait.delay(r,exc) if isinstance(self.wait,Backoff) else self.wait
     def _exec(self,prep_res):
-        for self.cur_retry in range(self.max_retries):
-            try: return self.exec(prep_res)
+        k=self.cache.key(self,prep_res) if self.cache else None
+        if k and (v:=self.cache.get(k,_MISS)) is not _MISS: return v
+        for r in range(self.max_retries):
+            try: self.cur_retry=r; v=self.exec(prep_res)
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return self.exec_fallback(prep_res,e)
-                if self.wait>0: time.sleep(self.wait)
+                d=self._delay(r,e)
+                if p:=_profiler.get(): p.failed(self,d is None)
+                if d is None: return self.exec_fallback(prep_res,e)
+                if d>0: time.sleep(d)
+            else:
+                if k: self.cache.set(k,v)
+                return v
 
 class BatchNode(Node):
     def _exec(self,items): return [super(BatchNode,self)._exec(i) for i in (items or [])]
 
+class ProcessPoolBatchNode(BatchNode):
+    def __init__(self,*args,max_workers=None,chunksize=1,**kwargs): super().__init__(*args,**kwargs); self.max_workers,self.chunksize=max_workers,chunksize
+    def _exec(self,items):
+        n=copy.copy(self); n.successors={}
+        with ProcessPoolExecutor(self.max_workers) as ex: return list(ex.map(functools.partial(Node._exec,n),items or [],chunksize=self.chunksize))
+
+class StreamBatchNode(BatchNode):
+    def _exec(self,items): return map(super(BatchNode,self)._exec,items or ())
+
+def _imap(ex,fn,items,n=None):
+    q=collections.deque()
+    for i in items:
+        if n and len(q)>=n: yield q.popleft().result()
+        q.append(ex.submit(fn,i))
+    while q: yield q.popleft().result()
+
+class ThreadedBatchNode(BatchNode):
+    def __init__(self,*args,max_workers=None,max_in_flight=None,**kwargs): super().__init__(*args,**kwargs); self.max_workers,self.max_in_flight=max_workers,max_in_flight
+    def _exec(self,items):
+        ctx=contextvars.copy_context()  # workers see the caller's profiler and deadline
+        with ThreadPoolExecutor(self.max_workers) as ex: return list(_imap(ex,lambda i: ctx.copy().run(Node._exec,copy.copy(self),i),items or [],self.max_in_flight))
+
+def _const(e):
+    if e is None or isinstance(e,ast.Constant) and (e.value is None or isinstance(e.value,str)): return {(e.value if e else None) or "default"}
+    if isinstance(e,ast.IfExp): a,b=_const(e.body),_const(e.orelse); return a|b if a is not None and b is not None else None
+
+def _either(*xs): return True if True in xs else None if None in xs else False
+
+def _falls(body):  # True, False, or None when it can't tell
+    n=body[-1] if body else None
+    if isinstance(n,(ast.Return,ast.Raise)): return False
+    if isinstance(n,ast.If): return _either(_falls(n.body),_falls(n.orelse))
+    if isinstance(n,(ast.With,ast.AsyncWith)): return _falls(n.body)
+    if isinstance(n,ast.Try):
+        f,r=_falls(n.finalbody or [None]),_either(_falls(n.orelse or n.body),*(_falls(h.body) for h in n.handlers))
+        return False if False in (f,r) else True if f and r else None
+    if isinstance(n,ast.While) and isinstance(n.test,ast.Constant) and n.test.value or isinstance(n,getattr(ast,"Match",())): return None  # a loop or match may end in returns only
+    return True
+
+@functools.lru_cache(maxsize=None)
+def _actions(fn):
+    try: f=ast.parse(textwrap.dedent(inspect.getsource(fn))).body[0]
+    except (OSError,TypeError,SyntaxError): return None
+    if not isinstance(f,(ast.FunctionDef,ast.AsyncFunctionDef)): return None
+    if (falls:=_falls(f.body)) is None: return None
+    out,q={"default"} if falls else set(),list(f.body)
+    while q:
+        n=q.pop()
+        if isinstance(n,(ast.FunctionDef,ast.AsyncFunctionDef,ast.Lambda,ast.ClassDef)): continue
+        if isinstance(n,ast.Return):
+            if (v:=_const(n.value)) is None: return None
+            out|=v
+        q.extend(ast.iter_child_nodes(n))
+    return frozenset(out)
+
+def _cycles(table):
+    index,low,on,stack,out,c={},{},set(),[],[],itertools.count()
+    for root in range(len(table)):
+        if root in index: continue
+        index[root]=low[root]=next(c); stack.append(root); on.add(root); work=[(root,iter(table[root].values()))]
+        while work:
+            v,it=work[-1]
+            for w in it:
+                if w not in index: index[w]=low[w]=next(c); stack.append(w); on.add(w); work.append((w,iter(table[w].values()))); break
+                if w in on: low[v]=min(low[v],index[w])
+            else:
+                work.pop()
+                if work: low[work[-1][0]]=min(low[work[-1][0]],low[v])
+                if low[v]==index[v]:
+                    scc=[stack.pop()]
+                    while scc[-1]!=v: scc.append(stack.pop())
+                    on.difference_update(scc)
+                    if len(scc)>1 or v in table[v].values(): out.append(sorted(scc))
+    return sorted(out)
+
+class Topology:
+    def __init__(self,flow,refresh=False):
+        self.flow,self.nodes,ix,q=flow,[],{},collections.deque([flow.start_node] if flow.start_node else [])
+        while q:
+            n=q.popleft()
+            if id(n) not in ix: ix[id(n)]=len(self.nodes); self.nodes.append(n); q.extend(n.successors.values())
+        self.table=[{a:ix[id(s)] for a,s in n.successors.items()} for n in self.nodes]
+        self.returned=[_actions(getattr(type(n),"post_async" if isinstance(n,AsyncNode) else "post")) for n in self.nodes]
+        self.dead_ends=[i for i,t in enumerate(self.table) if not t]
+        self.missing=[(i,a) for i,(t,r) in enumerate(zip(self.table,self.returned)) if t and r for a in sorted(r-t.keys())]
+        live,q={0} if self.nodes else set(),[0] if self.nodes else []
+        while q:
+            i=q.pop()
+            for a,j in self.table[i].items():
+                if j not in live and (self.returned[i] is None or a in self.returned[i]): live.add(j); q.append(j)
+        self.unreachable=[i for i in range(len(self.nodes)) if i not in live]
+        self.cycles=_cycles(self.table)
+        self.children={i:[f.analyze(refresh=refresh) for f in (n.branches if isinstance(n,ParallelFlow) else [n])] for i,n in enumerate(self.nodes) if isinstance(n,Flow) and n is not flow}
+        self.depth=1+max((t.depth for ts in self.children.values() for t in ts),default=0)
+    def name(self,i): return f"{type(self.nodes[i]).__name__}#{i}"
+    @property
+    def problems(self):
+        out=[f"{self.name(i)} returns '{a}' but has no such transition (has {sorted(self.table[i])})" for i,a in self.missing]
+        out+=[f"{self.name(i)} is unreachable: no node returns an action that leads to it" for i in self.unreachable]
+        return out+[f"{self.name(i)} > {p}" for i,ts in self.children.items() for t in ts for p in t.problems]
+
+class _Plan:
+    def __init__(self,topo): self.nodes,self.table,self.is_async,self.free=topo.nodes,topo.table,[isinstance(n,AsyncNode) for n in topo.nodes],[]
+    def acquire(self):
+        if not self.free: return [copy.copy(n) for n in self.nodes]
+        s=self.free.pop()
+        for c,n in zip(s,self.nodes): c.__dict__.clear(); c.__dict__.update(n.__dict__)  # each run starts from the nodes as they are now
+        return s
+    def step(self,i,action):
+        t=self.table[i]; j=t.get(action or "default")
+        if j is None and t: warnings.warn(f"Flow ends: '{action}' not found in {list(t)}")
+        return j
+    def start(self,p,st):
+        if not st or "node" not in st: return (0 if self.nodes else None),p,None
+        a=st.pop("action"); return self.step(st.pop("node"),a),st.pop("params"),a
+    def run(self,shared,p,ck=None,st=None,h=None):
+        (i,p,last_action),s=self.start(p,st),self.acquire()
+        try:
+            while i is not None:
+                curr=s[i]; curr.set_params(p); last_action=h._node(curr,shared) if h else curr._run(shared)
+                if ck: ck.save({**st,"node":i,"action":last_action,"params":p},shared)
+                i=self.step(i,last_action)
+                if h and i is not None: h._emit("transition",curr,last_action,s[i])
+        finally: self.free.append(s)
+        return last_action
+    async def run_async(self,shared,p,ck=None,st=None,h=None):
+        (i,p,last_action),s=self.start(p,st),self.acquire()
+        try:
+            while i is not None:
+                curr=s[i]; curr.set_params(p)
+                if h: last_action=await h._node_async(curr,shared)
+                else: last_action=await curr._run_async(shared) if self.is_async[i] else curr._run(shared)
+                if ck: ck.save({**st,"node":i,"action":last_action,"params":p},shared)
+                i=self.step(i,last_action)
+                if h and i is not None: await h._emit_async("transition",curr,last_action,s[i])
+        finally: self.free.append(s)
+        return last_action
+
+def _append(d,k,v): d.setdefault(k,[]).append(v)
+def _incr(d,k,n): d[k]=d.get(k,0)+n; return d[k]
+def _merge(d,k,m): d.setdefault(k,{}).update(m)
+_OPS={"append":_append,"incr":_incr,"merge":_merge}
+
+class SharedStore(dict):
+    def __init__(self,*args,**kwargs): super().__init__(*args,**kwargs); self._locks,self._mu={},threading.Lock()
+    def __reduce__(self): return (SharedStore,(dict(self),))
+    def lock(self,key):
+        with self._mu:
+            if key not in self._locks: self._locks[key]=asyncio.Lock()
+            return self._locks[key]
+    def _op(self,name,key,arg):
+        with self._mu: return _OPS[name](self,key,arg)
+    def append(self,key,value): self._op("append",key,value)
+    def incr(self,key,n=1): return self._op("incr",key,n)
+    def merge(self,key,mapping): self._op("merge",key,mapping)
+    def view(self): return _View(self)
+
+class _View(collections.abc.MutableMapping):
+    def __init__(self,base): self.base,self.local,self.written,self.ops,self._locks=base,{},set(),[],{}
+    def __getitem__(self,k):
+        if k in self.local: return self.local[k]
+        if k in self.written: raise KeyError(k)
+        return self.base[k]
+    def __setitem__(self,k,v): self.local[k]=v; self._write(k)
+    def __delitem__(self,k): self[k]; self.local.pop(k,None); self._write(k)
+    def _write(self,k):
+        if k not in self.written: self.written.add(k); self.ops=[o for o in self.ops if o[1]!=k]
+    def __iter__(self): return iter([*(k for k in self.base if k not in self.written and k not in self.local),*self.local])
+    def __len__(self): return sum(1 for _ in self)
+    def lock(self,key): return self.base.lock(key) if hasattr(self.base,"lock") else self._locks.setdefault(key,asyncio.Lock())
+    def _op(self,name,key,arg):
+        if key not in self.local and key not in self.written and key in self.base: self.local[key]=copy.copy(self.base[key])
+        if key not in self.written: self.ops.append((name,key,arg))
+        return _OPS[name](self.local,key,arg)
+    append,incr,merge,view=SharedStore.append,SharedStore.incr,SharedStore.merge,SharedStore.view
+    def commit(self):
+        for k in self.written:
+            if k in self.local: self.base[k]=self.local[k]
+            else: self.base.pop(k,None)
+        for name,k,a in self.ops: self.base._op(name,k,a) if hasattr(self.base,"_op") else _OPS[name](self.base,k,a)
+        w,self.local,self.written,self.ops=self.written,{},set(),[]
+        return w
+
+class _Tracked(collections.abc.MutableMapping):
+    def __init__(self,base): self.base,self.touched=base,set()
+    def __getitem__(self,k): self.touched.add(k); return self.base[k]
+    def __setitem__(self,k,v): self.touched.add(k); self.base[k]=v
+    def __delitem__(self,k): self.touched.add(k); del self.base[k]
+    def __contains__(self,k): return k in self.base
+    def __iter__(self): return iter(self.base)
+    def __len__(self): return len(self.base)
+    def __getattr__(self,name): return getattr(self.base,name)
+    def __reduce_ex__(self,proto): return copy.copy,(self.base,)  # pickles and copies as the plain store
+    def _op(self,name,key,arg): self.touched.add(key); return self.base._op(name,key,arg) if hasattr(self.base,"_op") else _OPS[name](self.base,key,arg)
+    append,incr,merge=SharedStore.append,SharedStore.incr,SharedStore.merge
+    def view(self): return _View(self)
+
+_SPILLED=object()
+
+def _size(v):
+    if hasattr(v,"nbytes"): return v.nbytes
+    if isinstance(v,(str,bytes,bytearray)): return len(v)
+    return 0 if isinstance(v,(int,float,bool,type(None))) else None
+
+class SpillStore(collections.abc.MutableMapping):
+    def __init__(self,path=None,threshold=1<<20,hot=8,mmap=True):
+        self.tmp=path is None
+        if self.tmp: fd,path=tempfile.mkstemp(suffix=".db"); os.close(fd)
+        self.path,self.threshold,self.hot_size,self.mmap,self.loads=path,threshold,hot,mmap,0
+        self.mem,self.hot,self.maps,self.digests,self.lock,self.pinned={},collections.OrderedDict(),{},{},threading.RLock(),set()
+        self.db=sqlite3.connect(path,check_same_thread=False); self.db.execute("CREATE TABLE IF NOT EXISTS kv(k BLOB PRIMARY KEY,v BLOB,npy TEXT)")
+        for (k,) in self.db.execute("SELECT k FROM kv"): self.mem[pickle.loads(k)]=_SPILLED
+        self.ondisk=set(self.mem)
+    def _npy(self,k): return f"{self.path}.{hashlib.sha1(pickle.dumps(k)).hexdigest()}.npy"
+    def __getitem__(self,k):
+        with self.lock:
+            v=self.mem[k]
+            if v is not _SPILLED: return v
+            if k in self.maps: return self.maps[k]
+            if k in self.hot: self.hot.move_to_end(k); return self.hot[k]
+            blob,npy=self.db.execute("SELECT v,npy FROM kv WHERE k=?",(pickle.dumps(k),)).fetchone(); self.loads+=1
+            if npy: self.maps[k]=v=__import__("numpy").load(npy,mmap_mode="r+"); return v
+            v=pickle.loads(blob); self.digests[k]=hash(blob); self._cache(k,v); return v
+    def __setitem__(self,k,v):
+        with self.lock:
+            self._drop(k); np,size=sys.modules.get("numpy"),_size(v)
+            if self.mmap and np and isinstance(v,np.ndarray) and v.dtype!=object and size>=self.threshold:
+                np.save(self._npy(k),v); self._write(k,None,self._npy(k)); self.mem[k],self.maps[k]=_SPILLED,np.load(self._npy(k),mmap_mode="r+"); return
+            try: blob=pickle.dumps(v) if size is None else None
+            except Exception: self.mem[k]=v; self.pinned.add(k); return  # locks, queues, clients: kept in memory, never spilled
+            size=len(blob) if blob else size
+            if size<self.threshold: self.mem[k]=v; return
+            self.mem[k]=_SPILLED; self._spill(k,v,blob); self._cache(k,v)
+    def __delitem__(self,k):
+        with self.lock: self.mem[k]; self._drop(k); del self.mem[k]
+    def __contains__(self,k): return k in self.mem
+    def __iter__(self): return iter(list(self.mem))
+    def __len__(self): return len(self.mem)
+    def _cache(self,k,v):
+        self.hot[k]=v
+        while len(self.hot)>self.hot_size: self._spill(*self.hot.popitem(last=False))
+    def _spill(self,k,v,blob=None):
+        blob=blob or pickle.dumps(v); h=hash(blob)
+        if self.digests.get(k)!=h: self._write(k,blob,None); self.digests[k]=h
+    def _write(self,k,blob,npy):
+        with self.db: self.db.execute("REPLACE INTO kv VALUES(?,?,?)",(pickle.dumps(k),blob,npy))
+        self.ondisk.add(k)
+    def _drop(self,k):
+        self.hot.pop(k,None); self.digests.pop(k,None); self.pinned.discard(k)
+        if k not in self.ondisk: return
+        with self.db: self.db.execute("DELETE FROM kv WHERE k=?",(pickle.dumps(k),))
+        self.ondisk.discard(k); self.maps.pop(k,None)
+        if os.path.exists(self._npy(k)): os.remove(self._npy(k))
+    def flush(self):
+        with self.lock:
+            for m in self.maps.values(): m.flush()
+            for k,v in [*self.hot.items(),*((k,v) for k,v in self.mem.items() if v is not _SPILLED and k not in self.pinned)]: self._spill(k,v)
+    def close(self):
+        with self.lock:
+            if not self.tmp: self.flush()
+            self.db.close(); self.hot.clear(); self.maps.clear()
+            if self.tmp:
+                for f in [self.path,*map(self._npy,self.mem)]:
+                    if os.path.exists(f): os.remove(f)
+    def __enter__(self): return self
+    def __exit__(self,*exc): self.close()
+
+class Checkpoint:
+    def __init__(self): self.digests,self.records={},{}
+    def save(self,state,shared,records=None):
+        keys=None
+        if isinstance(shared,_Tracked): keys,shared.touched,shared=shared.touched,set(),shared.base  # values nobody read or wrote since the last save can't have changed
+        blobs={k:pickle.dumps(shared[k]) for k in shared if keys is None or k in keys or k not in self.digests}; dg={k:hash(blobs[k]) if k in blobs else self.digests[k] for k in shared}
+        records=records or {}  # written once (prep result, finished items); state is rewritten every save, so it stays small
+        self._write(state,{k:pickle.dumps(v) for k,v in records.items()},{k:b for k,b in blobs.items() if self.digests.get(k)!=dg[k]},[k for k in self.digests if k not in dg]); self.digests=dg; self.records.update(records)
+    def load(self):
+        r=self._read()
+        if r is None: return None
+        state,recs,blobs=r; self.records={k:pickle.loads(b) for k,b in recs.items()}; self.digests={k:hash(b) for k,b in blobs.items()}; return state,{k:pickle.loads(b) for k,b in blobs.items()}
+    def clear(self): self.digests,self.records={},{}
+    def _write(self,state,changed,deleted): raise NotImplementedError
+    def _read(self): raise NotImplementedError
+
+class SQLiteCheckpoint(Checkpoint):
+    def __init__(self,path):
+        super().__init__(); self.db=sqlite3.connect(path,check_same_thread=False)
+        self.db.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; CREATE TABLE IF NOT EXISTS state(id INTEGER PRIMARY KEY,v BLOB); CREATE TABLE IF NOT EXISTS records(k BLOB PRIMARY KEY,v BLOB); CREATE TABLE IF NOT EXISTS shared(k BLOB PRIMARY KEY,v BLOB);")
+    def _write(self,state,records,changed,deleted):
+        with self.db:
+            self.db.execute("REPLACE INTO state VALUES(0,?)",(pickle.dumps(state),))
+            self.db.executemany("REPLACE INTO records VALUES(?,?)",[(pickle.dumps(k),b) for k,b in records.items()])
+            self.db.executemany("REPLACE INTO shared VALUES(?,?)",[(pickle.dumps(k),b) for k,b in changed.items()])
+            self.db.executemany("DELETE FROM shared WHERE k=?",[(pickle.dumps(k),) for k in deleted])
+    def _read(self):
+        r=self.db.execute("SELECT v FROM state").fetchone()
+        return r and (pickle.loads(r[0]),*({pickle.loads(k):b for k,b in self.db.execute(f"SELECT k,v FROM {t}")} for t in ("records","shared")))
+    def clear(self):
+        super().clear()
+        with self.db:
+            for t in ("state","records","shared"): self.db.execute(f"DELETE FROM {t}")
+
+class WorkQueue:
+    def put(self,job,items): raise NotImplementedError
+    def job(self): raise NotImplementedError
+    def take(self): raise NotImplementedError
+    def finish(self,k,result,error=None): raise NotImplementedError
+    def remaining(self): raise NotImplementedError
+    def results(self): raise NotImplementedError
+    def clear(self): raise NotImplementedError
+    def close(self): pass
+
+class SQLiteWorkQueue(WorkQueue):
+    def __init__(self,path=None,timeout=30):
+        self.tmp=path is None
+        if self.tmp: fd,path=tempfile.mkstemp(suffix=".db"); os.close(fd)
+        self.path,self.timeout,self.db=path,timeout,sqlite3.connect(path,timeout=timeout,check_same_thread=False)
+        self.db.executescript("PRAGMA journal_mode=WAL; CREATE TABLE IF NOT EXISTS job(id INTEGER PRIMARY KEY,flow BLOB,shared BLOB); CREATE TABLE IF NOT EXISTS items(k INTEGER PRIMARY KEY,params BLOB,state INTEGER DEFAULT 0,result BLOB,error BLOB);")
+    def __reduce__(self): return SQLiteWorkQueue,(self.path,self.timeout)
+    def put(self,job,items):
+        with self.db:
+            self.db.execute("REPLACE INTO job VALUES(0,?,?)",job)
+            old=[p for p, in self.db.execute("SELECT params FROM items ORDER BY k")]
+            if old==items: self.db.execute("UPDATE items SET state=0,error=NULL WHERE state IN (1,3)"); return
+            if old: warnings.warn(f"{self.path} holds a different batch; discarding its {len(old)} items",RuntimeWarning); self.db.execute("DELETE FROM items")
+            self.db.executemany("INSERT INTO items(k,params) VALUES(?,?)",enumerate(items))
+    def job(self): return self.db.execute("SELECT flow,shared FROM job").fetchone()
+    def take(self):
+        with self.db: return self.db.execute("UPDATE items SET state=1 WHERE k=(SELECT k FROM items WHERE state=0 ORDER BY k LIMIT 1) RETURNING k,params").fetchone()
+    def finish(self,k,result,error=None):
+        with self.db: self.db.execute("UPDATE items SET state=?,result=?,error=? WHERE k=?",(3 if error else 2,result,error,k))
+    def remaining(self): return self.db.execute("SELECT COUNT(*) FROM items WHERE state<2").fetchone()[0]
+    def results(self): return self.db.execute("SELECT k,params,state,result,error FROM items ORDER BY k").fetchall()
+    def clear(self):
+        with self.db: self.db.execute("DELETE FROM job"); self.db.execute("DELETE FROM items")
+    def close(self):
+        self.db.close()
+        if self.tmp:
+            for f in (self.path,self.path+"-wal",self.path+"-shm"):
+                if os.path.exists(f): os.remove(f)
+
+_HOOKS=frozenset(("on_node_start","on_node_end","on_error","on_transition")); _hooked_types={}
+_stream=contextvars.ContextVar("_stream",default=None); _DONE=object()
+
+def _event(kind,flow,node,args):
+    e={"type":kind,"ts":time.time(),"flow":type(flow).__name__,"node":type(node).__name__}
+    if kind=="node_end": e["action"]=args[1]
+    elif kind=="error": e["error"]=repr(args[1])
+    elif kind=="transition": e["action"],e["next"]=args[0],type(args[1]).__name__
+    return e
+
+class _Stream:
+    def __init__(self,maxsize,blocking=False): self.q,self.loop,self.tid,self.blocking,self.closed,self.dropped=asyncio.Queue(maxsize),asyncio.get_running_loop(),threading.get_ident(),blocking,False,0
+    def put(self,e):
+        if self.closed:
+            if self.blocking and threading.get_ident()!=self.tid: raise asyncio.CancelledError()  # the consumer left: stop the sync run at its next event
+            return
+        if threading.get_ident()==self.tid: self._push(e)
+        elif self.blocking: asyncio.run_coroutine_threadsafe(self.q.put(e),self.loop).result()
+        else: self.loop.call_soon_threadsafe(self._push,e)
+    def _push(self,e):
+        if self.closed: return
+        if self.q.full(): self.q.get_nowait(); self.dropped+=1
+        self.q.put_nowait(e)
+    async def put_async(self,e):
+        if not self.closed: await self.q.put(e)
+    async def _finish(self,aw):
+        try: return await aw
+        finally: await self.q.put(_DONE)
+    async def drain(self,aw):
+        task=asyncio.ensure_future(self._finish(aw))
+        try:
+            while (e:=await self.q.get()) is not _DONE: yield e
+            yield {"type":"done","ts":time.time(),"result":await task,"dropped":self.dropped}
+        finally:
+            self.closed=True
+            if not task.done(): task.cancel()
+            while not self.q.empty(): self.q.get_nowait()
+
 class Flow(BaseNode):
-    def __init__(self,start=None): super().__init__(); self.start_node=start
-    def start(self,start): self.start_node=start; return start
+    _plan=_ckpt=_state=_topology=None
+    def __init__(self,start=None,**kwargs): super().__init__(**kwargs); self.start_node=start
+    def analyze(self,strict=False,refresh=False):
+        if refresh or self._topology is None: self._topology=Topology(self,refresh)
+        if strict and (p:=self._topology.problems): raise ValueError(f"{type(self).__name__} has invalid transitions:\n  "+"\n  ".join(p))
+        return self._topology
+    def compile(self,strict=False): self._compile(self.analyze(strict,refresh=True)); return self
+    def _compile(self,topo,undo=None):
+        for ts in topo.children.values():
+            for t in ts: t.flow._compile(t,undo)
+        if undo is not None: undo.append((self,self._plan))
+        plan=_Plan(topo); plan.free.append(plan.acquire()); self._plan=plan
+    def start(self,start): self.start_node,self._topology,self._plan=start,None,None; return start
+    def run(self,shared,checkpoint=None):
+        if checkpoint is None: return super().run(shared)
+        checkpoint.clear(); return self._checkpointed(shared,checkpoint,{})
+    def resume(self,checkpoint,shared=None): return self._checkpointed(*self._restore(checkpoint,shared))
+    def _restore(self,checkpoint,shared):
+        state,saved=checkpoint.load() or ({},{}); shared={} if shared is None else shared; shared.update(saved); return shared,checkpoint,state
+    def _attach(self,ck,state):
+        undo=[]  # a plan compiled just for this run is dropped afterwards, so later graph edits take effect
+        if not self._plan: self._compile(self.analyze(refresh=True),undo)
+        self._ckpt,self._state=ck,state; return undo
+    def _detach(self,undo):
+        self._ckpt=self._state=None
+        for f,p in undo: f._plan=p
+    def _checkpointed(self,shared,ck,state):
+        undo=self._attach(ck,state)
+        try: return self._run(_Tracked(shared))
+        finally: self._detach(undo)
+    def _prep(self,shared):
+        if not self._ckpt: return self.prep(shared)
+        if "prep" not in self._ckpt.records: self._ckpt.save(self._state,shared,{"prep":self.prep(shared)})
+        return self._ckpt.records["prep"]
     def get_next_node(self,curr,action):
         nxt=curr.successors.get(action or "default")
         if not nxt and curr.successors: warnings.warn(f"Flow ends: '{action}' not found in {list(curr.successors)}")
         return nxt
+    def on_node_start(self,node,shared): pass
+    def on_node_end(self,node,shared,action): pass
+    def on_error(self,node,shared,exc): pass
+    def on_transition(self,node,action,nxt): pass
+    def _hooked(self):
+        c=type(self); h=_hooked_types.get(c)
+        if h is None: h=_hooked_types[c]=any(getattr(c,n) is not getattr(Flow,n) for n in _HOOKS)
+        return self if h or _stream.get() is not None or _HOOKS&self.__dict__.keys() else None
+    def _emit(self,kind,node,*args):
+        getattr(self,"on_"+kind)(node,*args)
+        if (st:=_stream.get()) is not None: st.put(_event(kind,self,node,args))
+    def _node(self,node,shared):
+        self._emit("node_start",node,shared)
+        try: a=node._run(shared)
+        except Exception as e: self._emit("error",node,shared,e); raise
+        self._emit("node_end",node,shared,a); return a
+    async def run_stream(self,shared,maxsize=100):
+        st,ctx=_Stream(maxsize,blocking=True),contextvars.copy_context(); ctx.run(_stream.set,st)
+        async for e in st.drain(asyncio.get_running_loop().run_in_executor(None,ctx.run,self.run,shared)): yield e
     def _orch(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+        if self._plan: return self._plan.run(shared,params or {**self.params},self._ckpt,self._state,self._hooked())
+        curr,p,last_action,h=copy.copy(self.start_node),(params or {**self.params}),None,self._hooked()
+        while curr:
+            curr.set_params(p); last_action=h._node(curr,shared) if h else curr._run(shared); nxt=copy.copy(self.get_next_node(curr,last_action))
+            if h and nxt: h._emit("transition",curr,last_action,nxt)
+            curr=nxt
         return last_action
-    def _run(self,shared): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
+    def _run(self,shared): p=self._prep(shared); o=self._orch(shared); return self.post(shared,p,o)
     def post(self,shared,prep_res,exec_res): return exec_res
 
 class BatchFlow(Flow):
     def _run(self,shared):
-        pr=self.prep(shared) or []
-        for bp in pr: self._orch(shared,{**self.params,**bp})
+        pr,ck,st=self._prep(shared) or [],self._ckpt,self._state
+        for k,bp in itertools.islice(enumerate(pr),st.get("batch",0) if ck else 0,None):
+            self._orch(shared,{**self.params,**bp})
+            if ck: st["batch"]=k+1; ck.save(st,shared)
         return self.post(shared,pr,None)
 
+def _same(a,b): return a is b or pickle.dumps(a)==pickle.dumps(b)
+
+def _diff(a,b):
+    d={}
+    for k,v in b.items():
+        old=a.get(k,_MISS)
+        if isinstance(v,dict) and (old is _MISS or isinstance(old,dict)):
+            if (sub:=_diff({} if old is _MISS else old,v)) or old is _MISS: d[k]=("sub",sub)
+        elif isinstance(v,list) and (old is _MISS or isinstance(old,list) and len(v)>len(old) and _same(v[:len(old)],old)): d[k]=("extend",v[0 if old is _MISS else len(old):])
+        elif old is _MISS or not _same(old,v): d[k]=("set",v)
+    for k in a.keys()-b.keys(): d[k]=("del",None)
+    return d
+
+def _patch(d,diff):
+    for k,(op,v) in diff.items():
+        if op=="sub":
+            if not isinstance(d.get(k),dict): d[k]={}
+            _patch(d[k],v)
+        elif op=="extend": d.setdefault(k,[]).extend(v)
+        elif op=="del": d.pop(k,None)
+        else: d[k]=v
+    return d
+
+def _work(queue):
+    fb,sb=queue.job(); flow=pickle.loads(fb)
+    while (t:=queue.take()) is not None:
+        k,p=t; base,sh=pickle.loads(sb),pickle.loads(sb)
+        try: a=flow._orch(sh,pickle.loads(p))
+        except Exception as e: queue.finish(k,None,pickle.dumps((repr(e),traceback.format_exc())))
+        else: queue.finish(k,pickle.dumps((a,_diff(base,sh))))
+
+class BatchItemError(Exception):
+    def __init__(self,params,error,tb): super().__init__(f"{error} (params: {params})"); self.params,self.error,self.traceback=params,error,tb
+    def __reduce__(self): return BatchItemError,(self.params,self.error,self.traceback)
+
+class DistributedBatchFlow(BatchFlow):
+    worker=staticmethod(_work)
+    def __init__(self,*args,workers=None,queue=None,poll=0.1,**kwargs): super().__init__(*args,**kwargs); self.workers,self.queue,self.poll=workers,queue,poll
+    def _run(self,shared):
+        pr,q=self._prep(shared) or [],self.queue or SQLiteWorkQueue()
+        try:
+            f=copy.copy(self); f.queue=f._topology=f._ckpt=f._state=None
+            q.put((pickle.dumps(f),pickle.dumps(shared)),[pickle.dumps({**self.params,**bp}) for bp in pr])
+            n=min(os.cpu_count() if self.workers is None else self.workers,q.remaining())
+            if n:
+                with ProcessPoolExecutor(n) as ex:
+                    for fut in [ex.submit(_work,q) for _ in range(n)]: fut.result()
+            else: _work(q)
+            while q.remaining(): time.sleep(self.poll)
+            out=[(BatchItemError(pickle.loads(p),*pickle.loads(e)),None) if e else pickle.loads(r) for k,p,state,r,e in q.results()]; res=[a for a,d in out]
+            if not any(isinstance(a,BatchItemError) for a in res):  # all or nothing, so a resumed run replays every diff
+                for a,d in out: _patch(shared,d)
+                q.clear()
+        finally:
+            if q is not self.queue: q.close()
+        return self.post(shared,pr,res)
+
+class ParallelFlow(Flow):
+    def __init__(self,*branches,max_workers=None): super().__init__(); self.branches,self.max_workers=[Flow(start=b) for b in branches],max_workers
+    def compile(self,strict=False):
+        for b in self.branches: b.compile(strict)
+        return self
+    def _orch(self,shared,params=None):
+        p=params or {**self.params}
+        with ThreadPoolExecutor(self.max_workers or len(self.branches) or 1) as ex: return list(ex.map(lambda b,ctx: ctx.run(b._orch,shared,p),self.branches,[contextvars.copy_context() for _ in self.branches]))
+    def post(self,shared,prep_res,exec_res): pass
+
+class Hedge:
+    def __init__(self,percentile=95,delay=None,window=100,min_samples=10): self.percentile,self.delay,self.min_samples,self.samples,self.calls,self.fired,self.won=percentile,delay,min_samples,collections.deque(maxlen=window),0,0,0
+    def threshold(self):
+        if len(self.samples)<self.min_samples: return self.delay
+        s=sorted(self.samples); return s[max(0,math.ceil(len(s)*self.percentile/100)-1)]
+    async def run(self,make):
+        loop=asyncio.get_running_loop(); starts,tasks,err=[loop.time()],[asyncio.ensure_future(make())],None; self.calls+=1
+        try:
+            d=self.threshold()
+            if d is not None and not (await asyncio.wait(tasks,timeout=d))[0]: self.fired+=1; starts.append(loop.time()); tasks.append(asyncio.ensure_future(make()))
+            pending=set(tasks)
+            while pending:
+                done,pending=await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+                for t in sorted(done,key=tasks.index):
+                    if t.exception() is None:
+                        k=tasks.index(t); self.won+=k; self.samples.append(loop.time()-starts[k]); return t.result()
+                    err=err or t.exception()
+            raise err
+        finally:
+            for t in tasks:
+                if not t.done(): t.cancel()
+                elif not t.cancelled(): t.exception()
+
+_deadline=contextvars.ContextVar("_deadline",default=None)
+
 class AsyncNode(Node):
+    timeout=total_timeout=hedge=None
+    def __init__(self,*args,timeout=None,total_timeout=None,hedge=None,**kwargs): super().__init__(*args,**kwargs); self.timeout,self.total_timeout,self.hedge=timeout,total_timeout,hedge
     async def prep_async(self,shared): pass
     async def exec_async(self,prep_res): pass
     async def exec_fallback_async(self,prep_res,exc): raise exc
     async def post_async(self,shared,prep_res,exec_res): pass
     async def _exec(self,prep_res): 
-        for self.cur_retry in range(self.max_retries):
-            try: return await self.exec_async(prep_res)
+        k=self.cache.key(self,prep_res) if self.cache else None
+        if k and (v:=self.cache.get(k,_MISS)) is not _MISS: return v
+        dl=_deadline.get()
+        if self.total_timeout: t=asyncio.get_running_loop().time()+self.total_timeout; dl=min(dl,t) if dl else t
+        for r in range(self.max_retries):
+            try: self.cur_retry=r; v=await (self._attempt(prep_res,dl) if dl or self.timeout else self._call(prep_res))
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return await self.exec_fallback_async(prep_res,e)
-                if self.wait>0: await asyncio.sleep(self.wait)
+                d=self._delay(r,e)
+                if d is not None and dl and asyncio.get_running_loop().time()+d>=dl: d=None
+                if p:=_profiler.get(): p.failed(self,d is None)
+                if d is None: return await self.exec_fallback_async(prep_res,e)
+                if d>0: await _backoff(d)
+            else:
+                if k: self.cache.set(k,v)
+                return v
+    def _call(self,prep_res): return self.hedge.run(functools.partial(self.exec_async,prep_res)) if self.hedge else self.exec_async(prep_res)
+    def _attempt(self,prep_res,dl):
+        t=self.timeout
+        if dl: left=dl-asyncio.get_running_loop().time(); t=left if t is None else min(t,left)
+        if t<=0: raise asyncio.TimeoutError()
+        return asyncio.wait_for(self._call(prep_res),t)
     async def run_async(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use AsyncFlow.")  
         return await self._run_async(shared)
-    async def _run_async(self,shared): p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
+    async def _run_async(self,shared):
+        if p:=_profiler.get(): return await p.node_async(self,shared)
+        pp,ex,po=(True,True,True) if _PHASES&self.__dict__.keys() else _phases.get(type(self)) or _overridden(type(self))
+        p=await self.prep_async(shared) if pp else None; e=await self._exec(p) if ex else None
+        return await self.post_async(shared,p,e) if po else None
     def _run(self,shared): raise RuntimeError("Use run_async.")
 
+_phases={}; _PHASES=frozenset(("prep_async","exec_async","post_async","_exec"))
+def _overridden(c): ph=_phases[c]=(c.prep_async is not AsyncNode.prep_async,c.exec_async is not AsyncNode.exec_async or c._exec is not AsyncNode._exec,c.post_async is not AsyncNode.post_async); return ph
+
 class AsyncBatchNode(AsyncNode,BatchNode):
     async def _exec(self,items): return [await super(AsyncBatchNode,self)._exec(i) for i in items]
 
-class AsyncParallelBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return await asyncio.gather(*(super(AsyncParallelBatchNode,self)._exec(i) for i in items))
+class AsyncStreamBatchNode(AsyncNode,BatchNode):
+    async def _exec(self,items): return self._stream(items)
+    async def _stream(self,items):
+        if hasattr(items,"__aiter__"):
+            async for i in items: yield await super(AsyncStreamBatchNode,self)._exec(i)
+        else:
+            for i in items or (): yield await super(AsyncStreamBatchNode,self)._exec(i)
+
+class ChunkStream:
+    def __init__(self): self.chunks,self.done,self.error,self.task,self._more=[],False,None,None,asyncio.Event()
+    def _put(self,c): self.chunks.append(c); self._wake()
+    def _wake(self): self._more.set(); self._more=asyncio.Event()
+    def _close(self,err=None): self.done,self.error=True,err; self._wake()
+    def _ended(self,task):
+        if not self.done: self._close(asyncio.CancelledError())
+    async def __aiter__(self):
+        i=0
+        while True:
+            if i<len(self.chunks): yield self.chunks[i]; i+=1
+            elif self.done:
+                if self.error: raise self.error
+                return
+            else: await self._more.wait()
+    async def collect(self): return [c async for c in self]
+    def __await__(self): return self.collect().__await__()
+
+class AsyncStreamNode(AsyncNode):
+    async def _exec(self,prep_res): s=ChunkStream(); s.task=asyncio.ensure_future(self._pump(s,prep_res)); s.task.add_done_callback(s._ended); return s
+    async def _pump(self,s,prep_res):
+        try:
+            for r in range(self.max_retries):
+                try:
+                    self.cur_retry=r
+                    async for c in self.exec_async(prep_res): s._put(c)
+                    return s._close()
+                except Exception as e:
+                    d=None if s.chunks else self._delay(r,e)
+                    if p:=_profiler.get(): p.failed(self,d is None)
+                    if d is None and s.chunks: raise
+                    if d is None:
+                        fb=await self.exec_fallback_async(prep_res,e)
+                        if hasattr(fb,"__aiter__"):
+                            async for c in fb: s._put(c)
+                        elif fb is not None: s._put(fb)
+                        return s._close()
+                    if d>0: await asyncio.sleep(d)
+        except Exception as e: s._close(e)
+
+_slots=contextvars.ContextVar("_slots",default=None)
+
+class _Slots:
+    def __init__(self,n,rate,work): self.sem,self.rate,self.next,self.work,self.tasks,self.err=asyncio.Semaphore(n) if n else None,rate,0,work,collections.deque(),False
+    async def acquire(self):
+        if self.sem: await self.sem.acquire()
+        if self.rate: loop=asyncio.get_running_loop(); now=loop.time(); start=self.next=max(self.next,now); self.next+=1/self.rate; await asyncio.sleep(start-now)
+    def release(self):
+        if self.sem: self.sem.release()
+    def spawn(self): self.tasks.append(asyncio.ensure_future(self.work()))
+
+async def _backoff(d):
+    s=_slots.get()
+    if not s: return await asyncio.sleep(d)
+    s.release(); s.spawn()
+    try: await asyncio.sleep(d)
+    finally: await s.acquire()
+
+async def _gather(fn,items,n=None,rate=None):
+    if not n and not rate:
+        tok=_slots.set(None)
+        try: return await asyncio.gather(*(fn(i) for i in items))
+        finally: _slots.reset(tok)
+    items=list(items); res,it=[None]*len(items),iter(enumerate(items))
+    async def work():
+        for k,i in it:
+            if s.err: return
+            await s.acquire()
+            try: res[k]=await fn(i)
+            except BaseException: s.err=True; raise
+            finally: s.release()
+    s=_Slots(n,rate,work); tok=_slots.set(s)
+    try:
+        for _ in range(min(n or len(items),len(items))): s.spawn()
+        while s.tasks: ts=list(s.tasks); s.tasks.clear(); await asyncio.gather(*ts)
+        return res
+    finally: _slots.reset(tok)
+
+class _Bounded:
+    def __init__(self,*args,max_concurrency=None,rate_limit=None,**kwargs): super().__init__(*args,**kwargs); self.max_concurrency,self.rate_limit=max_concurrency,rate_limit
+
+class AsyncParallelBatchNode(_Bounded,AsyncNode,BatchNode):
+    async def _exec(self,items): return await _gather(super(AsyncParallelBatchNode,self)._exec,items,self.max_concurrency,self.rate_limit)
 
 class AsyncFlow(Flow,AsyncNode):
+    async def _emit_async(self,kind,node,*args):
+        if inspect.isawaitable(r:=getattr(self,"on_"+kind)(node,*args)): await r
+        if (st:=_stream.get()) is not None: await st.put_async(_event(kind,self,node,args))
+    async def _node_async(self,node,shared):
+        await self._emit_async("node_start",node,shared)
+        try: a=await node._run_async(shared) if isinstance(node,AsyncNode) else node._run(shared)
+        except Exception as e: await self._emit_async("error",node,shared,e); raise
+        await self._emit_async("node_end",node,shared,a); return a
+    async def run_stream(self,shared,maxsize=100):
+        st=_Stream(maxsize); tok=_stream.set(st)
+        try: task=asyncio.ensure_future(self.run_async(shared))
+        finally: _stream.reset(tok)
+        async for e in st.drain(task): yield e
     async def _orch_async(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=await curr._run_async(shared) if isinstance(curr,AsyncNode) else curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+        if self._plan: return await self._plan.run_async(shared,params or {**self.params},self._ckpt,self._state,self._hooked())
+        curr,p,last_action,h=copy.copy(self.start_node),(params or {**self.params}),None,self._hooked()
+        while curr:
+            curr.set_params(p)
+            if h: last_action=await h._node_async(curr,shared)
+            else: last_action=await curr._run_async(shared) if isinstance(curr,AsyncNode) else curr._run(shared)
+            nxt=copy.copy(self.get_next_node(curr,last_action))
+            if h and nxt: await h._emit_async("transition",curr,last_action,nxt)
+            curr=nxt
         return last_action
-    async def _run_async(self,shared): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
+    async def run_async(self,shared,checkpoint=None):
+        if checkpoint is None: return await super().run_async(shared)
+        checkpoint.clear(); return await self._checkpointed_async(shared,checkpoint,{})
+    async def resume_async(self,checkpoint,shared=None): return await self._checkpointed_async(*self._restore(checkpoint,shared))
+    async def _checkpointed_async(self,shared,ck,state):
+        undo=self._attach(ck,state)
+        try: return await self._run_async(_Tracked(shared))
+        finally: self._detach(undo)
+    async def _prep_async(self,shared):
+        if not self._ckpt: return await self.prep_async(shared)
+        if "prep" not in self._ckpt.records: self._ckpt.save(self._state,shared,{"prep":await self.prep_async(shared)})
+        return self._ckpt.records["prep"]
+    async def _run_async(self,shared):
+        if not self.timeout: return await self._flow_async(shared)
+        dl,cur=asyncio.get_running_loop().time()+self.timeout,_deadline.get(); tok=_deadline.set(min(dl,cur) if cur else dl)
+        try: return await self._flow_async(shared)
+        finally: _deadline.reset(tok)
+    async def _flow_async(self,shared): p=await self._prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
     async def post_async(self,shared,prep_res,exec_res): return exec_res
 
+class AsyncParallelFlow(AsyncFlow,ParallelFlow):
+    def __init__(self,*branches): super().__init__(); self.branches=[AsyncFlow(start=b) for b in branches]
+    async def _orch_async(self,shared,params=None): p=params or {**self.params}; return list(await asyncio.gather(*(b._orch_async(shared,p) for b in self.branches)))
+    async def post_async(self,shared,prep_res,exec_res): pass
+
 class AsyncBatchFlow(AsyncFlow,BatchFlow):
-    async def _run_async(self,shared):
-        pr=await self.prep_async(shared) or []
-        for bp in pr: await self._orch_async(shared,{**self.params,**bp})
+    async def _flow_async(self,shared):
+        pr,ck,st=await self._prep_async(shared) or [],self._ckpt,self._state
+        for k,bp in itertools.islice(enumerate(pr),st.get("batch",0) if ck else 0,None):
+            await self._orch_async(shared,{**self.params,**bp})
+            if ck: st["batch"]=k+1; ck.save(st,shared)
         return await self.post_async(shared,pr,None)
 
-class AsyncParallelBatchFlow(AsyncFlow,BatchFlow):
-    async def _run_async(self,shared): 
-        pr=await self.prep_async(shared) or []
-        await asyncio.gather(*(self._orch_async(shared,{**self.params,**bp}) for bp in pr))
+class AsyncParallelBatchFlow(_Bounded,AsyncFlow,BatchFlow):
+    def __init__(self,*args,isolate=False,**kwargs): super().__init__(*args,**kwargs); self.isolate=isolate
+    async def _flow_async(self,shared):
+        pr,ck,st=await self._prep_async(shared) or [],self._ckpt,self._state; done={k for k in range(len(pr)) if ("done",k) in ck.records} if ck else ()
+        views=[_View(shared) for _ in pr] if self.isolate else None; seen,clash=set(),set()
+        def commit(v): w=v.commit(); clash.update(w&seen); seen.update(w)
+        async def one(k,bp):
+            if k in done: return
+            sh=views[k] if views else shared
+            await (self._plan.run_async(sh,{**self.params,**bp},h=self._hooked()) if ck else self._orch_async(sh,{**self.params,**bp}))
+            if ck:
+                if views: commit(views[k])
+                done.add(k); ck.save(st,shared,{("done",k):True})
+        await _gather(lambda kb: one(*kb),enumerate(pr),self.max_concurrency,self.rate_limit)
+        for v in views or (): commit(v)
+        if clash: warnings.warn(f"Isolated sub-flows assigned the same keys {sorted(clash,key=str)}; only the last value was kept. Use append, incr or merge to combine them.",RuntimeWarning)
         return await self.post_async(shared,pr,None)
\ No newline at end of file
@@ -1,5 +1,12 @@
+import ast
 import asyncio
-from typing import Any, Dict, List, Optional, Union, TypeVar, Generic
+import contextvars
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Counter, DefaultDict, Deque, Dict, Generator, Iterable, Iterator, List, Optional, Tuple, Union, TypeVar, Generic
 
 # Type variables for better type relationships
 _PrepResult = TypeVar('_PrepResult')
@@ -11,20 +18,41 @@ ParamValue = Union[str, int, float, bool, None, List[Any], Dict[str, Any]]
 SharedData = Dict[str, Any]
 Params = Dict[str, ParamValue]
 
+_profiler: contextvars.ContextVar[Optional[Profiler]]
+
+class Profiler:
+    stats: DefaultDict[str, Counter[str]]
+    events: List[Dict[str, Any]]
+    lock: threading.Lock
+    t0: float
+
+    def __init__(self) -> None: ...
+    def __enter__(self) -> Profiler: ...
+    def __exit__(self, *exc: Any) -> None: ...
+    def node(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    async def node_async(self, node: AsyncNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def record(self, node: BaseNode[Any, Any, Any], p: Any, *ts: float) -> None: ...
+    def failed(self, node: BaseNode[Any, Any, Any], final: bool) -> None: ...
+    @staticmethod
+    def _tid() -> int: ...
+    def summary(self) -> str: ...
+    def chrome_trace(self) -> Dict[str, Any]: ...
+    def save_trace(self, path: str) -> None: ...
+
 class BaseNode(Generic[_PrepResult, _ExecResult, _PostResult]):
     params: Params
     successors: Dict[str, BaseNode[Any, Any, Any]]
     
     def __init__(self) -> None: ...
     def set_params(self, params: Params) -> None: ...
-    def next(self, node: BaseNode[Any, Any, Any], action: str = "default") -> BaseNode[Any, Any, Any]: ...
+    def next(self, node: Union[BaseNode[Any, Any, Any], List[BaseNode[Any, Any, Any]]], action: str = "default") -> BaseNode[Any, Any, Any]: ...
     def prep(self, shared: SharedData) -> _PrepResult: ...
     def exec(self, prep_res: _PrepResult) -> _ExecResult: ...
     def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult) -> _PostResult: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
     def run(self, shared: SharedData) -> _PostResult: ...
-    def __rshift__(self, other: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
+    def __rshift__(self, other: Union[BaseNode[Any, Any, Any], List[BaseNode[Any, Any, Any]]]) -> BaseNode[Any, Any, Any]: ...
     def __sub__(self, action: str) -> _ConditionalTransition: ...
 
 class _ConditionalTransition:
@@ -32,28 +60,318 @@ class _ConditionalTransition:
     action: str
     
     def __init__(self, src: BaseNode[Any, Any, Any], action: str) -> None: ...
-    def __rshift__(self, tgt: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
+    def __rshift__(self, tgt: Union[BaseNode[Any, Any, Any], List[BaseNode[Any, Any, Any]]]) -> BaseNode[Any, Any, Any]: ...
+
+_MISS: object
+
+class ExecCache:
+    maxsize: int
+    ttl: Optional[float]
+    path: Optional[str]
+    hits: int
+    misses: int
+    lru: OrderedDict[str, Tuple[float, Any]]
+    lock: threading.Lock
+    db: Optional[sqlite3.Connection]
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, path: Optional[str] = None) -> None: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    def __setstate__(self, state: Dict[str, Any]) -> None: ...
+    def key(self, node: BaseNode[Any, Any, Any], prep_res: Any) -> Optional[str]: ...
+    def _fresh(self, t: float) -> bool: ...
+    def _remember(self, k: str, t: float, v: Any) -> None: ...
+    def get(self, k: str, default: Any = None) -> Any: ...
+    def set(self, k: str, v: Any) -> None: ...
+    def clear(self) -> None: ...
+
+class RetryBudget:
+    retries: int
+    per: Optional[float]
+    tokens: float
+    t: float
+    lock: threading.Lock
+
+    def __init__(self, retries: int, per: Optional[float] = None) -> None: ...
+    def take(self) -> bool: ...
+    def __getstate__(self) -> Dict[str, Any]: ...
+    def __setstate__(self, state: Dict[str, Any]) -> None: ...
+
+class Backoff:
+    base: float
+    factor: float
+    max_delay: float
+    jitter: bool
+    retry_on: Union[type, Tuple[type, ...], Callable[[Exception], bool]]
+    budget: Optional[RetryBudget]
+
+    def __init__(
+        self, base: float = 1, factor: float = 2, max_delay: float = 60, jitter: bool = True,
+        retry_on: Union[type, Tuple[type, ...], Callable[[Exception], bool]] = Exception, budget: Optional[RetryBudget] = None
+    ) -> None: ...
+    def delay(self, attempt: int, exc: Exception) -> Optional[float]: ...
 
 class Node(BaseNode[_PrepResult, _ExecResult, _PostResult]):
     max_retries: int
-    wait: Union[int, float]
+    wait: Union[int, float, Backoff]
     cur_retry: int
+    cache: Optional[ExecCache]
     
-    def __init__(self, max_retries: int = 1, wait: Union[int, float] = 0) -> None: ...
+    def __init__(self, max_retries: int = 1, wait: Union[int, float, Backoff] = 0, cache: Optional[ExecCache] = None) -> None: ...
     def exec_fallback(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
+    def _delay(self, r: int, exc: Exception) -> Optional[float]: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
 
 class BatchNode(Node[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
     def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
+class ProcessPoolBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    max_workers: Optional[int]
+    chunksize: int
+
+    def __init__(self, *args: Any, max_workers: Optional[int] = None, chunksize: int = 1, **kwargs: Any) -> None: ...
+    def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+
+class StreamBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    def _exec(self, items: Optional[Iterable[_PrepResult]]) -> Iterator[_ExecResult]: ...
+
+def _imap(ex: Executor, fn: Callable[[Any], Any], items: Iterable[Any], n: Optional[int] = None) -> Iterator[Any]: ...
+
+class ThreadedBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    max_workers: Optional[int]
+    max_in_flight: Optional[int]
+
+    def __init__(self, *args: Any, max_workers: Optional[int] = None, max_in_flight: Optional[int] = None, **kwargs: Any) -> None: ...
+    def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+
+def _const(e: Optional[ast.expr]) -> Optional[set[str]]: ...
+def _either(*xs: Optional[bool]) -> Optional[bool]: ...
+def _falls(body: List[ast.stmt]) -> Optional[bool]: ...
+def _actions(fn: Callable[..., Any]) -> Optional[frozenset[str]]: ...
+def _cycles(table: List[Dict[str, int]]) -> List[List[int]]: ...
+
+class Topology:
+    flow: Flow[Any, Any, Any]
+    nodes: List[BaseNode[Any, Any, Any]]
+    table: List[Dict[str, int]]
+    returned: List[Optional[frozenset[str]]]
+    dead_ends: List[int]
+    missing: List[Tuple[int, str]]
+    unreachable: List[int]
+    cycles: List[List[int]]
+    children: Dict[int, List[Topology]]
+    depth: int
+
+    def __init__(self, flow: Flow[Any, Any, Any], refresh: bool = False) -> None: ...
+    def name(self, i: int) -> str: ...
+    @property
+    def problems(self) -> List[str]: ...
+
+class _Plan:
+    nodes: List[BaseNode[Any, Any, Any]]
+    table: List[Dict[str, int]]
+    is_async: List[bool]
+    free: List[List[BaseNode[Any, Any, Any]]]
+
+    def __init__(self, topo: Topology) -> None: ...
+    def acquire(self) -> List[BaseNode[Any, Any, Any]]: ...
+    def step(self, i: int, action: Optional[str]) -> Optional[int]: ...
+    def start(self, p: Params, st: Optional[Dict[str, Any]]) -> Tuple[Optional[int], Params, Any]: ...
+    def run(
+        self, shared: SharedData, p: Params,
+        ck: Optional[Checkpoint] = None, st: Optional[Dict[str, Any]] = None, h: Optional[Flow[Any, Any, Any]] = None
+    ) -> Any: ...
+    async def run_async(
+        self, shared: SharedData, p: Params,
+        ck: Optional[Checkpoint] = None, st: Optional[Dict[str, Any]] = None, h: Optional[Flow[Any, Any, Any]] = None
+    ) -> Any: ...
+
+def _append(d: Dict[Any, Any], k: Any, v: Any) -> None: ...
+def _incr(d: Dict[Any, Any], k: Any, n: Union[int, float]) -> Union[int, float]: ...
+def _merge(d: Dict[Any, Any], k: Any, m: Dict[Any, Any]) -> None: ...
+_OPS: Dict[str, Callable[[Any, Any, Any], Any]]
+
+class SharedStore(Dict[str, Any]):
+    _locks: Dict[str, asyncio.Lock]
+    _mu: threading.Lock
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None: ...
+    def __reduce__(self) -> Tuple[Any, ...]: ...
+    def lock(self, key: str) -> asyncio.Lock: ...
+    def _op(self, name: str, key: str, arg: Any) -> Any: ...
+    def append(self, key: str, value: Any) -> None: ...
+    def incr(self, key: str, n: Union[int, float] = 1) -> Union[int, float]: ...
+    def merge(self, key: str, mapping: Dict[Any, Any]) -> None: ...
+    def view(self) -> _View: ...
+
+class _View(MutableMapping[str, Any]):
+    base: MutableMapping[str, Any]
+    local: Dict[str, Any]
+    written: set[str]
+    ops: List[Tuple[str, str, Any]]
+    _locks: Dict[str, asyncio.Lock]
+
+    def __init__(self, base: MutableMapping[str, Any]) -> None: ...
+    def __getitem__(self, k: str) -> Any: ...
+    def __setitem__(self, k: str, v: Any) -> None: ...
+    def __delitem__(self, k: str) -> None: ...
+    def _write(self, k: str) -> None: ...
+    def __iter__(self) -> Iterator[str]: ...
+    def __len__(self) -> int: ...
+    def lock(self, key: str) -> asyncio.Lock: ...
+    def _op(self, name: str, key: str, arg: Any) -> Any: ...
+    def append(self, key: str, value: Any) -> None: ...
+    def incr(self, key: str, n: Union[int, float] = 1) -> Union[int, float]: ...
+    def merge(self, key: str, mapping: Dict[Any, Any]) -> None: ...
+    def view(self) -> _View: ...
+    def commit(self) -> set[str]: ...
+
+class _Tracked(MutableMapping[str, Any]):
+    base: MutableMapping[str, Any]
+    touched: set[str]
+
+    def __init__(self, base: MutableMapping[str, Any]) -> None: ...
+    def __getitem__(self, k: str) -> Any: ...
+    def __setitem__(self, k: str, v: Any) -> None: ...
+    def __delitem__(self, k: str) -> None: ...
+    def __contains__(self, k: object) -> bool: ...
+    def __iter__(self) -> Iterator[str]: ...
+    def __len__(self) -> int: ...
+    def __getattr__(self, name: str) -> Any: ...
+    def __reduce_ex__(self, proto: Any) -> Any: ...
+    def _op(self, name: str, key: str, arg: Any) -> Any: ...
+    def append(self, key: str, value: Any) -> None: ...
+    def incr(self, key: str, n: Union[int, float] = 1) -> Union[int, float]: ...
+    def merge(self, key: str, mapping: Dict[Any, Any]) -> None: ...
+    def view(self) -> _View: ...
+
+_SPILLED: object
+
+def _size(v: Any) -> Optional[int]: ...
+
+class SpillStore(MutableMapping[Any, Any]):
+    tmp: bool
+    path: str
+    threshold: int
+    hot_size: int
+    mmap: bool
+    loads: int
+    mem: Dict[Any, Any]
+    hot: OrderedDict[Any, Any]
+    maps: Dict[Any, Any]
+    digests: Dict[Any, int]
+    lock: threading.RLock
+    db: sqlite3.Connection
+    ondisk: set[Any]
+    pinned: set[Any]
+
+    def __init__(self, path: Optional[str] = None, threshold: int = 1 << 20, hot: int = 8, mmap: bool = True) -> None: ...
+    def _npy(self, k: Any) -> str: ...
+    def __getitem__(self, k: Any) -> Any: ...
+    def __setitem__(self, k: Any, v: Any) -> None: ...
+    def __delitem__(self, k: Any) -> None: ...
+    def __contains__(self, k: object) -> bool: ...
+    def __iter__(self) -> Iterator[Any]: ...
+    def __len__(self) -> int: ...
+    def _cache(self, k: Any, v: Any) -> None: ...
+    def _spill(self, k: Any, v: Any, blob: Optional[bytes] = None) -> None: ...
+    def _write(self, k: Any, blob: Optional[bytes], npy: Optional[str]) -> None: ...
+    def _drop(self, k: Any) -> None: ...
+    def flush(self) -> None: ...
+    def close(self) -> None: ...
+    def __enter__(self) -> SpillStore: ...
+    def __exit__(self, *exc: Any) -> None: ...
+
+class Checkpoint:
+    digests: Dict[Any, int]
+    records: Dict[Any, Any]
+
+    def __init__(self) -> None: ...
+    def save(self, state: Dict[str, Any], shared: SharedData, records: Optional[Dict[Any, Any]] = None) -> None: ...
+    def load(self) -> Optional[Tuple[Dict[str, Any], SharedData]]: ...
+    def clear(self) -> None: ...
+    def _write(self, state: Dict[str, Any], records: Dict[Any, bytes], changed: Dict[Any, bytes], deleted: List[Any]) -> None: ...
+    def _read(self) -> Optional[Tuple[Dict[str, Any], Dict[Any, bytes], Dict[Any, bytes]]]: ...
+
+class SQLiteCheckpoint(Checkpoint):
+    db: sqlite3.Connection
+
+    def __init__(self, path: str) -> None: ...
+
+_QueueItem = Tuple[int, bytes, int, Optional[bytes], Optional[bytes]]
+
+class WorkQueue:
+    def put(self, job: Tuple[bytes, bytes], items: List[bytes]) -> None: ...
+    def job(self) -> Tuple[bytes, bytes]: ...
+    def take(self) -> Optional[Tuple[int, bytes]]: ...
+    def finish(self, k: int, result: Optional[bytes], error: Optional[bytes] = None) -> None: ...
+    def remaining(self) -> int: ...
+    def results(self) -> List[_QueueItem]: ...
+    def clear(self) -> None: ...
+    def close(self) -> None: ...
+
+class SQLiteWorkQueue(WorkQueue):
+    tmp: bool
+    path: str
+    timeout: float
+    db: sqlite3.Connection
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30) -> None: ...
+    def __reduce__(self) -> Tuple[Any, ...]: ...
+
+_HOOKS: frozenset[str]
+_hooked_types: Dict[type, bool]
+_stream: contextvars.ContextVar[Optional[_Stream]]
+_DONE: object
+
+def _event(kind: str, flow: Flow[Any, Any, Any], node: BaseNode[Any, Any, Any], args: Tuple[Any, ...]) -> Dict[str, Any]: ...
+
+class _Stream:
+    q: asyncio.Queue[Any]
+    loop: asyncio.AbstractEventLoop
+    tid: int
+    blocking: bool
+    closed: bool
+    dropped: int
+
+    def __init__(self, maxsize: int, blocking: bool = False) -> None: ...
+    def put(self, e: Dict[str, Any]) -> None: ...
+    def _push(self, e: Dict[str, Any]) -> None: ...
+    async def put_async(self, e: Dict[str, Any]) -> None: ...
+    async def _finish(self, aw: Awaitable[Any]) -> Any: ...
+    def drain(self, aw: Awaitable[Any]) -> AsyncIterator[Dict[str, Any]]: ...
+
 class Flow(BaseNode[_PrepResult, Any, _PostResult]):
     start_node: Optional[BaseNode[Any, Any, Any]]
+    _plan: Optional[_Plan]
+    _ckpt: Optional[Checkpoint]
+    _state: Optional[Dict[str, Any]]
+    _topology: Optional[Topology]
     
-    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None) -> None: ...
+    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None, **kwargs: Any) -> None: ...
+    def analyze(self, strict: bool = False, refresh: bool = False) -> Topology: ...
     def start(self, start: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
+    def run(self, shared: SharedData, checkpoint: Optional[Checkpoint] = None) -> _PostResult: ...
+    def resume(self, checkpoint: Checkpoint, shared: Optional[SharedData] = None) -> _PostResult: ...
+    def _restore(
+        self, checkpoint: Checkpoint, shared: Optional[SharedData]
+    ) -> Tuple[SharedData, Checkpoint, Dict[str, Any]]: ...
+    def _attach(self, ck: Checkpoint, state: Dict[str, Any]) -> List[Tuple[Flow, Optional[_Plan]]]: ...
+    def _detach(self, undo: List[Tuple[Flow, Optional[_Plan]]]) -> None: ...
+    def _checkpointed(self, shared: SharedData, ck: Checkpoint, state: Dict[str, Any]) -> _PostResult: ...
+    def _prep(self, shared: SharedData) -> _PrepResult: ...
+    def compile(self, strict: bool = False) -> Flow[_PrepResult, Any, _PostResult]: ...
+    def _compile(self, topo: Topology, undo: Optional[List[Tuple[Flow, Optional[_Plan]]]] = None) -> None: ...
     def get_next_node(
         self, curr: BaseNode[Any, Any, Any], action: Optional[str]
     ) -> Optional[BaseNode[Any, Any, Any]]: ...
+    def on_node_start(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def on_node_end(self, node: BaseNode[Any, Any, Any], shared: SharedData, action: Any) -> Any: ...
+    def on_error(self, node: BaseNode[Any, Any, Any], shared: SharedData, exc: Exception) -> Any: ...
+    def on_transition(self, node: BaseNode[Any, Any, Any], action: Any, nxt: BaseNode[Any, Any, Any]) -> Any: ...
+    def _hooked(self) -> Optional[Flow[Any, Any, Any]]: ...
+    def _emit(self, kind: str, node: BaseNode[Any, Any, Any], *args: Any) -> None: ...
+    def _node(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def run_stream(self, shared: SharedData, maxsize: int = 100) -> AsyncIterator[Dict[str, Any]]: ...
     def _orch(
         self, shared: SharedData, params: Optional[Params] = None
     ) -> Any: ...
@@ -63,7 +381,62 @@ class Flow(BaseNode[_PrepResult, Any, _PostResult]):
 class BatchFlow(Flow[Optional[List[Params]], Any, _PostResult]):
     def _run(self, shared: SharedData) -> _PostResult: ...
 
+def _same(a: Any, b: Any) -> bool: ...
+def _diff(a: Dict[Any, Any], b: Dict[Any, Any]) -> Dict[Any, Tuple[str, Any]]: ...
+def _patch(d: Dict[Any, Any], diff: Dict[Any, Tuple[str, Any]]) -> Dict[Any, Any]: ...
+def _work(queue: WorkQueue) -> None: ...
+
+class BatchItemError(Exception):
+    params: Params
+    error: str
+    traceback: str
+
+    def __init__(self, params: Params, error: str, tb: str) -> None: ...
+    def __reduce__(self) -> Tuple[Any, ...]: ...
+
+class DistributedBatchFlow(BatchFlow[Optional[List[Params]], Any, _PostResult]):
+    workers: Optional[int]
+    queue: Optional[WorkQueue]
+    poll: float
+
+    def __init__(
+        self, *args: Any, workers: Optional[int] = None, queue: Optional[WorkQueue] = None, poll: float = 0.1, **kwargs: Any
+    ) -> None: ...
+    @staticmethod
+    def worker(queue: WorkQueue) -> None: ...
+
+class ParallelFlow(Flow[_PrepResult, List[Any], _PostResult]):
+    branches: List[Flow[Any, Any, Any]]
+    max_workers: Optional[int]
+
+    def __init__(self, *branches: BaseNode[Any, Any, Any], max_workers: Optional[int] = None) -> None: ...
+    def compile(self, strict: bool = False) -> ParallelFlow[_PrepResult, List[Any], _PostResult]: ...
+    def _orch(self, shared: SharedData, params: Optional[Params] = None) -> List[Any]: ...
+    def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: List[Any]) -> _PostResult: ...
+
+class Hedge:
+    percentile: float
+    delay: Optional[float]
+    min_samples: int
+    samples: Deque[float]
+    calls: int
+    fired: int
+    won: int
+
+    def __init__(self, percentile: float = 95, delay: Optional[float] = None, window: int = 100, min_samples: int = 10) -> None: ...
+    def threshold(self) -> Optional[float]: ...
+    async def run(self, make: Callable[[], Awaitable[Any]]) -> Any: ...
+
+_deadline: contextvars.ContextVar[Optional[float]]
+
 class AsyncNode(Node[_PrepResult, _ExecResult, _PostResult]):
+    timeout: Optional[float]
+    total_timeout: Optional[float]
+    hedge: Optional[Hedge]
+
+    def __init__(
+        self, *args: Any, timeout: Optional[float] = None, total_timeout: Optional[float] = None, hedge: Optional[Hedge] = None, **kwargs: Any
+    ) -> None: ...
     async def prep_async(self, shared: SharedData) -> _PrepResult: ...
     async def exec_async(self, prep_res: _PrepResult) -> _ExecResult: ...
     async def exec_fallback_async(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
@@ -71,27 +444,107 @@ class AsyncNode(Node[_PrepResult, _ExecResult, _PostResult]):
         self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult
     ) -> _PostResult: ...
     async def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
+    def _call(self, prep_res: _PrepResult) -> Awaitable[_ExecResult]: ...
+    def _attempt(self, prep_res: _PrepResult, dl: Optional[float]) -> Awaitable[_ExecResult]: ...
     async def run_async(self, shared: SharedData) -> _PostResult: ...
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
 
+_phases: Dict[type, Tuple[bool, bool, bool]]
+_PHASES: frozenset[str]
+
+def _overridden(c: type) -> Tuple[bool, bool, bool]: ...
+
 class AsyncBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
     async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
-class AsyncParallelBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
+class AsyncStreamBatchNode(AsyncNode[Any, AsyncIterator[_ExecResult], _PostResult], BatchNode[Any, AsyncIterator[_ExecResult], _PostResult]):
+    async def _exec(self, items: Union[Iterable[Any], AsyncIterable[Any], None]) -> AsyncIterator[_ExecResult]: ...
+    def _stream(self, items: Union[Iterable[Any], AsyncIterable[Any], None]) -> AsyncIterator[_ExecResult]: ...
+
+_Chunk = TypeVar('_Chunk')
+
+class ChunkStream(Generic[_Chunk]):
+    chunks: List[_Chunk]
+    done: bool
+    error: Optional[BaseException]
+    task: Optional[asyncio.Task[None]]
+    _more: asyncio.Event
+
+    def __init__(self) -> None: ...
+    def _put(self, c: _Chunk) -> None: ...
+    def _wake(self) -> None: ...
+    def _close(self, err: Optional[BaseException] = None) -> None: ...
+    def _ended(self, task: asyncio.Task[None]) -> None: ...
+    def __aiter__(self) -> AsyncIterator[_Chunk]: ...
+    async def collect(self) -> List[_Chunk]: ...
+    def __await__(self) -> Generator[Any, None, List[_Chunk]]: ...
+
+class AsyncStreamNode(AsyncNode[_PrepResult, ChunkStream[Any], _PostResult]):
+    def exec_async(self, prep_res: _PrepResult) -> AsyncIterator[Any]: ...  # type: ignore[override]
+    async def _exec(self, prep_res: _PrepResult) -> ChunkStream[Any]: ...
+    async def _pump(self, s: ChunkStream[Any], prep_res: _PrepResult) -> None: ...
+
+_slots: contextvars.ContextVar[Optional[_Slots]]
+
+class _Slots:
+    sem: Optional[asyncio.Semaphore]
+    rate: Optional[float]
+    next: float
+    work: Callable[[], Awaitable[None]]
+    tasks: Deque[asyncio.Future[None]]
+    err: bool
+
+    def __init__(self, n: Optional[int], rate: Optional[float], work: Callable[[], Awaitable[None]]) -> None: ...
+    async def acquire(self) -> None: ...
+    def release(self) -> None: ...
+    def spawn(self) -> None: ...
+
+async def _backoff(d: float) -> None: ...
+
+async def _gather(
+    fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+    n: Optional[int] = None, rate: Optional[float] = None
+) -> List[Any]: ...
+
+class _Bounded:
+    max_concurrency: Optional[int]
+    rate_limit: Optional[float]
+
+    def __init__(self, *args: Any, max_concurrency: Optional[int] = None, rate_limit: Optional[float] = None, **kwargs: Any) -> None: ...
+
+class AsyncParallelBatchNode(_Bounded, AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
     async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
 
 class AsyncFlow(Flow[_PrepResult, Any, _PostResult], AsyncNode[_PrepResult, Any, _PostResult]):
+    async def run_async(self, shared: SharedData, checkpoint: Optional[Checkpoint] = None) -> _PostResult: ...
+    async def resume_async(self, checkpoint: Checkpoint, shared: Optional[SharedData] = None) -> _PostResult: ...
+    async def _checkpointed_async(self, shared: SharedData, ck: Checkpoint, state: Dict[str, Any]) -> _PostResult: ...
+    async def _prep_async(self, shared: SharedData) -> _PrepResult: ...
+    async def _emit_async(self, kind: str, node: BaseNode[Any, Any, Any], *args: Any) -> None: ...
+    async def _node_async(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def run_stream(self, shared: SharedData, maxsize: int = 100) -> AsyncIterator[Dict[str, Any]]: ...
     async def _orch_async(
         self, shared: SharedData, params: Optional[Params] = None
     ) -> Any: ...
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
+    async def _flow_async(self, shared: SharedData) -> _PostResult: ...
     async def post_async(
         self, shared: SharedData, prep_res: _PrepResult, exec_res: Any
     ) -> _PostResult: ...
 
+class AsyncParallelFlow(AsyncFlow[_PrepResult, List[Any], _PostResult], ParallelFlow[_PrepResult, List[Any], _PostResult]):
+    branches: List[AsyncFlow[Any, Any, Any]]
+
+    def __init__(self, *branches: BaseNode[Any, Any, Any]) -> None: ...
+    async def _orch_async(self, shared: SharedData, params: Optional[Params] = None) -> List[Any]: ...
+    async def post_async(self, shared: SharedData, prep_res: _PrepResult, exec_res: List[Any]) -> _PostResult: ...
+
 class AsyncBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
-    async def _run_async(self, shared: SharedData) -> _PostResult: ...
+    async def _flow_async(self, shared: SharedData) -> _PostResult: ...
+
+class AsyncParallelBatchFlow(_Bounded, AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
+    isolate: bool
 
-class AsyncParallelBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
-    async def _run_async(self, shared: SharedData) -> _PostResult: ...
\ No newline at end of file
+    def __init__(self, *args: Any, isolate: bool = False, **kwargs: Any) -> None: ...
+    async def _flow_async(self, shared: SharedData) -> _PostResult: ...
\ No newline at end of file
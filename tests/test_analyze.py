@@ -0,0 +1,124 @@
+import unittest
+import ast
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, ParallelFlow, Topology, _falls
+
+class Decide(Node):
+    def post(self, shared, prep_res, exec_res):
+        if shared.get("done"):
+            return "answer"
+        return "search" if shared.get("query") else "aprove"  # typo for "approve"
+
+class Search(Node):
+    def post(self, shared, prep_res, exec_res):
+        shared["done"] = True
+
+class Answer(Node):
+    def post(self, shared, prep_res, exec_res):
+        try:
+            shared["answer"] = 42
+        finally:
+            shared["steps"] = 1
+        return "finish"
+
+class Review(Node):
+    pass
+
+class Dynamic(Node):
+    def post(self, shared, prep_res, exec_res):
+        return shared["next"]
+
+class Poll(Node):
+    def post(self, shared, prep_res, exec_res):
+        while True:
+            if shared.get("ready"):
+                return "done"
+
+class AsyncBranch(AsyncNode):
+    async def post_async(self, shared, prep_res, exec_res):
+        return "left" if shared.get("left") else "right"
+
+def agent():
+    decide, search, answer, review = Decide(), Search(), Answer(), Review()
+    decide - "search" >> search
+    decide - "answer" >> answer
+    decide - "approve" >> review
+    search >> decide
+    return Flow(start=decide)
+
+class TestAnalyze(unittest.TestCase):
+    def test_topology(self):
+        t = agent().analyze()
+        self.assertIsInstance(t, Topology)
+        self.assertEqual([type(n).__name__ for n in t.nodes], ["Decide", "Search", "Answer", "Review"])
+        self.assertEqual(t.table[0], {"search": 1, "answer": 2, "approve": 3})
+        self.assertEqual(t.returned, [{"answer", "search", "aprove"}, {"default"}, {"finish"}, {"default"}])
+        self.assertEqual(t.dead_ends, [2, 3])
+        self.assertEqual(t.missing, [(0, "aprove")])
+        self.assertEqual(t.unreachable, [3])
+        self.assertEqual(t.cycles, [[0, 1]])
+        self.assertEqual(t.depth, 1)
+
+    def test_strict_mode_fails_before_running(self):
+        flow = agent()
+        with self.assertRaises(ValueError) as cm:
+            flow.analyze(strict=True)
+        self.assertIn("Decide#0 returns 'aprove'", str(cm.exception))
+        self.assertIn("Review#3 is unreachable", str(cm.exception))
+        with self.assertRaises(ValueError):
+            flow.compile(strict=True)
+
+    def test_unknown_returns_are_not_flagged(self):
+        dynamic = Dynamic()
+        dynamic - "a" >> Review()
+        dynamic - "b" >> Review()
+        t = Flow(start=dynamic).analyze(strict=True)
+        self.assertIsNone(t.returned[0])
+        self.assertEqual((t.missing, t.unreachable), ([], []))
+
+    def test_loops_and_match_are_not_guessed(self):
+        poll = Poll()
+        poll - "done" >> Review()
+        t = Flow(start=poll).analyze(strict=True)  # no "returns 'default'" error
+        self.assertIsNone(t.returned[0])
+        body = lambda src: ast.parse(src).body
+        self.assertIsNone(_falls(body("while 1:\n    return 'a'")))
+        self.assertTrue(_falls(body("while x:\n    return 'a'")))
+        self.assertIsNone(_falls(body("if x:\n    return 'a'\nelse:\n    while True: pass")))
+        self.assertFalse(_falls(body("try:\n    return 'a'\nexcept E:\n    raise")))
+        if sys.version_info >= (3, 10):
+            self.assertIsNone(_falls(body("match x:\n    case 1:\n        return 'a'\n    case _:\n        return 'b'")))
+
+    def test_async_nodes_use_post_async(self):
+        branch = AsyncBranch()
+        branch - "left" >> Review()
+        branch - "right" >> Review()
+        t = AsyncFlow(start=branch).analyze(strict=True)
+        self.assertEqual(t.returned[0], {"left", "right"})
+
+    def test_nested_flows(self):
+        inner = agent()
+        start = Review()
+        start >> inner >> ParallelFlow(Review(), Flow(start=Review()))
+        t = Flow(start=start).analyze()
+        self.assertEqual(t.depth, 3)
+        self.assertIs(t.children[1][0], inner.analyze())
+        self.assertEqual(len(t.children[2]), 2)
+        self.assertEqual(t.problems[0], "Flow#1 > Decide#0 returns 'aprove' but has no such transition (has ['answer', 'approve', 'search'])")
+
+    def test_topology_is_cached_until_compile(self):
+        first = Review()
+        flow = Flow(start=first)
+        t = flow.analyze()
+        self.assertIs(flow.analyze(), t)
+        first >> Review()
+        self.assertEqual(len(flow.analyze().nodes), 1)
+        flow.compile()
+        self.assertEqual(len(flow.analyze().nodes), 2)
+        self.assertIs(flow._plan.nodes, flow.analyze().nodes)
+
+if __name__ == '__main__':
+    unittest.main()
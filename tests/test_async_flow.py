@@ -4,7 +4,8 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from pocketflow import Node, AsyncNode, AsyncFlow
+import pocketflow
+from pocketflow import Node, AsyncNode, AsyncFlow, AsyncBatchNode
 
 class AsyncNumberNode(AsyncNode):
     """
@@ -102,6 +103,38 @@ class TestAsyncNode(unittest.TestCase):
         self.assertEqual(shared_storage['current'], 11)
         self.assertEqual(condition, "done")
 
+    def test_only_overridden_phases_run(self):
+        class PostOnly(AsyncNode):
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['seen'] = (prep_res, exec_res)
+                return "done"
+
+        class ItemsOnly(AsyncBatchNode):
+            async def prep_async(self, shared):
+                return [1, 2]
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['results'] = exec_res
+
+        shared = {}
+        self.assertEqual(asyncio.run(PostOnly().run_async(shared)), "done")
+        self.assertEqual(asyncio.run(AsyncNode().run_async(shared)), None)
+        asyncio.run(ItemsOnly().run_async(shared))
+        self.assertEqual(shared, {'seen': (None, None), 'results': [None, None]})  # batch _exec still runs per item
+        self.assertEqual(pocketflow._phases[PostOnly], (False, False, True))
+        self.assertEqual(pocketflow._phases[ItemsOnly], (True, True, True))
+
+    def test_instance_assigned_phases_run(self):
+        async def exec_async(prep_res):
+            return "exec"
+        async def post_async(shared, prep_res, exec_res):
+            shared['seen'] = exec_res
+            return "done"
+        node = AsyncNode()
+        node.exec_async, node.post_async = exec_async, post_async
+        shared = {}
+        self.assertEqual(asyncio.run(node.run_async(shared)), "done")
+        self.assertEqual(shared['seen'], "exec")
+
 
 class TestAsyncFlow(unittest.TestCase):
     """
@@ -156,5 +156,30 @@ class TestAsyncParallelBatchFlow(unittest.TestCase):
         expected_total = sum(num * 2 for batch in shared_storage['batches'] for num in batch)
         self.assertEqual(shared_storage['total'], expected_total)
 
+    def test_max_concurrency(self):
+        """
+        Test that max_concurrency limits how many sub-flows run at once
+        """
+        in_flight = {'now': 0, 'peak': 0}
+
+        class TrackingNode(AsyncNode):
+            async def prep_async(self, shared_storage):
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+                await asyncio.sleep(0.01)
+                in_flight['now'] -= 1
+                shared_storage.setdefault('done', []).append(self.params['batch_id'])
+
+        class BoundedBatchFlow(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'batch_id': i} for i in range(10)]
+
+        shared_storage = {}
+        flow = BoundedBatchFlow(start=TrackingNode(), max_concurrency=2)
+        self.loop.run_until_complete(flow.run_async(shared_storage))
+
+        self.assertEqual(sorted(shared_storage['done']), list(range(10)))
+        self.assertEqual(in_flight['peak'], 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
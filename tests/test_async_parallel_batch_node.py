@@ -139,5 +139,79 @@ class TestAsyncParallelBatchNode(unittest.TestCase):
         self.assertLess(execution_order.index(1), execution_order.index(0))
         self.assertLess(execution_order.index(3), execution_order.index(2))
 
+    def test_max_concurrency(self):
+        """
+        Test that max_concurrency bounds in-flight items and keeps result order
+        """
+        in_flight = {'now': 0, 'peak': 0}
+
+        class BoundedProcessor(AsyncParallelNumberProcessor):
+            async def exec_async(self, item):
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+                await asyncio.sleep(0.01 if item % 2 else 0.02)
+                in_flight['now'] -= 1
+                return item * 2
+
+        shared_storage = {
+            'input_numbers': list(range(20))
+        }
+
+        processor = BoundedProcessor()
+        processor.max_concurrency = 3
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+
+        self.assertEqual(shared_storage['processed_numbers'], [x * 2 for x in range(20)])
+        self.assertEqual(in_flight['peak'], 3)
+
+    def test_max_concurrency_keeps_retry_and_fallback(self):
+        """
+        Test that bounded execution still retries per item and falls back
+        """
+        attempts = {}
+
+        class FlakyProcessor(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return shared_storage['input_numbers']
+
+            async def exec_async(self, item):
+                attempts[item] = attempts.get(item, 0) + 1
+                if item == 3 or attempts[item] < 2:
+                    raise ValueError(item)
+                return item
+
+            async def exec_fallback_async(self, item, exc):
+                return -1
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['processed_numbers'] = exec_result
+
+        shared_storage = {
+            'input_numbers': list(range(6))
+        }
+
+        processor = FlakyProcessor(max_retries=2, max_concurrency=2)
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+
+        self.assertEqual(shared_storage['processed_numbers'], [0, 1, 2, -1, 4, 5])
+        self.assertTrue(all(n == 2 for n in attempts.values()))
+
+    def test_rate_limit(self):
+        """
+        Test that rate_limit spaces out item starts
+        """
+        processor = AsyncParallelNumberProcessor(delay=0)
+        processor.rate_limit = 50  # one item every 20ms
+        shared_storage = {
+            'input_numbers': list(range(6))
+        }
+
+        start_time = self.loop.time()
+        self.loop.run_until_complete(processor.run_async(shared_storage))
+        execution_time = self.loop.time() - start_time
+
+        self.assertEqual(shared_storage['processed_numbers'], [0, 2, 4, 6, 8, 10])
+        self.assertGreaterEqual(execution_time, 0.09)  # 5 gaps of 20ms
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,244 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncNode, AsyncFlow, AsyncBatchFlow, AsyncParallelBatchFlow, Checkpoint, SQLiteCheckpoint
+
+calls = []
+crash = {'at': None}
+
+class Crash(Exception):
+    pass
+
+class StepNode(Node):
+    """Appends its name to shared['log']; raises once if crash['at'] names it."""
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+    def prep(self, shared):
+        if crash['at'] == self.name:
+            crash['at'] = None
+            raise Crash(self.name)
+        calls.append(self.name)
+        shared.setdefault('log', []).append(f"{self.name}{self.params.get('batch', '')}")
+
+class AsyncStepNode(AsyncNode):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+    async def prep_async(self, shared):
+        await asyncio.sleep(0)
+        if crash['at'] == f"{self.name}{self.params.get('batch', '')}":
+            crash['at'] = None
+            raise Crash(self.name)
+        calls.append(self.name)
+        shared.setdefault('log', []).append(f"{self.name}{self.params.get('batch', '')}")
+
+class MemoryCheckpoint(Checkpoint):
+    """Keeps the stored rows in memory and records which keys each save wrote."""
+    def __init__(self):
+        super().__init__()
+        self.state, self.records_rows, self.rows, self.writes, self.states = None, {}, {}, [], []
+    def _write(self, state, records, changed, deleted):
+        self.state = state
+        self.states.append(state)
+        self.records_rows.update(records)
+        self.rows.update(changed)
+        for k in deleted:
+            self.rows.pop(k)
+        self.writes.append(sorted(changed))
+    def _read(self):
+        return None if self.state is None else (self.state, dict(self.records_rows), dict(self.rows))
+    def clear(self):
+        super().clear()
+        self.state, self.records_rows, self.rows = None, {}, {}
+
+def crash_then_empty(at):
+    crash['at'] = at
+    return {}
+
+def chain(cls, *names):
+    nodes = [cls(n) for n in names]
+    for a, b in zip(nodes, nodes[1:]):
+        a >> b
+    return nodes[0]
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        crash['at'] = None
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def test_resume_continues_after_last_completed_node(self):
+        flow = Flow(start=chain(StepNode, 'a', 'b', 'c', 'd'))
+        crash['at'] = 'c'
+        shared = {}
+        with self.assertRaises(Crash):
+            flow.run(shared, checkpoint=SQLiteCheckpoint(self.path))
+        self.assertEqual(calls, ['a', 'b'])
+
+        calls.clear()
+        restored = {}
+        flow = Flow(start=chain(StepNode, 'a', 'b', 'c', 'd'))
+        flow.resume(SQLiteCheckpoint(self.path), restored)
+        self.assertEqual(calls, ['c', 'd'])
+        self.assertEqual(restored['log'], ['a', 'b', 'c', 'd'])
+
+    def test_flow_prep_is_not_rerun_on_resume(self):
+        class InitFlow(Flow):
+            def prep(self, shared):
+                shared['log'] = []
+                return "prepped"
+            def post(self, shared, prep_res, exec_res):
+                shared['prep_res'] = prep_res
+        crash['at'] = 'b'
+        shared = {}
+        with self.assertRaises(Crash):
+            InitFlow(start=chain(StepNode, 'a', 'b')).run(shared, checkpoint=SQLiteCheckpoint(self.path))
+        restored = {}
+        InitFlow(start=chain(StepNode, 'a', 'b')).resume(SQLiteCheckpoint(self.path), restored)
+        self.assertEqual(restored['log'], ['a', 'b'])
+        self.assertEqual(restored['prep_res'], "prepped")
+
+    def test_batch_flow_resumes_from_last_completed_param_set(self):
+        class Batches(BatchFlow):
+            def prep(self, shared):
+                return [{'batch': i} for i in range(3)]
+        crash['at'] = 'y'
+        shared = {}
+        ck = MemoryCheckpoint()
+        # crash inside the first batch, after 'x' completed
+        with self.assertRaises(Crash):
+            Batches(start=chain(StepNode, 'x', 'y')).run(shared, checkpoint=ck)
+        restored = {}
+        Batches(start=chain(StepNode, 'x', 'y')).resume(ck, restored)
+        self.assertEqual(restored['log'], ['x0', 'y0', 'x1', 'y1', 'x2', 'y2'])
+        self.assertEqual(ck.state['batch'], 3)
+
+        calls.clear()
+        again = {}
+        Batches(start=chain(StepNode, 'x', 'y')).resume(ck, again)
+        self.assertEqual(calls, [])  # everything already completed
+
+    def test_snapshots_are_incremental(self):
+        class Touch(Node):
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+            def prep(self, shared):
+                shared[self.key] = shared.get(self.key, 0) + 1
+        a, b = Touch('a'), Touch('b')
+        a >> b
+        shared = {'big': list(range(1000)), 'gone': 1}
+        ck = MemoryCheckpoint()
+        class DropGone(Flow):
+            def prep(self, shared): shared.pop('gone')
+        DropGone(start=a).run(shared, checkpoint=ck)
+        # prep snapshot writes everything, then each node only writes the key it changed
+        self.assertEqual(ck.writes, [['big'], ['a'], ['b']])
+        self.assertNotIn('gone', ck.rows)
+
+    def test_untouched_values_are_not_pickled_again(self):
+        pickles = []
+        class Big:
+            def __reduce__(self):
+                pickles.append(1)
+                return (dict, ())
+        class Step(Node):
+            def prep(self, shared):
+                shared['log'].append(self.params.get('batch'))  # in place, through a read
+        class Batches(BatchFlow):
+            def prep(self, shared):
+                return [{'batch': i} for i in range(3)]
+        ck = MemoryCheckpoint()
+        shared = {'big': Big(), 'log': []}
+        Batches(start=Step()).run(shared, checkpoint=ck)
+        self.assertEqual(len(pickles), 1)  # only the first snapshot
+        self.assertEqual(ck.load()[1]['log'], [0, 1, 2])
+
+    def test_prep_is_written_once(self):
+        class Batches(BatchFlow):
+            def prep(self, shared):
+                return [{'batch': i} for i in range(3)]
+        ck = MemoryCheckpoint()
+        Batches(start=chain(StepNode, 'x')).run({}, checkpoint=ck)
+        self.assertEqual(list(ck.records_rows), ['prep'])
+        self.assertTrue(all('prep' not in state for state in ck.states))  # steps only write their position
+        self.assertEqual(ck.state, {'batch': 3})
+
+    def test_run_clears_previous_checkpoint(self):
+        ck = SQLiteCheckpoint(self.path)
+        Flow(start=chain(StepNode, 'a')).run({}, checkpoint=ck)
+        crash['at'] = 'a'
+        shared = {}
+        with self.assertRaises(Crash):
+            Flow(start=chain(StepNode, 'a')).run(shared, checkpoint=ck)
+        self.assertEqual(ck.load()[0], {})
+        self.assertEqual(ck.records, {'prep': None})
+
+    def test_checkpointed_run_leaves_flow_uncompiled(self):
+        inner = Flow(start=chain(StepNode, 'a'))
+        flow = Flow(start=inner)
+        flow.run({}, checkpoint=MemoryCheckpoint())
+        self.assertIsNone(flow._plan)
+        self.assertIsNone(inner._plan)
+        inner.start(StepNode('b'))  # later graph edits take effect
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared['log'], ['b'])
+
+    def test_checkpointed_run_keeps_compiled_plan(self):
+        flow = Flow(start=chain(StepNode, 'a')).compile()
+        plan = flow._plan
+        flow.run({}, checkpoint=MemoryCheckpoint())
+        self.assertIs(flow._plan, plan)
+
+class TestAsyncCheckpoint(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        crash['at'] = None
+
+    def test_async_flow_resume(self):
+        ck = MemoryCheckpoint()
+        with self.assertRaises(Crash):
+            asyncio.run(AsyncFlow(start=chain(AsyncStepNode, 'a', 'b', 'c')).run_async(crash_then_empty('b'), checkpoint=ck))
+        restored = {}
+        asyncio.run(AsyncFlow(start=chain(AsyncStepNode, 'a', 'b', 'c')).resume_async(ck, restored))
+        self.assertEqual(restored['log'], ['a', 'b', 'c'])
+        self.assertEqual(calls, ['a', 'b', 'c'])
+
+    def test_async_batch_flow_resume(self):
+        class Batches(AsyncBatchFlow):
+            async def prep_async(self, shared):
+                return [{'batch': i} for i in range(3)]
+        ck = MemoryCheckpoint()
+        with self.assertRaises(Crash):
+            asyncio.run(Batches(start=chain(AsyncStepNode, 'x', 'y')).run_async(crash_then_empty('y1'), checkpoint=ck))
+        calls.clear()
+        restored = {}
+        asyncio.run(Batches(start=chain(AsyncStepNode, 'x', 'y')).resume_async(ck, restored))
+        self.assertEqual(calls, ['y', 'x', 'y'])
+        self.assertEqual(restored['log'], ['x0', 'y0', 'x1', 'y1', 'x2', 'y2'])
+
+    def test_async_parallel_batch_flow_skips_completed_items(self):
+        class Batches(AsyncParallelBatchFlow):
+            async def prep_async(self, shared):
+                return [{'batch': i} for i in range(4)]
+        ck = MemoryCheckpoint()
+        with self.assertRaises(Crash):
+            asyncio.run(Batches(start=chain(AsyncStepNode, 'x'), max_concurrency=1).run_async(crash_then_empty('x2'), checkpoint=ck))
+        self.assertEqual(sorted(k for k in ck.records if k != 'prep'), [('done', 0), ('done', 1)])
+        calls.clear()
+        restored = {}
+        asyncio.run(Batches(start=chain(AsyncStepNode, 'x')).resume_async(ck, restored))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sorted(restored['log']), ['x0', 'x1', 'x2', 'x3'])
+
+if __name__ == '__main__':
+    unittest.main()
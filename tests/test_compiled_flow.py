@@ -0,0 +1,131 @@
+# tests/test_compiled_flow.py
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+from pocketflow import Node, Flow, AsyncNode, AsyncFlow, AsyncParallelBatchFlow
+
+import test_flow_basic, test_flow_composition, test_batch_flow, test_async_flow, test_async_batch_flow, test_async_parallel_batch_flow
+
+class CompiledMixin:
+    """Re-runs an existing suite with every flow compiled right before its first run."""
+    def setUp(self):
+        super().setUp()
+        orch, orch_async = Flow._orch, AsyncFlow._orch_async
+        def _orch(flow, shared, params=None):
+            if flow._plan is None: flow.compile()
+            return orch(flow, shared, params)
+        async def _orch_async(flow, shared, params=None):
+            if flow._plan is None: flow.compile()
+            return await orch_async(flow, shared, params)
+        for target, name, fn in ((Flow, '_orch', _orch), (AsyncFlow, '_orch_async', _orch_async)):
+            patcher = mock.patch.object(target, name, fn)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+class TestFlowBasicCompiled(CompiledMixin, test_flow_basic.TestFlowBasic): pass
+class TestFlowCompositionCompiled(CompiledMixin, test_flow_composition.TestFlowComposition): pass
+class TestBatchFlowCompiled(CompiledMixin, test_batch_flow.TestBatchFlow): pass
+class TestAsyncFlowCompiled(CompiledMixin, test_async_flow.TestAsyncFlow): pass
+class TestAsyncBatchFlowCompiled(CompiledMixin, test_async_batch_flow.TestAsyncBatchFlow): pass
+class TestAsyncParallelBatchFlowCompiled(CompiledMixin, test_async_parallel_batch_flow.TestAsyncParallelBatchFlow): pass
+
+# --- Compile-specific behaviour ---
+class CountdownNode(Node):
+    def prep(self, shared):
+        shared['count'] -= 1
+        shared.setdefault('visits', []).append(id(self))
+    def post(self, shared, prep_res, exec_res):
+        return "again" if shared['count'] > 0 else "done"
+
+class RecordParamsNode(AsyncNode):
+    async def prep_async(self, shared):
+        await asyncio.sleep(0.01)
+        shared.setdefault('seen', []).append(self.params['i'])
+
+class TestCompiledFlow(unittest.TestCase):
+    def test_compile_returns_flow(self):
+        flow = Flow(start=Node())
+        self.assertIs(flow.compile(), flow)
+        self.assertIsNotNone(flow._plan)
+
+    def test_loop_reuses_node_slot(self):
+        """A compiled loop runs the same pre-bound copy instead of copying per step."""
+        node = CountdownNode()
+        node - "again" >> node
+        node - "done" >> Node()
+        flow = Flow(start=node).compile()
+        shared = {'count': 5}
+        self.assertIsNone(flow.run(shared))
+        self.assertEqual(len(shared['visits']), 5)
+        self.assertEqual(len(set(shared['visits'])), 1)
+        self.assertNotIn(id(node), shared['visits'])
+
+    def test_empty_flow(self):
+        self.assertIsNone(Flow().compile().run({}))
+
+    def test_start_drops_the_plan(self):
+        class Mark(Node):
+            def __init__(self, name):
+                super().__init__()
+                self.name = name
+            def prep(self, shared):
+                shared['ran'] = self.name
+        flow = Flow(start=Mark('a')).compile()
+        flow.start(Mark('b'))
+        self.assertIsNone(flow._plan)
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared['ran'], 'b')
+
+    def test_nested_flows_are_compiled(self):
+        inner = Flow(start=Node())
+        outer = Flow(start=inner).compile()
+        self.assertIsNotNone(inner._plan)
+        self.assertIsNotNone(outer._plan)
+
+    def test_node_state_does_not_carry_over_between_runs(self):
+        class Visits(Node):
+            def prep(self, shared):
+                self.visits = getattr(self, 'visits', 0) + 1
+                shared.setdefault('visits', []).append((self.visits, self.max_retries))
+        node = Visits()
+        flow = Flow(start=node).compile()
+        first, second = {}, {}
+        flow.run(first)
+        node.max_retries = 5  # changes after compile() are seen by the next run
+        flow.run(second)
+        self.assertEqual(first['visits'], [(1, 1)])
+        self.assertEqual(second['visits'], [(1, 5)])
+
+    def test_batch_items_get_fresh_node_copies(self):
+        class Visits(AsyncNode):
+            async def prep_async(self, shared):
+                self.visits = getattr(self, 'visits', 0) + 1
+                shared.setdefault('visits', []).append((self.visits, self.max_retries))
+        class Batch(AsyncParallelBatchFlow):
+            async def prep_async(self, shared): return [{'i': i} for i in range(3)]
+        node = Visits()
+        flow = Batch(start=AsyncFlow(start=node), max_concurrency=1).compile()
+        first, second = {}, {}
+        asyncio.run(flow.run_async(first))
+        node.max_retries = 5
+        asyncio.run(flow.run_async(second))
+        self.assertEqual(first['visits'], [(1, 1)] * 3)
+        self.assertEqual(second['visits'], [(1, 5)] * 3)
+
+    def test_concurrent_runs_get_separate_slots(self):
+        """Parallel batch runs of a compiled sub-flow must not share node params."""
+        class Batch(AsyncParallelBatchFlow):
+            async def prep_async(self, shared): return [{'i': i} for i in range(5)]
+        sub = AsyncFlow(start=RecordParamsNode()).compile()
+        shared = {}
+        asyncio.run(Batch(start=sub).compile().run_async(shared))
+        self.assertEqual(sorted(shared['seen']), [0, 1, 2, 3, 4])
+
+if __name__ == '__main__':
+    unittest.main()
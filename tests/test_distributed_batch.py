@@ -0,0 +1,121 @@
+import unittest
+import os
+import copy
+import pickle
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, DistributedBatchFlow, SQLiteWorkQueue, SQLiteCheckpoint, BatchItemError, _diff, _patch
+
+class Grade(Node):
+    def prep(self, shared):
+        return self.params
+    def exec(self, p):
+        if p["student"] == "bob" and os.path.exists(p.get("broken", "")):
+            raise ValueError(f"can't read {p['student']}")
+        return os.getpid()
+    def post(self, shared, p, pid):
+        shared.setdefault("results", {}).setdefault(p["class"], {})[p["student"]] = len(p["student"])
+        shared.setdefault("log", []).append(p["student"])
+        shared["pids"] = shared.get("pids", set()) | {pid}
+        return "graded"
+
+class Students(DistributedBatchFlow):
+    def prep(self, shared):
+        return [{"class": c, "student": s} for c in ("a", "b") for s in ("ann", "bob", "cy")]
+    def post(self, shared, prep_res, exec_res):
+        shared["outcomes"] = exec_res
+
+class TestDiff(unittest.TestCase):
+    def test_nested_dicts_merge_and_lists_extend(self):
+        base = {"results": {"a": {}}, "log": ["x"], "n": 1, "gone": 0}
+        first = {"results": {"a": {"ann": 1}}, "log": ["x", "ann"], "n": 2, "new": {"k": [1]}}
+        second = {"results": {"a": {"bob": 2}, "b": {}}, "log": ["x", "bob"], "n": 3, "gone": 0, "new": {"k": [2]}}
+        shared = _patch(_patch(copy.deepcopy(base), _diff(base, first)), _diff(base, second))
+        self.assertEqual(shared, {"results": {"a": {"ann": 1, "bob": 2}, "b": {}}, "log": ["x", "ann", "bob"], "n": 3, "new": {"k": [1, 2]}})
+
+class TestDistributedBatchFlow(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(lambda: [os.remove(f) for f in (self.path, self.path + "-wal", self.path + "-shm") if os.path.exists(f)])
+
+    def test_matches_batch_flow_across_processes(self):
+        expected = {"log": ["start"]}
+        class Serial(BatchFlow):
+            prep = Students.prep
+        Serial(start=Grade()).run(expected)
+        shared = {"log": ["start"]}
+        Students(start=Grade(), workers=2).run(shared)
+        self.assertEqual(shared["results"], expected["results"])
+        self.assertEqual(shared["log"], expected["log"])  # merged in input order
+        self.assertEqual(shared["outcomes"], ["graded"] * 6)
+        self.assertNotIn(os.getpid(), shared["pids"])
+
+    def test_in_process_worker(self):
+        shared = {}
+        Students(start=Flow(start=Grade()), workers=0).run(shared)
+        self.assertEqual(shared["results"]["b"], {"ann": 3, "bob": 3, "cy": 2})
+        self.assertEqual(shared["pids"], {os.getpid()})
+
+    def test_failures_are_collected_and_retried_on_resume(self):
+        flag = self.path + ".broken"
+        open(flag, "w").close()  # bob's items fail while this file exists
+        self.addCleanup(lambda: os.path.exists(flag) and os.remove(flag))
+        queue = SQLiteWorkQueue(self.path)
+        flow = Students(start=Grade(), workers=0, queue=queue)
+        flow.set_params({"broken": flag})
+        shared = {}
+        flow.run(shared)
+        errors = [r for r in shared["outcomes"] if isinstance(r, BatchItemError)]
+        self.assertEqual([e.params["class"] for e in errors], ["a", "b"])
+        self.assertIn("can't read bob", errors[0].traceback)
+        self.assertNotIn("log", shared)  # nothing is merged until every item succeeds
+
+        os.remove(flag)
+        shared = {}  # e.g. a new process
+        flow = Students(start=Grade(), workers=0, queue=SQLiteWorkQueue(self.path))
+        flow.set_params({"broken": flag})
+        flow.run(shared)  # only the failed items run again
+        self.assertEqual(shared["log"], ["ann", "bob", "cy", "ann", "bob", "cy"])
+        self.assertEqual(shared["outcomes"], ["graded"] * 6)
+        self.assertEqual(shared["pids"], {os.getpid()})
+        self.assertEqual(queue.results(), [])  # a clean run clears the queue
+
+    def test_resumes_items_left_by_a_crashed_run(self):
+        queue = SQLiteWorkQueue(self.path)
+        flow = Students(start=Grade(), workers=0, queue=queue)
+        queue.put((b"", b""), [pickle.dumps(p) for p in flow.prep({})])
+        for _ in range(3):
+            k, p = queue.take()
+            if k < 2:
+                queue.finish(k, pickle.dumps(("graded", {"log": ("extend", [f"earlier {k}"])})))
+        shared = {}
+        flow.run(shared)
+        self.assertEqual(shared["log"], ["earlier 0", "earlier 1", "cy", "ann", "bob", "cy"])
+
+    def test_different_batch_resets_the_queue(self):
+        queue = SQLiteWorkQueue(self.path)
+        queue.put((b"", b""), [pickle.dumps({"class": "z", "student": "old"})])
+        queue.finish(queue.take()[0], pickle.dumps(("graded", {"log": ("extend", ["old"])})))
+        shared = {}
+        with self.assertWarns(RuntimeWarning):
+            Students(start=Grade(), workers=0, queue=queue).run(shared)
+        self.assertEqual(shared["log"], ["ann", "bob", "cy", "ann", "bob", "cy"])
+
+    def test_runs_with_a_checkpoint(self):
+        shared = {}
+        Students(start=Grade(), workers=0).run(shared, checkpoint=SQLiteCheckpoint(self.path))
+        self.assertEqual(shared["outcomes"], ["graded"] * 6)
+        self.assertEqual(shared["results"]["a"], {"ann": 3, "bob": 3, "cy": 2})
+
+    def test_temporary_queue_is_removed(self):
+        queue = SQLiteWorkQueue()
+        path = queue.path
+        queue.close()
+        self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import os
+import pickle
+import tempfile
+import time
+import threading
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, BatchNode, AsyncNode, ExecCache, ProcessPoolBatchNode
+
+calls = []
+fail = {}
+
+class EmbedNode(Node):
+    def prep(self, shared_storage):
+        return shared_storage['text']
+    def exec(self, text):
+        calls.append(text)
+        return text.upper()
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['result'] = exec_result
+
+class EmbedAllNode(BatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+    def exec(self, text):
+        if text == fail.get('at'):
+            raise RuntimeError("provider down")
+        calls.append(text)
+        return text.upper()
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class PooledUpper(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+    def exec(self, text):
+        return text.upper()
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class TestExecCache(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        fail.clear()
+
+    def test_hit_and_miss_counters(self):
+        cache = ExecCache()
+        node = EmbedNode(cache=cache)
+        for text in ['a', 'b', 'a']:
+            shared_storage = {'text': text}
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['result'], text.upper())
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_key_includes_node_class_and_version(self):
+        class OtherEmbedNode(EmbedNode):
+            pass
+        cache = ExecCache()
+        EmbedNode(cache=cache).run({'text': 'a'})
+        OtherEmbedNode(cache=cache).run({'text': 'a'})
+        bumped = EmbedNode(cache=cache)
+        bumped.version = 2
+        bumped.run({'text': 'a'})
+        self.assertEqual(calls, ['a', 'a', 'a'])
+
+    def test_fallback_results_are_not_cached(self):
+        class FailingNode(EmbedNode):
+            def exec(self, text):
+                calls.append(text)
+                raise ValueError("boom")
+            def exec_fallback(self, text, exc):
+                return "fallback"
+        node = FailingNode(cache=ExecCache())
+        node.run({'text': 'a'})
+        node.run({'text': 'a'})
+        self.assertEqual(calls, ['a', 'a'])
+
+    def test_ttl_expiry(self):
+        node = EmbedNode(cache=ExecCache(ttl=0.05))
+        node.run({'text': 'a'})
+        node.run({'text': 'a'})
+        time.sleep(0.06)
+        node.run({'text': 'a'})
+        self.assertEqual(calls, ['a', 'a'])
+
+    def test_lru_eviction(self):
+        node = EmbedNode(cache=ExecCache(maxsize=2))
+        for text in ['a', 'b', 'c', 'a']:
+            node.run({'text': text})
+        self.assertEqual(calls, ['a', 'b', 'c', 'a'])
+
+    def test_unpicklable_prep_res_skips_cache(self):
+        class LockNode(Node):
+            def prep(self, shared_storage):
+                return shared_storage['lock']
+            def exec(self, lock):
+                calls.append('exec')
+        cache = ExecCache()
+        node = LockNode(cache=cache)
+        shared_storage = {'lock': threading.Lock()}
+        node.run(shared_storage)
+        node.run(shared_storage)
+        self.assertEqual(calls, ['exec', 'exec'])
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_disk_store_survives_new_cache(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        EmbedNode(cache=ExecCache(path=path)).run({'text': 'a'})
+        cache = ExecCache(path=path)
+        shared_storage = {'text': 'a'}
+        EmbedNode(cache=cache).run(shared_storage)
+        self.assertEqual(shared_storage['result'], 'A')
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(cache.hits, 1)
+
+    def test_partially_completed_batch_resumes_for_free(self):
+        cache = ExecCache()
+        node = EmbedAllNode(cache=cache)
+        fail['at'] = 'c'
+        with self.assertRaises(RuntimeError):
+            node.run({'texts': ['a', 'b', 'c', 'd']})
+        fail.clear()
+        shared_storage = {'texts': ['a', 'b', 'c', 'd']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['A', 'B', 'C', 'D'])
+        self.assertEqual(calls, ['a', 'b', 'c', 'd'])
+
+    def test_cache_is_picklable_for_process_pools(self):
+        cache = pickle.loads(pickle.dumps(ExecCache(maxsize=5, ttl=10)))
+        self.assertEqual((cache.maxsize, cache.ttl, len(cache.lru)), (5, 10, 0))
+        shared_storage = {'texts': ['a', 'b']}
+        PooledUpper(cache=ExecCache(), max_workers=1).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['A', 'B'])
+
+    def test_async_node(self):
+        class AsyncEmbedNode(AsyncNode):
+            async def prep_async(self, shared_storage):
+                return shared_storage['text']
+            async def exec_async(self, text):
+                calls.append(text)
+                return text.upper()
+        cache = ExecCache()
+        node = AsyncEmbedNode(cache=cache)
+        asyncio.run(node.run_async({'text': 'a'}))
+        asyncio.run(node.run_async({'text': 'a'}))
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(cache.hits, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, ParallelFlow
+
+class Step(Node):
+    def __init__(self, name, action=None):
+        super().__init__()
+        self.name, self.action = name, action
+    def post(self, shared, prep_res, exec_res):
+        shared['steps'] = shared.get('steps', 0) + 1
+        return self.action
+
+class AsyncStep(AsyncNode):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+    async def post_async(self, shared, prep_res, exec_res):
+        shared['steps'] = shared.get('steps', 0) + 1
+
+class Boom(Node):
+    name = 'boom'
+    def exec(self, prep_res):
+        raise ValueError("boom")
+
+class RecordingFlow(Flow):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.log = []
+    def on_node_start(self, node, shared):
+        self.log.append(('start', node.name))
+    def on_node_end(self, node, shared, action):
+        self.log.append(('end', node.name, action))
+    def on_error(self, node, shared, exc):
+        self.log.append(('error', type(node).__name__, str(exc)))
+    def on_transition(self, node, action, nxt):
+        self.log.append(('transition', node.name, action, nxt.name))
+
+def branching():
+    a, b, c = Step('a', 'go'), Step('b'), Step('c')
+    a - 'go' >> b >> c
+    return a
+
+EXPECTED = [
+    ('start', 'a'), ('end', 'a', 'go'), ('transition', 'a', 'go', 'b'),
+    ('start', 'b'), ('end', 'b', None), ('transition', 'b', None, 'c'),
+    ('start', 'c'), ('end', 'c', None),
+]
+
+def collect(stream):
+    async def main():
+        return [e async for e in stream]
+    return asyncio.run(main())
+
+class TestHooks(unittest.TestCase):
+    def test_subclass_hooks(self):
+        flow = RecordingFlow(start=branching())
+        flow.run({})
+        self.assertEqual(flow.log, EXPECTED)
+
+    def test_compiled_flow_calls_hooks(self):
+        flow = RecordingFlow(start=branching()).compile()
+        flow.run({})
+        self.assertEqual(flow.log, EXPECTED)
+
+    def test_instance_hooks(self):
+        ended = []
+        flow = Flow(start=branching())
+        flow.on_node_end = lambda node, shared, action: ended.append(node.name)
+        flow.run({})
+        self.assertEqual(ended, ['a', 'b', 'c'])
+
+    def test_on_error_then_reraise(self):
+        a = Step('a')
+        a >> Boom()
+        flow = RecordingFlow(start=a)
+        with self.assertRaises(ValueError):
+            flow.run({})
+        self.assertEqual(flow.log[-1], ('error', 'Boom', 'boom'))
+
+    def test_async_hooks_are_awaited(self):
+        log = []
+        class Hooked(AsyncFlow):
+            async def on_node_end(self, node, shared, action):
+                await asyncio.sleep(0)
+                log.append(node.name)
+        a, b = AsyncStep('a'), Step('b')
+        a >> b
+        asyncio.run(Hooked(start=a).run_async({}))
+        self.assertEqual(log, ['a', 'b'])
+
+class TestRunStream(unittest.TestCase):
+    def test_async_stream_includes_nested_flows(self):
+        inner = AsyncFlow(start=AsyncStep('inner'))
+        outer_start = AsyncStep('first')
+        outer_start >> inner
+        events = collect(AsyncFlow(start=outer_start).run_stream({}))
+        self.assertEqual(
+            [(e['type'], e['flow'], e['node']) for e in events[:-1]],
+            [('node_start', 'AsyncFlow', 'AsyncStep'), ('node_end', 'AsyncFlow', 'AsyncStep'),
+             ('transition', 'AsyncFlow', 'AsyncStep'),
+             ('node_start', 'AsyncFlow', 'AsyncFlow'),
+             ('node_start', 'AsyncFlow', 'AsyncStep'), ('node_end', 'AsyncFlow', 'AsyncStep'),
+             ('node_end', 'AsyncFlow', 'AsyncFlow')])
+        self.assertEqual(events[2]['next'], 'AsyncFlow')
+        self.assertEqual(events[-1]['type'], 'done')
+        self.assertTrue(all(a['ts'] <= b['ts'] for a, b in zip(events, events[1:])))
+
+    def test_sync_flow_stream(self):
+        shared = {}
+        events = collect(RecordingFlow(start=branching()).run_stream(shared))
+        self.assertEqual([e['type'] for e in events].count('node_end'), 3)
+        self.assertEqual(events[-1]['type'], 'done')
+        self.assertEqual(shared['steps'], 3)
+
+    def test_parallel_branch_events_reach_the_stream(self):
+        start = Step('start')
+        start >> ParallelFlow(Step('x'), Step('y'))
+        events = collect(Flow(start=start).run_stream({}))
+        self.assertEqual([e['node'] for e in events if e['type'] == 'node_end'].count('Step'), 3)
+
+    def test_error_is_streamed_then_raised(self):
+        a = AsyncStep('a')
+        a >> Boom()
+        seen = []
+        async def main():
+            async for e in AsyncFlow(start=a).run_stream({}):
+                seen.append(e['type'])
+        with self.assertRaises(ValueError):
+            asyncio.run(main())
+        self.assertEqual(seen[-1], 'error')
+
+    def test_slow_consumer_applies_backpressure(self):
+        nodes = [AsyncStep(str(i)) for i in range(30)]
+        for x, y in zip(nodes, nodes[1:]):
+            x >> y
+        shared = {}
+        async def main():
+            stream = AsyncFlow(start=nodes[0]).run_stream(shared, maxsize=3)
+            await stream.__anext__()
+            await asyncio.sleep(0.05)
+            progress = shared.get('steps', 0)
+            rest = [e async for e in stream]
+            return progress, rest
+        progress, rest = asyncio.run(main())
+        self.assertLessEqual(progress, 3)  # the run waited for the consumer
+        self.assertEqual(shared['steps'], 30)
+        self.assertEqual(rest[-1]['dropped'], 0)
+
+    def test_sync_nodes_in_async_flow_drop_oldest(self):
+        steps = [Step(str(i)) for i in range(20)]
+        for x, y in zip(steps, steps[1:]):
+            x >> y
+        async def main():
+            stream = AsyncFlow(start=Flow(start=steps[0])).run_stream({}, maxsize=5)
+            return [e async for e in stream]
+        events = asyncio.run(main())
+        self.assertGreater(events[-1]['dropped'], 0)
+        self.assertEqual(events[-2]['type'], 'node_end')
+
+    def test_closing_the_stream_cancels_the_run(self):
+        class Slow(AsyncNode):
+            async def exec_async(self, prep_res):
+                await asyncio.sleep(0.01)
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['steps'] = shared.get('steps', 0) + 1
+                return 'again'
+        slow = Slow()
+        slow - 'again' >> slow
+        shared = {}
+        async def main():
+            stream = AsyncFlow(start=slow).run_stream(shared)
+            async for e in stream:
+                if e['type'] == 'node_end':
+                    break
+            await stream.aclose()
+            done = shared['steps']
+            await asyncio.sleep(0.05)
+            return done
+        done = asyncio.run(main())
+        self.assertEqual(shared['steps'], done)
+
+    def test_closing_the_stream_stops_a_sync_run(self):
+        class Slow(Step):
+            def exec(self, prep_res):
+                time.sleep(0.01)
+        steps = [Slow(str(i)) for i in range(10)]
+        for x, y in zip(steps, steps[1:]):
+            x >> y
+        shared = {}
+        async def main():
+            stream = Flow(start=steps[0]).run_stream(shared)
+            async for e in stream:
+                if e['type'] == 'node_end':
+                    break
+            await stream.aclose()
+            await asyncio.sleep(0.2)  # the loop keeps running; the worker thread must stop on its own
+            return shared['steps']
+        self.assertLessEqual(asyncio.run(main()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
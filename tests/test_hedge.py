@@ -0,0 +1,121 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncParallelBatchNode, Hedge
+
+class ScriptedNode(AsyncNode):
+    """Attempt n sleeps abs(delays[n]) seconds, then returns n (or raises if the delay is negative)."""
+    def __init__(self, delays, **kwargs):
+        super().__init__(**kwargs)
+        self.delays, self.started, self.cancelled = list(delays), 0, 0
+    async def exec_async(self, prep_res):
+        n = self.started
+        self.started += 1
+        delay = self.delays[n] if n < len(self.delays) else 0
+        try:
+            await asyncio.sleep(abs(delay))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if delay < 0:
+            raise ValueError(n)
+        return n
+    async def post_async(self, shared, prep_res, exec_res):
+        shared['winner'] = exec_res
+
+class TestHedge(unittest.TestCase):
+    def test_slow_attempt_is_hedged_and_loser_cancelled(self):
+        hedge = Hedge(delay=0.02)
+        node = ScriptedNode([1, 0.01], hedge=hedge)
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(node.run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(shared['winner'], 1)
+        self.assertEqual((hedge.calls, hedge.fired, hedge.won), (1, 1, 1))
+        self.assertEqual(node.cancelled, 1)
+
+    def test_fast_attempt_does_not_hedge(self):
+        hedge = Hedge(delay=0.1)
+        node = ScriptedNode([0.01], hedge=hedge)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], 0)
+        self.assertEqual((hedge.calls, hedge.fired, hedge.won), (1, 0, 0))
+        self.assertEqual(node.started, 1)
+
+    def test_original_can_still_win_after_hedge_fires(self):
+        hedge = Hedge(delay=0.02)
+        node = ScriptedNode([0.04, 1], hedge=hedge)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], 0)
+        self.assertEqual((hedge.fired, hedge.won), (1, 0))
+        self.assertEqual(node.cancelled, 1)
+
+    def test_failed_hedge_waits_for_the_original(self):
+        node = ScriptedNode([0.05, -0.001], hedge=Hedge(delay=0.01))
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], 0)
+
+    def test_both_failing_counts_as_one_failed_attempt(self):
+        class Fallback(ScriptedNode):
+            async def exec_fallback_async(self, prep_res, exc):
+                return "fallback"
+        node = Fallback([-0.03, -0.001, 0.0], hedge=Hedge(delay=0.01), max_retries=2)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], 2)  # both hedged attempts failed, the retry succeeded
+
+        node = Fallback([-0.03, -0.001], hedge=Hedge(delay=0.01))
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], "fallback")
+
+    def test_threshold_is_learned_from_recent_latencies(self):
+        hedge = Hedge(percentile=90, window=10, min_samples=5)
+        self.assertIsNone(hedge.threshold())  # no fixed delay and too few samples: never hedge
+        hedge.samples.extend([0.01] * 8 + [0.5] * 2)
+        self.assertEqual(hedge.threshold(), 0.5)
+        hedge.samples.extend([0.01] * 9)  # the window keeps the last 10 samples: one slow one is left
+        self.assertEqual(hedge.threshold(), 0.01)
+
+    def test_timeout_cancels_both_attempts(self):
+        class Fallback(ScriptedNode):
+            async def exec_fallback_async(self, prep_res, exc):
+                return "timeout"
+        node = Fallback([1, 1], hedge=Hedge(delay=0.01), timeout=0.05)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['winner'], "timeout")
+        self.assertEqual(node.cancelled, 2)
+
+    def test_hedge_is_shared_by_parallel_batch_items(self):
+        delays = {0: 0.01, 1: 0.01, 2: 0.3, 3: 0.01}
+        seen = {}
+
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return list(delays)
+            async def exec_async(self, item):
+                seen[item] = seen.get(item, 0) + 1
+                await asyncio.sleep(delays[item] if seen[item] == 1 else 0.01)
+                return item
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['results'] = exec_res
+
+        hedge = Hedge(delay=0.05)
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(Items(hedge=hedge).run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual(shared['results'], [0, 1, 2, 3])
+        self.assertEqual((hedge.calls, hedge.fired, hedge.won), (4, 1, 1))
+        self.assertEqual(len(hedge.samples), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, ParallelFlow, AsyncParallelFlow
+
+class SlowToolNode(Node):
+    """Simulates a blocking tool call, records its result and returns an action."""
+    def __init__(self, name, delay=0.1):
+        super().__init__()
+        self.name, self.delay = name, delay
+    def exec(self, _):
+        time.sleep(self.delay)
+        return self.name.upper()
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', {})[self.name] = exec_result
+        return f"{self.name}_done"
+
+class AsyncSlowToolNode(AsyncNode):
+    def __init__(self, name, delay=0.1):
+        super().__init__()
+        self.name, self.delay = name, delay
+    async def exec_async(self, _):
+        await asyncio.sleep(self.delay)
+        return self.name.upper()
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', {})[self.name] = exec_result
+        return f"{self.name}_done"
+
+class JoinNode(Node):
+    def prep(self, shared_storage):
+        shared_storage['joined'] = sorted(shared_storage['results'].values())
+
+class ParamNode(Node):
+    def prep(self, shared_storage):
+        shared_storage.setdefault('seen', []).append(self.params['query'])
+
+class TestParallelFlow(unittest.TestCase):
+    def test_rshift_list_fans_out_and_joins(self):
+        start = Node()
+        start >> [SlowToolNode('a'), SlowToolNode('b'), SlowToolNode('c')] >> JoinNode()
+        shared_storage = {}
+        t0 = time.perf_counter()
+        Flow(start=start).run(shared_storage)
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(shared_storage['joined'], ['A', 'B', 'C'])
+        self.assertLess(elapsed, 0.25)  # slowest branch, not the sum (0.3s)
+
+    def test_join_receives_branch_actions(self):
+        class Vote(ParallelFlow):
+            def post(self, shared_storage, prep_result, actions):
+                shared_storage['actions'] = actions
+                return "all_done"
+        fork = Vote(SlowToolNode('a', 0.01), SlowToolNode('b', 0.02))
+        end = Node()
+        fork - "all_done" >> end
+        shared_storage = {}
+        Flow(start=fork).run(shared_storage)
+        self.assertEqual(shared_storage['actions'], ['a_done', 'b_done'])
+
+    def test_branch_can_be_a_chain(self):
+        first = SlowToolNode('x', 0.01)
+        first - "x_done" >> SlowToolNode('y', 0.01)
+        fork = ParallelFlow(first, SlowToolNode('z', 0.01))
+        shared_storage = {}
+        Flow(start=fork).run(shared_storage)
+        self.assertEqual(shared_storage['results'], {'x': 'X', 'y': 'Y', 'z': 'Z'})
+
+    def test_params_reach_branches(self):
+        fork = ParallelFlow(ParamNode(), ParamNode())
+        flow = Flow(start=fork)
+        flow.set_params({'query': 'q'})
+        shared_storage = {}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['seen'], ['q', 'q'])
+
+    def test_compiled(self):
+        start = Node()
+        start >> [SlowToolNode('a', 0.01), SlowToolNode('b', 0.01)] >> JoinNode()
+        shared_storage = {}
+        Flow(start=start).compile().run(shared_storage)
+        self.assertEqual(shared_storage['joined'], ['A', 'B'])
+
+class TestAsyncParallelFlow(unittest.TestCase):
+    def test_rshift_list_with_async_nodes(self):
+        start = Node()
+        fork = start >> [AsyncSlowToolNode('a'), AsyncSlowToolNode('b'), SlowToolNode('c', 0.01)]
+        self.assertIsInstance(fork, AsyncParallelFlow)
+        fork >> JoinNode()
+        shared_storage = {}
+        t0 = time.perf_counter()
+        asyncio.run(AsyncFlow(start=start).run_async(shared_storage))
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(shared_storage['joined'], ['A', 'B', 'C'])
+        self.assertLess(elapsed, 0.2)
+
+    def test_join_receives_branch_actions(self):
+        class Gather(AsyncParallelFlow):
+            async def post_async(self, shared_storage, prep_result, actions):
+                shared_storage['actions'] = actions
+        shared_storage = {}
+        asyncio.run(Gather(AsyncSlowToolNode('a', 0.02), AsyncSlowToolNode('b', 0.01)).run_async(shared_storage))
+        self.assertEqual(shared_storage['actions'], ['a_done', 'b_done'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, ProcessPoolBatchNode, Flow, Backoff, RetryBudget
+
+# Nodes live at module level so worker processes can unpickle them.
+class SquareNode(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        return number * number, os.getpid()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = [square for square, _ in exec_result]
+        shared_storage['pids'] = {pid for _, pid in exec_result}
+
+class FlakyNode(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        # cur_retry is tracked per item inside the worker
+        if number % 3 == 0 and self.cur_retry == 0:
+            raise ValueError("first attempt fails")
+        if number == 4:
+            raise ValueError("always fails")
+        return number
+
+    def exec_fallback(self, number, exc):
+        return -number
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class ParamNode(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return range(3)
+
+    def exec(self, item):
+        return self.params['offset'] + item
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class TestProcessPoolBatchNode(unittest.TestCase):
+    def test_results_in_input_order(self):
+        shared_storage = {'numbers': list(range(20))}
+        SquareNode(max_workers=2, chunksize=3).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [n * n for n in range(20)])
+        self.assertNotIn(os.getpid(), shared_storage['pids'])
+
+    def test_retries_and_fallback_per_item(self):
+        shared_storage = {'numbers': list(range(7))}
+        FlakyNode(max_retries=2, max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['results'], [0, 1, 2, 3, -4, 5, 6])
+
+    def test_empty_input(self):
+        shared_storage = {'numbers': []}
+        SquareNode().run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [])
+
+    def test_in_flow_with_successors_and_params(self):
+        """The node is pickled without its successors; params travel with it."""
+        node = ParamNode(max_workers=2)
+        node >> Node()
+        flow = Flow(start=node)
+        flow.set_params({'offset': 10})
+        shared_storage = {}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['results'], [10, 11, 12])
+
+    def test_retry_budget_is_copied_to_workers(self):
+        budget = RetryBudget(5)
+        budget.take()
+        node = FlakyNode(max_retries=2, max_workers=1, wait=Backoff(base=0, budget=budget))
+        shared_storage = {'numbers': [1, 3, 6]}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], [1, 3, 6])
+        self.assertEqual(budget.tokens, 4)  # the workers spent their own copy
+
+if __name__ == '__main__':
+    unittest.main()
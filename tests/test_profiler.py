@@ -0,0 +1,112 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import pocketflow
+from pocketflow import Node, BatchNode, ThreadedBatchNode, AsyncNode, Flow, AsyncFlow, Profiler
+
+class SlowExecNode(Node):
+    def exec(self, _):
+        time.sleep(0.02)
+
+class FlakyNode(Node):
+    def exec(self, _):
+        if self.cur_retry < 2:
+            raise ValueError("flaky")
+    def exec_fallback(self, prep_res, exc):
+        return None
+
+class AlwaysFailsNode(Node):
+    def exec(self, _):
+        raise ValueError("down")
+    def exec_fallback(self, prep_res, exc):
+        return "fallback"
+
+class SquareAll(BatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+    def exec(self, n):
+        return n * n
+
+class AsyncSleepNode(AsyncNode):
+    async def exec_async(self, _):
+        await asyncio.sleep(0.01)
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertIsNone(pocketflow._profiler.get())
+        Flow(start=SlowExecNode()).run({})
+        self.assertIsNone(pocketflow._profiler.get())
+
+    def test_records_phases_retries_fallbacks_and_items(self):
+        slow, flaky, failing, batch = SlowExecNode(), FlakyNode(max_retries=3), AlwaysFailsNode(max_retries=2), SquareAll()
+        slow >> flaky >> failing >> batch
+        with Profiler() as prof:
+            Flow(start=slow).run({'numbers': [1, 2, 3]})
+        self.assertIsNone(pocketflow._profiler.get())
+
+        self.assertEqual(prof.stats['SlowExecNode']['calls'], 1)
+        self.assertGreaterEqual(prof.stats['SlowExecNode']['exec'], 0.02)
+        self.assertEqual(prof.stats['FlakyNode']['retries'], 2)
+        self.assertEqual(prof.stats['FlakyNode']['fallbacks'], 0)
+        self.assertEqual(prof.stats['AlwaysFailsNode']['retries'], 1)
+        self.assertEqual(prof.stats['AlwaysFailsNode']['fallbacks'], 1)
+        self.assertEqual(prof.stats['SquareAll']['items'], 3)
+
+        summary = prof.summary().splitlines()
+        self.assertIn('SlowExecNode', summary[1])  # slowest node first
+        self.assertEqual(len(summary), 5)
+
+    def test_chrome_trace_export(self):
+        with Profiler() as prof:
+            asyncio.run(AsyncFlow(start=AsyncSleepNode()).run_async({}))
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        prof.save_trace(path)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        self.assertEqual([e['name'] for e in events], ['AsyncSleepNode.prep', 'AsyncSleepNode.exec', 'AsyncSleepNode.post'])
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in events))
+        self.assertGreaterEqual(events[1]['dur'], 10_000)  # microseconds
+
+    def test_nested_profilers_restore_previous(self):
+        with Profiler() as outer:
+            with Profiler() as inner:
+                SlowExecNode().run({})
+            SlowExecNode().run({})
+        self.assertEqual(inner.stats['SlowExecNode']['calls'], 1)
+        self.assertEqual(outer.stats['SlowExecNode']['calls'], 1)
+
+    def test_overlapping_profilers_in_tasks(self):
+        async def profiled(n):
+            with Profiler() as prof:
+                for _ in range(n):
+                    await AsyncSleepNode().run_async({})
+            return prof
+        async def main():
+            return await asyncio.gather(profiled(3), profiled(1))
+        long, short = asyncio.run(main())
+        self.assertEqual(long.stats['AsyncSleepNode']['calls'], 3)
+        self.assertEqual(short.stats['AsyncSleepNode']['calls'], 1)
+        self.assertIsNone(pocketflow._profiler.get())
+
+    def test_threaded_batch_workers_report_retries(self):
+        class Flaky(ThreadedBatchNode):
+            def prep(self, shared):
+                return [1, 2, 3]
+            def exec(self, item):
+                if self.cur_retry == 0:
+                    raise ValueError("flaky")
+        with Profiler() as prof:
+            Flaky(max_retries=2, max_workers=3).run({})
+        self.assertEqual(prof.stats['Flaky']['retries'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+import asyncio
+import random
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, AsyncParallelBatchNode, Flow, Backoff, RetryBudget
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+class FailingNode(Node):
+    def __init__(self, exc, fail_times=99, **kwargs):
+        super().__init__(**kwargs)
+        self.exc, self.fail_times, self.attempts = exc, fail_times, 0
+    def exec(self, prep_res):
+        self.attempts += 1
+        if self.attempts <= self.fail_times:
+            raise self.exc
+        return "ok"
+    def exec_fallback(self, prep_res, exc):
+        return "fallback"
+
+class TestBackoff(unittest.TestCase):
+    def test_exponential_delays_are_capped(self):
+        policy = Backoff(base=1, factor=2, max_delay=5, jitter=False)
+        self.assertEqual([policy.delay(a, ValueError()) for a in range(5)], [1, 2, 4, 5, 5])
+
+    def test_full_jitter_stays_below_the_exponential_delay(self):
+        random.seed(0)
+        policy = Backoff(base=1, factor=2, max_delay=100)
+        delays = [policy.delay(3, ValueError()) for _ in range(200)]
+        self.assertTrue(all(0 <= d <= 8 for d in delays))
+        self.assertGreater(len(set(delays)), 100)
+
+    def test_retry_on_exception_types_and_predicates(self):
+        by_type = FailingNode(KeyError("x"), max_retries=3, wait=Backoff(base=0, retry_on=(ValueError,)))
+        self.assertEqual(by_type.run({}), None)
+        self.assertEqual(by_type.attempts, 1)
+
+        policy = Backoff(base=0, retry_on=lambda e: "transient" in str(e))
+        transient = FailingNode(ValueError("transient"), fail_times=2, max_retries=3, wait=policy)
+        transient.run({})
+        self.assertEqual(transient.attempts, 3)
+
+    def test_retry_after_hint_overrides_backoff(self):
+        node = FailingNode(RateLimited(0.05), fail_times=1, max_retries=2, wait=Backoff(base=10))
+        start = time.perf_counter()
+        node.run({})
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(node.attempts, 2)
+
+    def test_plain_wait_still_works(self):
+        node = FailingNode(ValueError(), fail_times=1, max_retries=2, wait=0.01)
+        node.run({})
+        self.assertEqual(node.attempts, 2)
+
+class TestRetryBudget(unittest.TestCase):
+    def test_budget_is_shared_across_nodes_in_a_flow(self):
+        budget = RetryBudget(3)
+        policy = Backoff(base=0, budget=budget)
+        nodes = [FailingNode(ValueError(), max_retries=5, wait=policy) for _ in range(3)]
+        nodes[0] >> nodes[1] >> nodes[2]
+        Flow(start=nodes[0]).run({})
+        # Flow runs copies; the budget is what bounds the total number of retries
+        self.assertEqual(budget.tokens, 0)
+        self.assertFalse(budget.take())
+
+    def test_budget_caps_total_attempts(self):
+        budget = RetryBudget(2)
+        policy = Backoff(base=0, budget=budget)
+        attempts = []
+        for _ in range(3):
+            node = FailingNode(ValueError(), max_retries=5, wait=policy)
+            node.run({})
+            attempts.append(node.attempts)
+        self.assertEqual(attempts, [3, 1, 1])
+
+    def test_budget_refills_over_time(self):
+        budget = RetryBudget(2, per=0.1)
+        self.assertTrue(budget.take())
+        self.assertTrue(budget.take())
+        self.assertFalse(budget.take())
+        time.sleep(0.06)
+        self.assertTrue(budget.take())
+
+class TestAsyncRetries(unittest.TestCase):
+    def test_async_node_uses_policy(self):
+        class FlakyAsync(AsyncNode):
+            attempts = 0
+            async def exec_async(self, prep_res):
+                self.attempts += 1
+                if self.attempts < 3:
+                    raise RateLimited(0.01)
+                return "ok"
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['result'] = exec_res
+        shared = {}
+        node = FlakyAsync(max_retries=3, wait=Backoff(base=10))
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['result'], "ok")
+
+    def test_backing_off_items_release_their_concurrency_slot(self):
+        order = []
+        attempts = {}
+
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return list(range(6))
+            async def exec_async(self, item):
+                attempts[item] = attempts.get(item, 0) + 1
+                if item == 0 and attempts[item] == 1:
+                    raise RateLimited(0.3)
+                await asyncio.sleep(0.02)
+                order.append(item)
+                return item
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['results'] = exec_res
+
+        shared = {}
+        node = Items(max_retries=2, wait=Backoff(), max_concurrency=1)
+        asyncio.run(node.run_async(shared))
+
+        self.assertEqual(shared['results'], list(range(6)))
+        # the others (0.1s in total) ran while item 0 backed off for 0.3s; holding the only slot would finish 0 first
+        self.assertEqual(order, [1, 2, 3, 4, 5, 0])
+
+    def test_retrying_items_respect_max_concurrency(self):
+        in_flight = {'now': 0, 'peak': 0}
+        attempts = {}
+
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return list(range(10))
+            async def exec_async(self, item):
+                attempts[item] = attempts.get(item, 0) + 1
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+                await asyncio.sleep(0.01)
+                in_flight['now'] -= 1
+                if attempts[item] < 3:
+                    raise ValueError(item)
+                return item
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['results'] = exec_res
+
+        shared = {}
+        node = Items(max_retries=3, wait=Backoff(base=0.005, max_delay=0.02), max_concurrency=3)
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['results'], list(range(10)))
+        self.assertEqual(in_flight['peak'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
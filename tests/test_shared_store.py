@@ -0,0 +1,169 @@
+import unittest
+import asyncio
+import copy
+import pickle
+import threading
+import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchFlow, SharedStore, _View
+
+class TestSharedStore(unittest.TestCase):
+    def test_is_a_dict(self):
+        shared = SharedStore({'a': 1}, b=2)
+        self.assertIsInstance(shared, dict)
+        self.assertEqual(shared, {'a': 1, 'b': 2})
+        self.assertEqual(shared.setdefault('c', []), [])
+        restored = pickle.loads(pickle.dumps(shared))
+        self.assertIsInstance(restored, SharedStore)
+        self.assertEqual(restored, shared)
+        self.assertEqual(copy.copy(shared), shared)
+
+    def test_update_helpers(self):
+        shared = SharedStore()
+        shared.append('results', 1)
+        shared.append('results', 2)
+        self.assertEqual(shared.incr('count'), 1)
+        self.assertEqual(shared.incr('count', 5), 6)
+        shared.merge('scores', {'a': 1})
+        shared.merge('scores', {'b': 2})
+        self.assertEqual(shared, {'results': [1, 2], 'count': 6, 'scores': {'a': 1, 'b': 2}})
+
+    def test_helpers_are_thread_safe(self):
+        shared = SharedStore()
+        def work():
+            for _ in range(2000):
+                shared.incr('n')
+                shared.append('items', 1)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(shared['n'], 16000)
+        self.assertEqual(len(shared['items']), 16000)
+
+    def test_per_key_locks_serialize_read_modify_write(self):
+        shared = SharedStore(total=0, other=0)
+        self.assertIs(shared.lock('total'), shared.lock('total'))
+        self.assertIsNot(shared.lock('total'), shared.lock('other'))
+
+        async def add(key):
+            async with shared.lock(key):
+                value = shared[key]
+                await asyncio.sleep(0)
+                shared[key] = value + 1
+
+        async def main():
+            await asyncio.gather(*(add(k) for k in ['total', 'other'] * 50))
+        asyncio.run(main())
+        self.assertEqual(shared, {'total': 50, 'other': 50})
+
+class TestView(unittest.TestCase):
+    def test_writes_are_isolated_until_commit(self):
+        shared = SharedStore(a=1, b=2, results=[0])
+        view = shared.view()
+        view['a'] = 10
+        del view['b']
+        view['c'] = 3
+        view.append('results', 1)
+        self.assertEqual(dict(view), {'a': 10, 'c': 3, 'results': [0, 1]})
+        self.assertNotIn('b', view)
+        self.assertEqual(shared, {'a': 1, 'b': 2, 'results': [0]})
+        view.commit()
+        self.assertEqual(shared, {'a': 10, 'c': 3, 'results': [0, 1]})
+
+    def test_helpers_replay_on_the_base(self):
+        shared = SharedStore(results=[], count=0)
+        first, second = shared.view(), shared.view()
+        first.append('results', 'a')
+        second.append('results', 'b')
+        first.incr('count')
+        second.incr('count', 2)
+        first.commit()
+        second.commit()
+        self.assertEqual(shared, {'results': ['a', 'b'], 'count': 3})
+
+    def test_assignment_replaces_earlier_helper_calls(self):
+        shared = SharedStore(results=['old'])
+        view = shared.view()
+        view.append('results', 'x')
+        view['results'] = ['new']
+        view.append('results', 'y')
+        view.commit()
+        self.assertEqual(shared['results'], ['new', 'y'])
+
+    def test_keys_are_listed_once_after_helpers(self):
+        view = SharedStore(a=[1], n=1).view()
+        view.append('a', 2)
+        view.incr('n')
+        view['new'] = 0
+        self.assertEqual(list(view), ['a', 'n', 'new'])
+        self.assertEqual(len(view), 3)
+        self.assertEqual(dict(view), {'a': [1, 2], 'n': 2, 'new': 0})
+
+    def test_view_of_plain_dict(self):
+        shared = {'log': []}
+        view = _View(shared)
+        view.append('log', 1)
+        view.incr('n')
+        view.commit()
+        self.assertEqual(shared, {'log': [1], 'n': 1})
+
+class Record(AsyncNode):
+    async def prep_async(self, shared):
+        return self.params['i'], shared.get('last')
+    async def exec_async(self, prep_res):
+        i, last = prep_res
+        await asyncio.sleep(0.01 * (5 - i))  # later items finish first
+        return i, last
+    async def post_async(self, shared, prep_res, exec_res):
+        i, last = exec_res
+        shared['last'] = i
+        shared.append('order', i)
+        shared.incr('done')
+        shared.merge('seen', {i: last})
+
+class Items(AsyncParallelBatchFlow):
+    async def prep_async(self, shared):
+        return [{'i': i} for i in range(5)]
+
+class TestIsolatedParallelBatchFlow(unittest.TestCase):
+    def test_branches_merge_in_input_order(self):
+        shared = SharedStore(last=None)
+        with self.assertWarnsRegex(RuntimeWarning, "'last'"):  # every branch assigned it
+            asyncio.run(Items(start=AsyncFlow(start=Record()), isolate=True).run_async(shared))
+        self.assertEqual(shared['order'], [0, 1, 2, 3, 4])
+        self.assertEqual(shared['last'], 4)
+        self.assertEqual(shared['done'], 5)
+        self.assertEqual(shared['seen'], {i: None for i in range(5)})  # no branch saw another's write
+
+    def test_conflicting_assignments_warn(self):
+        class Count(AsyncNode):
+            async def post_async(self, shared, prep_res, exec_res):
+                shared.setdefault('results', []).append(self.params['i'])
+                shared['count'] = shared.get('count', 0) + 1
+        shared = {}
+        with self.assertWarnsRegex(RuntimeWarning, "'count', 'results'"):
+            asyncio.run(Items(start=Count(), isolate=True).run_async(shared))
+        self.assertEqual(shared, {'results': [4], 'count': 1})
+
+    def test_helpers_do_not_warn(self):
+        class Count(AsyncNode):
+            async def post_async(self, shared, prep_res, exec_res):
+                shared.append('results', self.params['i'])
+                shared.incr('count')
+        shared = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            asyncio.run(Items(start=Count(), isolate=True).run_async(shared))
+        self.assertEqual(shared, {'results': [0, 1, 2, 3, 4], 'count': 5})
+
+    def test_shared_store_without_isolation(self):
+        shared = SharedStore(last=None)
+        asyncio.run(Items(start=Record()).run_async(shared))
+        self.assertEqual(shared['order'], [4, 3, 2, 1, 0])  # completion order
+        self.assertEqual(shared['done'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import queue
+import threading
+import tempfile
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, SpillStore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BIG = "x" * 2000
+
+class LoadChunks(Node):
+    def prep(self, shared):
+        return shared["path"]
+    def exec(self, path):
+        return [f"chunk {i} " + BIG for i in range(20)]
+    def post(self, shared, prep_res, exec_res):
+        shared["chunks"] = exec_res
+
+class CountChunks(Node):
+    def prep(self, shared):
+        return shared["chunks"]
+    def exec(self, chunks):
+        return len(chunks)
+    def post(self, shared, prep_res, exec_res):
+        shared["count"] = exec_res
+
+class TestSpillStore(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+
+    def rows(self, store):
+        return store.db.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def test_small_values_stay_in_memory_large_ones_spill(self):
+        with SpillStore(self.path, threshold=1000) as store:
+            store["n"] = 1
+            store["name"] = "short"
+            store["chunks"] = [BIG, BIG]
+            self.assertEqual(self.rows(store), 1)
+            self.assertEqual(store["chunks"], [BIG, BIG])
+            self.assertEqual(dict(store), {"n": 1, "name": "short", "chunks": [BIG, BIG]})
+
+    def test_values_load_lazily_after_reopen(self):
+        with SpillStore(self.path, threshold=1000) as store:
+            store["n"] = 1
+            store["text"] = BIG
+        with SpillStore(self.path, threshold=1000) as store:
+            self.assertEqual(sorted(store), ["n", "text"])
+            self.assertIn("text", store)
+            self.assertEqual(store.loads, 0)  # listing keys and `in` don't load values
+            self.assertEqual(store["text"], BIG)
+            self.assertEqual(store["text"], BIG)
+            self.assertEqual(store.loads, 1)  # the second read came from the hot LRU
+
+    def test_lru_writes_back_mutated_values_on_eviction(self):
+        with SpillStore(self.path, threshold=1000, hot=1) as store:
+            store["a"] = [BIG]
+            store["b"] = [BIG]  # evicts "a"
+            store["a"].append("more")  # loads "a", evicts "b"
+            store["b"]  # evicts "a", writing the change back
+            self.assertEqual(len(store.hot), 1)
+            self.assertEqual(store.loads, 2)
+            self.assertEqual(store["a"], [BIG, "more"])
+
+    def test_overwrite_and_delete_remove_spilled_rows(self):
+        with SpillStore(self.path, threshold=1000) as store:
+            store["a"] = BIG
+            store["a"] = "small"
+            self.assertEqual(self.rows(store), 0)
+            store["b"] = BIG
+            del store["b"]
+            self.assertEqual(self.rows(store), 0)
+            self.assertNotIn("b", store)
+            with self.assertRaises(KeyError):
+                del store["b"]
+
+    def test_flush_persists_small_values_too(self):
+        store = SpillStore(self.path, threshold=1000)
+        store["n"] = 1
+        store["log"] = ["a"]
+        store.flush()
+        store["log"].append("b")
+        store.close()  # closing flushes again
+        with SpillStore(self.path) as store:
+            self.assertEqual(dict(store), {"n": 1, "log": ["a", "b"]})
+
+    def test_unpicklable_values_stay_in_memory(self):
+        store = SpillStore(self.path, threshold=10)
+        store["lock"] = threading.Lock()
+        store["queue"] = queue.Queue()
+        store["big"] = BIG
+        self.assertIsInstance(store["queue"], queue.Queue)
+        with store["lock"]:
+            store.close()  # flushing skips them
+        with SpillStore(self.path) as store:
+            self.assertEqual(sorted(store), ["big"])
+
+    def test_temporary_store_cleans_up(self):
+        store = SpillStore(threshold=10)
+        store["a"] = BIG
+        path = store.path
+        self.assertTrue(os.path.exists(path))
+        store.close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_works_with_unchanged_nodes(self):
+        load, count = LoadChunks(), CountChunks()
+        load >> count
+        with SpillStore(self.path, threshold=1000) as shared:
+            shared["path"] = "docs/"
+            Flow(start=load).run(shared)
+            self.assertEqual(shared["count"], 20)
+            self.assertEqual(self.rows(shared), 1)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_large_arrays_are_memory_mapped(self):
+        with SpillStore(self.path, threshold=1000) as store:
+            store["emb"] = np.ones((100, 8), dtype="float32")
+            emb = store["emb"]
+            self.assertIsInstance(emb, np.memmap)
+            emb[0, 0] = 5
+        with SpillStore(self.path) as store:
+            self.assertEqual(store["emb"][0, 0], 5)
+            del store["emb"]
+            self.assertFalse(any(f.endswith(".npy") for f in os.listdir(os.path.dirname(self.path)) if f.startswith(os.path.basename(self.path))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import StreamBatchNode, AsyncStreamBatchNode, Flow, AsyncFlow
+
+shared_log = []
+
+class StreamSquares(StreamBatchNode):
+    def prep(self, shared_storage):
+        # A generator: inputs are never materialized as a list
+        return (i for i in range(shared_storage['n']))
+
+    def exec(self, item):
+        shared_log.append(('exec', item))
+        return item * item
+
+    def post(self, shared_storage, prep_result, exec_result):
+        total = 0
+        for square in exec_result:
+            shared_log.append(('post', square))
+            total += square
+        shared_storage['total'] = total
+
+class AsyncStreamSquares(AsyncStreamBatchNode):
+    async def prep_async(self, shared_storage):
+        async def numbers():
+            for i in range(shared_storage['n']):
+                await asyncio.sleep(0)
+                yield i
+        return numbers() if shared_storage.get('async_source') else range(shared_storage['n'])
+
+    async def exec_async(self, item):
+        if item == 3 and self.cur_retry == 0:
+            raise ValueError("retry me")
+        return item * item
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = [square async for square in exec_result]
+
+class TestStreamBatchNode(unittest.TestCase):
+    def setUp(self):
+        shared_log.clear()
+
+    def test_results_are_produced_lazily(self):
+        shared_storage = {'n': 3}
+        Flow(start=StreamSquares()).run(shared_storage)
+        self.assertEqual(shared_storage['total'], 0 + 1 + 4)
+        # exec and post interleave: each item is consumed before the next one runs
+        self.assertEqual(shared_log, [('exec', 0), ('post', 0), ('exec', 1), ('post', 1), ('exec', 2), ('post', 4)])
+
+    def test_empty_input(self):
+        class EmptyStream(StreamBatchNode):
+            def prep(self, shared_storage): return None
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = list(exec_result)
+        shared_storage = {}
+        EmptyStream().run(shared_storage)
+        self.assertEqual(shared_storage['results'], [])
+
+class TestAsyncStreamBatchNode(unittest.TestCase):
+    def test_sync_iterable_source(self):
+        shared_storage = {'n': 5}
+        asyncio.run(AsyncFlow(start=AsyncStreamSquares(max_retries=2)).run_async(shared_storage))
+        self.assertEqual(shared_storage['squares'], [0, 1, 4, 9, 16])
+
+    def test_async_iterable_source(self):
+        shared_storage = {'n': 5, 'async_source': True}
+        asyncio.run(AsyncStreamSquares(max_retries=2).run_async(shared_storage))
+        self.assertEqual(shared_storage['squares'], [0, 1, 4, 9, 16])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncStreamNode, ChunkStream
+
+class Tokens(AsyncStreamNode):
+    def __init__(self, words, delay=0.01, fail_at=None, **kwargs):
+        super().__init__(**kwargs)
+        self.words, self.delay, self.fail_at, self.attempts = words, delay, fail_at, 0
+    async def exec_async(self, prep_res):
+        self.attempts += 1
+        for i, w in enumerate(self.words):
+            if i == self.fail_at and self.attempts == 1:
+                raise ValueError("dropped connection")
+            await asyncio.sleep(self.delay)
+            yield w
+    async def post_async(self, shared, prep_res, exec_res):
+        shared['tokens'] = exec_res
+
+class Sentences(AsyncStreamNode):
+    async def prep_async(self, shared):
+        return shared['tokens']
+    async def exec_async(self, tokens):
+        buf = []
+        async for t in tokens:
+            buf.append(t)
+            if t.endswith('.'):
+                yield ' '.join(buf)
+                buf = []
+    async def post_async(self, shared, prep_res, exec_res):
+        shared['sentences'] = exec_res
+
+class Speak(AsyncNode):
+    async def prep_async(self, shared):
+        return shared['sentences']
+    async def exec_async(self, sentences):
+        return [(time.perf_counter(), s) async for s in sentences]
+    async def post_async(self, shared, prep_res, exec_res):
+        shared['spoken'] = exec_res
+
+WORDS = "One two. Three four. Five six.".split()
+
+class TestAsyncStreamNode(unittest.TestCase):
+    def test_downstream_starts_before_generation_ends(self):
+        tokens = Tokens(WORDS)
+        tokens >> Sentences() >> Speak()
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(AsyncFlow(start=tokens).run_async(shared))
+        spoken = shared['spoken']
+        self.assertEqual([s for _, s in spoken], ["One two.", "Three four.", "Five six."])
+        self.assertLess(spoken[0][0] - start, 0.04)  # first sentence after 2 of 6 tokens
+        self.assertGreater(spoken[-1][0] - spoken[0][0], 0.03)
+
+    def test_every_consumer_sees_every_chunk(self):
+        async def main():
+            shared = {}
+            await Tokens(WORDS, delay=0).run_async(shared)
+            stream = shared['tokens']
+            first = [t async for t in stream]  # already finished: replays from the start
+            both = await asyncio.gather(stream.collect(), stream)
+            return first, both
+        first, both = asyncio.run(main())
+        self.assertEqual(first, WORDS)
+        self.assertEqual(both, [WORDS, WORDS])
+
+    def test_failure_before_first_chunk_is_retried(self):
+        node = Tokens(WORDS, fail_at=0, max_retries=2)
+        shared = {}
+        async def main():
+            await node.run_async(shared)
+            return await shared['tokens']
+        self.assertEqual(asyncio.run(main()), WORDS)
+        self.assertEqual(node.attempts, 2)
+
+    def test_failure_after_first_chunk_reaches_consumers(self):
+        node = Tokens(WORDS, fail_at=2, max_retries=3)
+        async def main():
+            shared, seen = {}, []
+            await node.run_async(shared)
+            with self.assertRaises(ValueError):
+                async for t in shared['tokens']:
+                    seen.append(t)
+            return seen
+        self.assertEqual(asyncio.run(main()), WORDS[:2])
+        self.assertEqual(node.attempts, 1)
+
+    def test_fallback_value_becomes_the_stream(self):
+        class Fallback(Tokens):
+            async def exec_fallback_async(self, prep_res, exc):
+                return "Sorry."
+        async def main():
+            shared = {}
+            await Fallback(WORDS, fail_at=0).run_async(shared)
+            return await shared['tokens']
+        self.assertEqual(asyncio.run(main()), ["Sorry."])
+
+    def test_cancelled_producer_ends_the_stream(self):
+        async def main():
+            shared = {}
+            await Tokens(WORDS, delay=10).run_async(shared)
+            stream = shared['tokens']
+            self.assertIsInstance(stream, ChunkStream)
+            stream.task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await stream
+        asyncio.run(main())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import threading
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import ThreadedBatchNode
+
+class SlowDoubleNode(ThreadedBatchNode):
+    """Simulates a blocking I/O call per item and tracks how many run at once."""
+    def __init__(self, delay=0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        # Each item runs on its own copy of the node, so counters live in a shared dict
+        self.lock = threading.Lock()
+        self.stats = {'in_flight': 0, 'peak': 0}
+
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        with self.lock:
+            self.stats['in_flight'] += 1
+            self.stats['peak'] = max(self.stats['peak'], self.stats['in_flight'])
+        time.sleep(self.delay * (2 if number % 2 else 1))
+        with self.lock:
+            self.stats['in_flight'] -= 1
+        return number * 2
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class TestThreadedBatchNode(unittest.TestCase):
+    def test_parallel_and_ordered(self):
+        shared_storage = {'numbers': list(range(8))}
+        node = SlowDoubleNode(delay=0.05, max_workers=8)
+        start = time.perf_counter()
+        node.run(shared_storage)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(shared_storage['results'], [n * 2 for n in range(8)])
+        self.assertLess(elapsed, 0.3)  # serial would take 0.6s
+
+    def test_max_in_flight(self):
+        shared_storage = {'numbers': list(range(10))}
+        node = SlowDoubleNode(delay=0.01, max_workers=8, max_in_flight=3)
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], [n * 2 for n in range(10)])
+        self.assertEqual(node.stats['peak'], 3)
+
+    def test_empty_input(self):
+        shared_storage = {'numbers': []}
+        SlowDoubleNode().run(shared_storage)
+        self.assertEqual(shared_storage['results'], [])
+
+    def test_retry_sleeps_only_its_own_worker(self):
+        attempts = {}
+
+        class FlakyNode(ThreadedBatchNode):
+            def prep(self, shared_storage):
+                return range(4)
+
+            def exec(self, item):
+                attempts.setdefault(item, []).append(self.cur_retry)
+                if item == 0 and self.cur_retry < 2:
+                    raise ValueError("flaky")
+                if item == 3:
+                    raise ValueError("broken")
+                time.sleep(0.05)
+                return item
+
+            def exec_fallback(self, item, exc):
+                return None
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        shared_storage = {}
+        start = time.perf_counter()
+        FlakyNode(max_retries=3, wait=0.1, max_workers=4).run(shared_storage)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(shared_storage['results'], [0, 1, 2, None])
+        self.assertEqual(attempts[0], [0, 1, 2])
+        self.assertEqual(attempts[3], [0, 1, 2])
+        # Items 1 and 2 are not held up by the 2 x 0.1s back-off of items 0 and 3
+        self.assertLess(elapsed, 0.35)
+
+if __name__ == '__main__':
+    unittest.main()
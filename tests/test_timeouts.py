@@ -0,0 +1,125 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import pocketflow
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow, Backoff
+
+class HangingNode(AsyncNode):
+    """Hangs on the first `hangs` attempts, then returns 'ok'."""
+    def __init__(self, hangs=99, **kwargs):
+        super().__init__(**kwargs)
+        self.hangs, self.attempts, self.cancelled = hangs, 0, 0
+    async def exec_async(self, prep_res):
+        self.attempts += 1
+        if self.attempts <= self.hangs:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return "ok"
+    async def exec_fallback_async(self, prep_res, exc):
+        return type(exc).__name__
+    async def post_async(self, shared, prep_res, exec_res):
+        shared.setdefault('results', []).append(exec_res)
+
+class TestNodeTimeouts(unittest.TestCase):
+    def test_timed_out_attempt_is_cancelled_and_retried(self):
+        node = HangingNode(hangs=1, max_retries=2, timeout=0.05)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['results'], ['ok'])
+        self.assertEqual((node.attempts, node.cancelled), (2, 1))
+
+    def test_timeout_goes_to_fallback(self):
+        node = HangingNode(max_retries=2, timeout=0.02)
+        shared = {}
+        asyncio.run(node.run_async(shared))
+        self.assertEqual(shared['results'], ['TimeoutError'])
+        self.assertEqual(node.attempts, 2)
+
+    def test_total_timeout_bounds_all_attempts(self):
+        node = HangingNode(max_retries=100, timeout=0.05, total_timeout=0.12)
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(node.run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual(shared['results'], ['TimeoutError'])
+        self.assertEqual(node.attempts, 3)
+
+    def test_backoff_past_the_deadline_falls_back_immediately(self):
+        node = HangingNode(max_retries=3, timeout=0.02, total_timeout=1, wait=Backoff(base=5, jitter=False))
+        start = time.perf_counter()
+        asyncio.run(node.run_async({}))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(node.attempts, 1)
+
+    def test_no_timeout_by_default(self):
+        class Quick(AsyncNode):
+            async def exec_async(self, prep_res):
+                return 1
+        self.assertIsNone(Quick().timeout)
+        asyncio.run(Quick().run_async({}))
+
+class TestFlowDeadline(unittest.TestCase):
+    def test_deadline_reaches_nested_flows(self):
+        inner = AsyncFlow(start=HangingNode())
+        outer = AsyncFlow(start=inner, timeout=0.05)
+        shared = {}
+        start = time.perf_counter()
+        asyncio.run(outer.run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(shared['results'], ['TimeoutError'])
+        self.assertIsNone(pocketflow._deadline.get())
+
+    def test_inner_timeout_cannot_extend_outer_deadline(self):
+        inner = AsyncFlow(start=HangingNode(), timeout=10)
+        outer = AsyncFlow(start=inner, timeout=0.05)
+        start = time.perf_counter()
+        asyncio.run(outer.run_async({}))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_hung_item_does_not_stall_parallel_batch_flow(self):
+        class Slow(AsyncNode):
+            async def prep_async(self, shared):
+                return self.params['i']
+            async def exec_async(self, i):
+                await asyncio.sleep(10 if i == 3 else 0.01)
+                return i
+            async def exec_fallback_async(self, i, exc):
+                return -1
+            async def post_async(self, shared, i, exec_res):
+                shared['results'][i] = exec_res
+
+        class Items(AsyncParallelBatchFlow):
+            async def prep_async(self, shared):
+                return [{'i': i} for i in range(5)]
+
+        shared = {'results': {}}
+        start = time.perf_counter()
+        asyncio.run(Items(start=Slow(), timeout=0.1, max_concurrency=2).run_async(shared))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(shared['results'], {0: 0, 1: 1, 2: 2, 3: -1, 4: 4})
+
+    def test_parallel_batch_node_items_time_out_independently(self):
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared):
+                return [0.01, 10, 0.01]
+            async def exec_async(self, delay):
+                await asyncio.sleep(delay)
+                return delay
+            async def exec_fallback_async(self, delay, exc):
+                return None
+            async def post_async(self, shared, prep_res, exec_res):
+                shared['results'] = exec_res
+
+        shared = {}
+        asyncio.run(Items(timeout=0.05).run_async(shared))
+        self.assertEqual(shared['results'], [0.01, None, 0.01])
+
+if __name__ == '__main__':
+    unittest.main()